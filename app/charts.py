@@ -1,8 +1,78 @@
 import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
+import perf # Local import
+import figure_cache # Local import
+import scoring # Local import
 
-def create_risk_radar_chart(df):
+# Bubble chart customdata layout: [row id (DataFrame index label), Revenue]
+ROW_ID_FIELD = 0
+
+# Above this many points per chart, scatter traces are rendered with WebGL (Scattergl) instead of SVG
+WEBGL_POINT_THRESHOLD = 300
+
+def _scatter_class(n_points, render_mode='auto'):
+    """go.Scatter (SVG) or go.Scattergl (WebGL). render_mode: 'auto' (by WEBGL_POINT_THRESHOLD), 'svg', 'webgl'."""
+    if render_mode == 'webgl' or (render_mode == 'auto' and n_points > WEBGL_POINT_THRESHOLD):
+        return go.Scattergl
+    return go.Scatter
+
+def aggregate_small_points(df, x_col, y_col, revenue_share=0.01, by=None):
+    """
+    Merges the smallest industries (jointly < revenue_share of total Revenue) into one "Inne" point
+    (per 'by' group, e.g. Status), placed at their revenue-weighted mean position.
+    
+    Remaining rows keep their index (row ids); aggregated rows get negative ids and an empty
+    PKD_Code (they are not selectable).
+    
+    Args:
+        df (pd.DataFrame): Chart data (Revenue, PKD_Code, Industry_Name, x_col, y_col).
+        x_col, y_col (str): Position columns (averaged).
+        revenue_share (float): Revenue share covered by the aggregated points.
+        by (str, optional): Column to aggregate within (kept in the output).
+        
+    Returns:
+        pd.DataFrame: Remaining rows + one aggregate row per group.
+    """
+    revenue = df['Revenue'].clip(lower=0)
+    total = revenue.sum()
+    if total <= 0:
+        return df
+
+    # Smallest first: points whose cumulative revenue stays below the share
+    order = revenue.sort_values(kind='stable')
+    small_idx = order.index[(order.cumsum() / total).values < revenue_share]
+    if len(small_idx) < 2:
+        return df
+
+    small = df.loc[small_idx]
+    weights = revenue.loc[small_idx]
+    # Zero-revenue points still count in the mean
+    weights = weights.where(weights > 0, 1e-9)
+
+    mean_cols = [c for c in dict.fromkeys([x_col, y_col, 'Dynamics_YoY', 'Bankruptcy_Rate', 'Debt_to_Revenue']) if c in df.columns]
+    sum_cols = [c for c in ['Revenue', 'Total_Debt'] if c in df.columns]
+
+    weighted = small[mean_cols].mul(weights, axis=0)
+    group_keys = small[by] if by else pd.Series(0, index=small.index)
+    grouped = pd.concat([weighted, small[sum_cols].add_suffix('_sum'), weights.rename('_w')], axis=1).groupby(group_keys.values)
+    sums = grouped.sum()
+    counts = grouped.size()
+
+    agg = sums[mean_cols].div(sums['_w'], axis=0)
+    for col in sum_cols:
+        agg[col] = sums[f'{col}_sum']
+    agg['PKD_Code'] = ''
+    agg['Industry_Name'] = [f"Inne ({n} mniejszych branż)" for n in counts]
+    if by:
+        agg[by] = agg.index
+    agg.index = -np.arange(1, len(agg) + 1)
+
+    return pd.concat([df.drop(index=small_idx), agg])
+
+@perf.timed("chart:risk_radar")
+@figure_cache.cached("risk_radar", columns=['Debt_to_Revenue', 'Total_Debt', 'Revenue', 'Bankruptcy_Rate', 'Dynamics_YoY', 'Industry_Name', 'PKD_Code'])
+def create_risk_radar_chart(df, render_mode='auto', aggregate_share=None):
     """
     Creates the Debt vs Risk Radar Chart (Scatter).
     
@@ -14,6 +84,8 @@ def create_risk_radar_chart(df):
         
     Args:
         df (pd.DataFrame): Data containing Debt, Revenue, Bankruptcy_Rate, etc.
+        render_mode (str): 'auto' (WebGL above WEBGL_POINT_THRESHOLD points), 'svg' or 'webgl'.
+        aggregate_share (float, optional): Merge the smallest industries (this share of revenue) into one point.
         
     Returns:
         go.Figure: Plotly figure object.
@@ -26,33 +98,34 @@ def create_risk_radar_chart(df):
     # Assuming df has 'Total_Debt' and 'Revenue'
     # Use 'Debt_to_Revenue' column if available, else calc
     if 'Debt_to_Revenue' not in df.columns:
-        df['Debt_to_Revenue'] = df.apply(lambda x: x['Total_Debt'] / x['Revenue'] if x['Revenue'] > 0 else 0, axis=1)
+        df['Debt_to_Revenue'] = np.where(df['Revenue'] > 0, df['Total_Debt'] / df['Revenue'].where(df['Revenue'] > 0, 1), 0)
+
+    if aggregate_share:
+        df = aggregate_small_points(df, 'Debt_to_Revenue', 'Bankruptcy_Rate', aggregate_share)
 
     # Scatter Trace
-    fig_risk.add_trace(go.Scatter(
-        x=df['Debt_to_Revenue'],
-        y=df['Bankruptcy_Rate'],
+    # customdata is numeric only (sent as a binary array); names / PKD go through text / hovertext
+    scatter = _scatter_class(len(df), render_mode)
+    fig_risk.add_trace(scatter(
+        x=df['Debt_to_Revenue'].to_numpy(dtype=float),
+        y=df['Bankruptcy_Rate'].to_numpy(dtype=float),
         mode='markers',
         text=df['Industry_Name'],
-        customdata=np.stack((
-            df['Revenue'], 
-            df['Total_Debt'], 
-            df['Dynamics_YoY'],
-            df['PKD_Code']
-        ), axis=-1),
+        hovertext=df['PKD_Code'],
+        customdata=df[['Revenue', 'Total_Debt']].to_numpy(dtype=float),
         marker=dict(
-            size=np.sqrt(df['Revenue']) / np.sqrt(df['Revenue'].max()) * 50 + 10,
-            color=df['Dynamics_YoY'], 
+            size=np.sqrt(df['Revenue'].to_numpy(dtype=float)) / np.sqrt(df['Revenue'].max()) * 50 + 10,
+            color=df['Dynamics_YoY'].to_numpy(dtype=float), 
             colorscale='RdYlGn', # Red = Low Growth/Shrinkage (Bad), Green = High Growth
             showscale=True,
             colorbar=dict(title="Dynamika R/R"),
             line=dict(width=1, color='white') # White border for contrast
         ),
         hovertemplate="<b>%{text}</b><br>" +
-                      "PKD: %{customdata[3]}<br>" +
+                      "PKD: %{hovertext}<br>" +
                       "Zadłużenie: %{x:.2f}x<br>" +
                       "Upadłości: %{y:.2f}%<br>" +
-                      "Dynamika: %{customdata[2]:+.1%}<br>" +
+                      "Dynamika: %{marker.color:+.1%}<br>" +
                       "Przychody: %{customdata[0]:,.0f} mln<br>" +
                       "Dług: %{customdata[1]:,.0f} mln<extra></extra>"
     ))
@@ -74,7 +147,9 @@ def create_risk_radar_chart(df):
     )
     return fig_risk
 
-def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None):
+@perf.timed("chart:main_bubble")
+@figure_cache.cached("main_bubble", columns=['Stability_Score', 'Transformation_Score', 'Revenue', 'Status', 'Industry_Name', 'PKD_Code', 'Dynamics_YoY', 'Bankruptcy_Rate', 'Debt_to_Revenue', 'Total_Debt'])
+def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None, render_mode='auto', aggregate_share=None):
     """
     Creates the main S&T Matrix Bubble Chart.
     
@@ -87,9 +162,14 @@ def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None):
     Args:
         df (pd.DataFrame): Data with pre-calculated Stability/Transformation Scores.
         max_revenue_global (float, optional): Max revenue for scaling bubble sizes consistently. 
+        highlight_pkd (str, optional): PKD code drawn with a highlight border and label.
+        render_mode (str): 'auto' (WebGL above WEBGL_POINT_THRESHOLD points), 'svg' or 'webgl'.
+        aggregate_share (float, optional): Merge the smallest industries (this share of revenue) into one
+            bubble per Status.
         
     Returns:
-        go.Figure: Plotly figure object.
+        go.Figure: Plotly figure object. Every point carries its row id (df index label) in
+            customdata[ROW_ID_FIELD]; resolve clicks with selected_row_id().
     """
     fig = go.Figure()
     
@@ -106,25 +186,36 @@ def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None):
     max_rev = max_revenue_global if max_revenue_global else df['Revenue'].max()
     if max_rev == 0: max_rev = 1
     
-    for status in df['Status'].unique():
-        subset = df[df['Status'] == status]
+    plot_df = df
+    if aggregate_share:
+        plot_df = aggregate_small_points(df, 'Stability_Score', 'Transformation_Score', aggregate_share, by='Status')
+    
+    # One trace per Status; the renderer is chosen from the total number of points
+    scatter = _scatter_class(len(plot_df), render_mode)
+    
+    for status in plot_df['Status'].unique():
+        subset = plot_df[plot_df['Status'] == status]
         if subset.empty: continue
         
-        fig.add_trace(go.Scatter(
-            x=subset['Stability_Score'],
-            y=subset['Transformation_Score'],
+        revenue = subset['Revenue'].to_numpy(dtype=float)
+        row_ids = subset.index.to_numpy(dtype=float)
+        fig.add_trace(scatter(
+            x=subset['Stability_Score'].to_numpy(dtype=float),
+            y=subset['Transformation_Score'].to_numpy(dtype=float),
             mode='markers', # Default hidden text
             text=subset['Industry_Name'], # Needed for hover
+            hovertext=subset['PKD_Code'],
             marker=dict(
-                size=np.sqrt(subset['Revenue'] / max_rev) * 100 + 5, # Sqrt scaling
+                size=np.sqrt(revenue / max_rev) * 100 + 5, # Sqrt scaling
                 color=color_map.get(status, '#888'),
                 opacity=0.8,
                 line=dict(width=1, color='white')
             ),
             name=status,
-            customdata=subset[['Industry_Name', 'Revenue', 'PKD_Code', 'Profitability']],
-            hovertemplate="<b>%{customdata[0]}</b><br>" +
-                          "PKD: %{customdata[2]}<br>" +
+            # Row id (for click -> row resolution) + what the hover needs, numeric (sent as a binary array)
+            customdata=np.column_stack((row_ids, revenue)),
+            hovertemplate="<b>%{text}</b><br>" +
+                          "PKD: %{hovertext}<br>" +
                           "Stability: %{x:.1f}<br>" +
                           "Transformation: %{y:.1f}<br>" +
                           "Revenue: %{customdata[1]:,.0f} mln PLN<extra></extra>"
@@ -138,6 +229,7 @@ def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None):
             fig.add_trace(go.Scatter(
                 x=[h_row['Stability_Score']],
                 y=[h_row['Transformation_Score']],
+                customdata=[[highlight_row.index[0], h_row['Revenue']]],
                 mode='markers+text',
                 text=[h_row['Industry_Name']],
                 textposition="top center",
@@ -175,6 +267,177 @@ def create_main_bubble_chart(df, max_revenue_global=None, highlight_pkd=None):
     
     return fig
 
+@perf.timed("chart:animated_bubble")
+@figure_cache.cached("animated_bubble", columns=['Year', 'PKD_Code', 'Industry_Name', 'Stability_Score', 'Transformation_Score', 'Revenue', 'Status'])
+def create_animated_bubble_chart(df_history, max_revenue_global=None, start_year=None):
+    """
+    Creates the "Time Travel" S&T Matrix: one animation frame per year, played client-side.
+    
+    A single trace carries all bubbles (color = Status per point) and every point has
+    ids = PKD_Code, so Plotly moves the same industry between frames (object constancy)
+    even when its Status changes.
+    
+    Args:
+        df_history (pd.DataFrame): Scored rows of several years (pipeline.score_history).
+        max_revenue_global (float, optional): Max revenue for scaling bubble sizes consistently.
+        start_year (int, optional): Year shown first (default: last year).
+        
+    Returns:
+        go.Figure: Plotly figure with frames, a year slider and Play/Pause buttons.
+    """
+    fig = go.Figure()
+    
+    if df_history.empty: return fig
+
+    color_map = {
+        'CRITICAL': '#ff4b4b',
+        'OPPORTUNITY': '#2ecc71',
+        'Neutral': '#3498db'
+    }
+
+    max_rev = max_revenue_global if max_revenue_global else df_history['Revenue'].max()
+    if max_rev == 0: max_rev = 1
+
+    # Per-point attributes for all years at once, then sliced per frame
+    df = df_history.sort_values(['Year', 'PKD_Code'], kind='stable')
+    years = df['Year'].to_numpy()
+    x = df['Stability_Score'].to_numpy(dtype=float)
+    y = df['Transformation_Score'].to_numpy(dtype=float)
+    revenue = df['Revenue'].to_numpy(dtype=float)
+    sizes = np.sqrt(np.clip(revenue, 0, None) / max_rev) * 100 + 5
+    colors = df['Status'].map(color_map).fillna('#888').to_numpy()
+    ids = df['PKD_Code'].astype(str).to_numpy()
+    names = df['Industry_Name'].to_numpy()
+
+    frame_years, starts = np.unique(years, return_index=True)
+    bounds = list(starts) + [len(df)]
+
+    def frame_trace(i):
+        sl = slice(bounds[i], bounds[i + 1])
+        return go.Scatter(
+            x=x[sl], y=y[sl], ids=ids[sl],
+            text=names[sl], hovertext=ids[sl], customdata=revenue[sl],
+            marker=dict(size=sizes[sl], color=colors[sl])
+        )
+
+    frames = [go.Frame(name=str(year), data=[frame_trace(i)], traces=[0]) for i, year in enumerate(frame_years)]
+
+    start_idx = len(frame_years) - 1
+    if start_year is not None and start_year in frame_years:
+        start_idx = int(np.searchsorted(frame_years, start_year))
+
+    base = frame_trace(start_idx)
+    base.update(
+        mode='markers',
+        marker=dict(opacity=0.8, line=dict(width=1, color='white'), sizemode='diameter'),
+        showlegend=False,
+        hovertemplate="<b>%{text}</b><br>" +
+                      "PKD: %{hovertext}<br>" +
+                      "Stability: %{x:.1f}<br>" +
+                      "Transformation: %{y:.1f}<br>" +
+                      "Revenue: %{customdata:,.0f} mln PLN<extra></extra>"
+    )
+    fig.add_trace(base)
+
+    # Legend only (statuses are per-point colors of the single animated trace)
+    for status, color in color_map.items():
+        fig.add_trace(go.Scatter(x=[None], y=[None], mode='markers', name=status, marker=dict(size=12, color=color)))
+
+    fig.frames = frames
+
+    play_args = dict(frame=dict(duration=700, redraw=False), transition=dict(duration=500, easing='cubic-in-out'), fromcurrent=True, mode='immediate')
+    fig.update_layout(
+        updatemenus=[dict(
+            type='buttons', direction='left', x=0.0, y=-0.08, xanchor='left', yanchor='top', showactive=False,
+            buttons=[
+                dict(label="▶ Play", method='animate', args=[None, play_args]),
+                dict(label="⏸ Pauza", method='animate', args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate', transition=dict(duration=0))])
+            ]
+        )],
+        sliders=[dict(
+            active=start_idx, x=0.12, y=-0.05, len=0.88, pad=dict(t=30),
+            currentvalue=dict(prefix="Rok: ", font=dict(size=16, color='white')),
+            steps=[dict(
+                label=str(year), method='animate',
+                args=[[str(year)], dict(frame=dict(duration=300, redraw=False), transition=dict(duration=300), mode='immediate')]
+            ) for year in frame_years]
+        )],
+        # Fixed axes so bubbles "float" between years instead of the axes rescaling
+        xaxis=dict(title="Stability Score (Fundament Finansowy)", range=[0, 100]),
+        yaxis=dict(title="Transformation Score (Inwestycje + ArXiv AI)", range=[0, 100]),
+        height=750,
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color="white")
+    )
+    fig.add_hline(y=50, line_dash="dash", line_color="gray")
+    fig.add_vline(x=50, line_dash="dash", line_color="gray")
+    
+    return fig
+
+@perf.timed("chart:drill_children")
+@figure_cache.cached("drill_children", columns=['Stability_Score', 'Transformation_Score', 'Revenue', 'Status', 'Industry_Name', 'PKD_Code'])
+def create_drill_children_chart(children_df):
+    """
+    Sub-chart of one drill-down level: the direct children of a PKD code on the S&T plane.
+    One trace in the row order of children_df, so a selection's point_index is its row position.
+    """
+    color_map = {
+        'CRITICAL': '#ff4b4b',
+        'OPPORTUNITY': '#2ecc71',
+        'Neutral': '#3498db'
+    }
+    max_rev_sub = children_df['Revenue'].max()
+    if max_rev_sub == 0: max_rev_sub = 1
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=children_df['Stability_Score'],
+        y=children_df['Transformation_Score'],
+        mode='markers',
+        text=children_df['Industry_Name'],
+        marker=dict(
+            size=np.sqrt(children_df['Revenue'] / max_rev_sub) * 60 + 10,
+            color=children_df['Status'].map(color_map).fillna('#888'),
+            line=dict(width=1, color='white')
+        ),
+        customdata=children_df[['PKD_Code']], # Pass PKD for selection
+        hovertemplate="<b>%{text}</b><extra></extra>"
+    ))
+
+    fig.update_layout(
+        xaxis_title="Stability Score",
+        yaxis_title="Transformation Score",
+        xaxis=dict(autorange=True, showgrid=False, zeroline=False),
+        yaxis=dict(autorange=True, showgrid=False, zeroline=False),
+        height=300,
+        margin=dict(l=0,r=0,t=0,b=0),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        showlegend=False,
+        font=dict(color='white')
+    )
+    return fig
+
+def selected_row_id(point):
+    """
+    Row id (DataFrame index label) of a clicked bubble from a Streamlit selection point, or None
+    (aggregated "Inne" bubbles and points without customdata).
+    """
+    customdata = point.get('customdata')
+    if isinstance(customdata, dict):
+        # Rows of binary (typed array) customdata may arrive serialized as {"0": ..., "1": ...}
+        customdata = customdata.get(str(ROW_ID_FIELD))
+    elif isinstance(customdata, (list, tuple)):
+        customdata = customdata[ROW_ID_FIELD] if customdata else None
+    row_id = customdata
+    if row_id is None or row_id < 0:
+        return None
+    return int(row_id)
+
+@perf.timed("chart:historical")
+@figure_cache.cached("historical", columns=['Year', 'Is_Forecast'], column_args=('metric_col',))
 def create_historical_chart(df, metric_col, title, y_axis_title, is_percent=False):
     """Creates a historical line chart with forecast."""
     fig = go.Figure()
@@ -238,6 +501,8 @@ def create_historical_chart(df, metric_col, title, y_axis_title, is_percent=Fals
 
     return fig
 
+@perf.timed("chart:st_time")
+@figure_cache.cached("st_time", columns=['Year', 'Is_Forecast', 'Stability_Score', 'Transformation_Score'])
 def create_st_time_chart(df):
     """
     Creates a time series chart showing S&T score history and forecast.
@@ -317,7 +582,9 @@ def create_st_time_chart(df):
         
     return fig
 
-def create_stability_radar_chart(row, df_context):
+@perf.timed("chart:stability_radar")
+@figure_cache.cached("stability_radar", columns=['Industry_Name', 'Net_Profit_Margin', 'Dynamics_YoY', 'Debt_to_Revenue', 'Cash_Ratio'])
+def create_stability_radar_chart(row, bounds, percentiles=None):
     """
     Creates a Radar Chart visualizing the 4 components of Stability Score.
     
@@ -327,45 +594,33 @@ def create_stability_radar_chart(row, df_context):
     3. Safety (Debt Burden - Inverse)
     4. Liquidity (Cash Ratio)
     
-    normalization is relative to df_context (current view).
+    normalization is relative to the peers of the same year and level: 'bounds' are the precomputed
+    5th/95th percentiles {metric: (low, high)} from normalization.bounds_for (no quantiles per render).
+    'percentiles' (optional, {metric: 0-100} from peers.lookup) are shown in the hover.
     """
     fig = go.Figure()
     
-    if row is None or df_context.empty: return fig
+    if row is None or not bounds: return fig
     
-    # Helper for relative normalization (0-100)
-    # We clip to 5th/95th percentile to avoid outliers squashing the chart
+    # Helper for relative normalization (0-100), winsorized to the peer bounds. Missing -> 50
     def rel_norm(val, col_name, inverse=False):
-        # Handle missings
-        if pd.isna(val): return 50
-        
-        vals = df_context[col_name].fillna(0)
-        min_v = vals.quantile(0.05)
-        max_v = vals.quantile(0.95)
-        
-        if max_v == min_v: return 50
-        
-        norm_val = np.clip((val - min_v) / (max_v - min_v), 0, 1)
+        norm_val = float(scoring.norm(val if pd.notna(val) else np.nan, *bounds[col_name]))
         if inverse:
             norm_val = 1.0 - norm_val
         return norm_val * 100
 
     # Calculate Component Scores
     # 1. Profitability
-    s_profit = rel_norm(row.get('Net_Profit_Margin', 0), 'Net_Profit_Margin')
+    s_profit = rel_norm(row.get('Net_Profit_Margin', np.nan), 'Net_Profit_Margin')
     
     # 2. Growth
-    s_growth = rel_norm(row.get('Dynamics_YoY', 0), 'Dynamics_YoY')
+    s_growth = rel_norm(row.get('Dynamics_YoY', np.nan), 'Dynamics_YoY')
     
     # 3. Safety (Debt) -> Inverse (Low debt is good)
-    # Ensure Debt_to_Revenue exists
-    if 'Debt_to_Revenue' not in df_context.columns:
-         s_debt = 50
-    else:
-         s_debt = rel_norm(row.get('Debt_to_Revenue', 0), 'Debt_to_Revenue', inverse=True)
+    s_debt = rel_norm(row.get('Debt_to_Revenue', np.nan), 'Debt_to_Revenue', inverse=True)
     
     # 4. Liquidity
-    s_liq = rel_norm(row.get('Cash_Ratio', 0), 'Cash_Ratio')
+    s_liq = rel_norm(row.get('Cash_Ratio', np.nan), 'Cash_Ratio')
     
     # Data for Radar
     categories = ['Zyskowność', 'Wzrost (YoY)', 'Bezpieczeństwo (Dług)', 'Płynność (Gotówka)']
@@ -375,13 +630,24 @@ def create_stability_radar_chart(row, df_context):
     values += [values[0]]
     categories += [categories[0]]
     
+    # Peer percentiles of the same metrics (hover)
+    hover = dict(hovertemplate="%{theta}: %{r:.0f}<extra></extra>")
+    if percentiles:
+        peer_pct = [percentiles.get(m) for m in ['Net_Profit_Margin', 'Dynamics_YoY', 'Debt_to_Revenue', 'Cash_Ratio']]
+        peer_pct = [np.nan if p is None else p for p in peer_pct]
+        hover = dict(
+            customdata=peer_pct + [peer_pct[0]],
+            hovertemplate="%{theta}: %{r:.0f}<br>Percentyl wśród konkurentów: %{customdata:.0f}<extra></extra>"
+        )
+
     fig.add_trace(go.Scatterpolar(
         r=values,
         theta=categories,
         fill='toself',
         name=row['Industry_Name'],
         line=dict(color='#2ecc71'),
-        fillcolor='rgba(46, 204, 113, 0.4)'
+        fillcolor='rgba(46, 204, 113, 0.4)',
+        **hover
     ))
     
     fig.update_layout(
@@ -0,0 +1,172 @@
+"""
+Cross-sector co-movement: PKD x PKD correlation matrices over the years ("which industries move together").
+
+For one PKD level, every code's yearly series of a metric (rows of the dense tensor, tensor.py) is
+correlated with every other code's:
+
+    Dynamics_YoY     - revenue dynamics move together (shared demand / cycle)
+    Bankruptcy_Rate  - bankruptcy rates rise together (contagion)
+
+Pearson correlation is pairwise NaN-aware: each pair uses only the real years both codes have
+(at least MIN_OVERLAP_YEARS), the same definition as DataFrame.corr(min_periods=...). All pairs are
+computed with matrix products over the presence masks, in row blocks of BLOCK_SIZE codes so the
+intermediates stay (block x n) even at L4 size. The first year of a code (Dynamics_YoY filled with 0,
+no prior revenue) is left out.
+
+Only the top-k peers of every code (with their correlation on each metric) are kept by default; the
+dense matrices only for levels up to MAX_MATRIX_CODES codes. build_correlations() runs once per
+dataset version and level (utils.load_correlations, also in the warm-up); the Boardroom only looks
+up the precomputed peers of the selected code.
+"""
+import numpy as np
+import pandas as pd
+
+import perf
+import pkd
+import tensor
+
+CORRELATION_METRICS = ['Dynamics_YoY', 'Bankruptcy_Rate']
+MIN_OVERLAP_YEARS = 6
+TOP_K = 10
+BLOCK_SIZE = 512
+MAX_MATRIX_CODES = 2000  # dense (n, n) float32 kept up to ~16 MB per metric
+
+
+def corr_blocks(x, block_size=BLOCK_SIZE, min_periods=MIN_OVERLAP_YEARS):
+    """
+    Pairwise NaN-aware Pearson correlation of the rows of x, block by block.
+
+    Args:
+        x (np.ndarray): (n, n_obs) series, NaN = missing.
+
+    Yields:
+        (start, np.ndarray): Rows start..start+b of the (n, n) correlation matrix, shape (b, n);
+            NaN where the overlap is shorter than min_periods or a series is constant on it.
+    """
+    x = np.asarray(x, dtype=float)
+    present = ~np.isnan(x)
+    mask = present.astype(float)
+    # Centering first keeps the sums below well conditioned (no effect on the correlation)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        row_mean = np.where(present, x, 0.0).sum(axis=1) / present.sum(axis=1)
+    x0 = np.where(present, x - row_mean[:, None], 0.0)
+    x0_sq = x0 * x0
+
+    for start in range(0, len(x), block_size):
+        end = min(start + block_size, len(x))
+        m_b, x_b = mask[start:end], x0[start:end]
+
+        n = m_b @ mask.T
+        sx = x_b @ mask.T         # sum of the block row over the overlap
+        sy = m_b @ x0.T           # sum of the other row over the overlap
+        sxx = x0_sq[start:end] @ mask.T
+        syy = m_b @ x0_sq.T
+        sxy = x_b @ x0.T
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            corr = cov / np.sqrt(var_x * var_y)
+
+        eps = 1e-12 * np.maximum(1.0, np.maximum(sxx, syy))
+        valid = (n >= min_periods) & (var_x > eps) & (var_y > eps)
+        yield start, np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+
+
+def _top_k(block, start, k):
+    """Indices / values of the k highest correlations per row of a block (self and NaN excluded)."""
+    scores = np.where(np.isnan(block), -np.inf, block)
+    scores[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+    k = min(k, scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k else np.empty((len(block), 0), dtype=int)
+    top = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-top, axis=1, kind='stable')
+    idx, top = np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
+    return np.where(np.isfinite(top), idx, -1), np.where(np.isfinite(top), top, np.nan)
+
+
+def level_series(t, level, metric):
+    """
+    Yearly series of one metric for the codes of one level: (codes, (n_codes, n_years) float array).
+    Forecast years and the first year of a code's dynamics are NaN.
+    """
+    in_level = pkd.pkd_level(pd.Series(t['codes'])).to_numpy() == level
+    values = tensor.metric_view(t, metric)[in_level].astype(float)
+    values = np.where(t['real'][in_level], values, np.nan)
+    if metric == 'Dynamics_YoY' and 'Revenue_Prev_Year' in t['metrics']:
+        prev = tensor.metric_view(t, 'Revenue_Prev_Year')[in_level]
+        values = np.where(np.isnan(prev), np.nan, values)
+    return t['codes'][in_level], values
+
+
+@perf.timed("correlation:build")
+def build_correlations(t, level, metrics=None, k=TOP_K, block_size=BLOCK_SIZE, min_periods=MIN_OVERLAP_YEARS,
+                       keep_matrix=None):
+    """
+    Top-k correlated peers (and optionally the full matrices) of every code of one level.
+
+    Args:
+        t (dict): tensor.build_tensor() output.
+        level (str): 'L1'..'L4'.
+        keep_matrix (bool, optional): Keep the dense (n, n) float32 matrices; default only up to
+            MAX_MATRIX_CODES codes (the top-k tables are always built).
+
+    Returns:
+        dict: level, codes (n,), names (n,), metrics,
+              top_index {metric: int32 (n, k), -1 = none} - peers ranked by that metric,
+              top_corr {metric: {any metric: float32 (n, k)}} - the peers' correlation on every metric,
+              matrix {metric: float32 (n, n)} (empty if not kept).
+    """
+    metrics = [m for m in (metrics or CORRELATION_METRICS) if m in t['metrics']]
+    series = {m: level_series(t, level, m) for m in metrics}
+    codes = series[metrics[0]][0] if metrics else np.array([], dtype=str)
+    n, k = len(codes), min(k, len(codes))
+    if keep_matrix is None:
+        keep_matrix = n <= MAX_MATRIX_CODES
+
+    result = {
+        'level': level, 'codes': codes, 'names': t['names'][tensor.code_ids(t, codes)] if n else np.array([], dtype=object),
+        'metrics': metrics,
+        'top_index': {m: np.full((n, k), -1, dtype=np.int32) for m in metrics},
+        'top_corr': {m: {o: np.full((n, k), np.nan, dtype=np.float32) for o in metrics} for m in metrics},
+        'matrix': {m: np.full((n, n), np.nan, dtype=np.float32) for m in metrics} if keep_matrix else {}
+    }
+
+    # All metrics advance block by block together, so a peer's correlation on the other metrics
+    # is read from blocks that are in memory anyway
+    generators = [corr_blocks(series[m][1], block_size, min_periods) for m in metrics]
+    for blocks in zip(*generators):
+        start = blocks[0][0]
+        end = start + len(blocks[0][1])
+        by_metric = {m: block for m, (_, block) in zip(metrics, blocks)}
+        for metric, block in by_metric.items():
+            if keep_matrix:
+                result['matrix'][metric][start:end] = block
+            idx, _ = _top_k(block, start, k)
+            result['top_index'][metric][start:end] = idx
+            for other, other_block in by_metric.items():
+                values = np.take_along_axis(other_block, np.maximum(idx, 0), axis=1)
+                result['top_corr'][metric][other][start:end] = np.where(idx >= 0, values, np.nan)
+    return result
+
+
+def top_peers(corr, pkd_code, metric='Dynamics_YoY', k=5):
+    """
+    The k codes most correlated with pkd_code on one metric (a lookup, nothing is computed).
+
+    Returns:
+        pd.DataFrame: PKD_Code, Industry_Name and the correlation on every metric of corr, sorted by
+            'metric'; empty if the code isn't in the level or has no peers with enough overlap.
+    """
+    columns = ['PKD_Code', 'Industry_Name'] + corr['metrics']
+    pos = np.searchsorted(corr['codes'], pkd_code)
+    if metric not in corr['metrics'] or pos >= len(corr['codes']) or corr['codes'][pos] != pkd_code:
+        return pd.DataFrame(columns=columns)
+
+    idx = corr['top_index'][metric][pos][:k]
+    found = idx >= 0
+    peers = {'PKD_Code': corr['codes'][idx[found]], 'Industry_Name': corr['names'][idx[found]]}
+    for m in corr['metrics']:
+        peers[m] = corr['top_corr'][metric][m][pos][:k][found]
+    return pd.DataFrame(peers, columns=columns)
@@ -0,0 +1,120 @@
+"""
+Pre-aggregated roll-up cube for the headline KPIs (main.py display_aggregates).
+
+The cube holds the additive sums per (Year, Level, Sector) and is built once per loaded dataset,
+so the KPIs of any sector / level filter are a lookup ("Wszystkie" = a sum over ~20 sector rows).
+Revenue growth uses the TRUE prior-year revenue of the same PKD codes (Revenue_Prev_Year, or the
+previous year's row), not a value implied from Dynamics_YoY.
+"""
+import numpy as np
+import pandas as pd
+
+import pkd
+
+SUM_COLUMNS = [
+    'Revenue', 'Net_Profit', 'Total_Debt', 'Cash', 'Liabilities_Short', 'Bankruptcy_Count', 'Entity_Count',
+    'Revenue_Prev', 'Revenue_Matched'
+]
+KEY_COLUMNS = ['Year', 'Level', 'Sector']
+
+
+def _column(df, col):
+    return df[col].to_numpy(dtype=float) if col in df.columns else np.zeros(len(df))
+
+
+def additive_columns(df, df_all=None):
+    """
+    Per-row additive measures (SUM_COLUMNS) of a snapshot.
+
+    Revenue_Prev is the previous year's revenue of the same PKD (Revenue_Prev_Year if present, else
+    looked up in df_all); Revenue_Matched is the current revenue of the rows that have one, so
+    growth = Revenue_Matched / Revenue_Prev - 1 compares the same set of industries.
+    """
+    if 'Revenue_Prev_Year' in df.columns:
+        prev = _column(df, 'Revenue_Prev_Year')
+    else:
+        source = df if df_all is None else df_all
+        prev_rows = source[['PKD_Code', 'Year', 'Revenue']].assign(Year=source['Year'] + 1)
+        prev = df[['PKD_Code', 'Year']].merge(prev_rows, on=['PKD_Code', 'Year'], how='left')['Revenue'].to_numpy(dtype=float)
+
+    revenue = _column(df, 'Revenue')
+    has_prev = ~np.isnan(prev) & ~np.isnan(revenue)
+
+    if 'Bankruptcy_Count' in df.columns:
+        bankrupt = _column(df, 'Bankruptcy_Count')
+    else:
+        bankrupt = _column(df, 'Bankruptcy_Rate') * _column(df, 'Entity_Count') / 100
+
+    return pd.DataFrame({
+        'Revenue': revenue,
+        'Net_Profit': _column(df, 'Net_Profit'),
+        'Total_Debt': _column(df, 'Total_Debt'),
+        'Cash': _column(df, 'Cash'),
+        'Liabilities_Short': _column(df, 'Liabilities_Short'),
+        'Bankruptcy_Count': bankrupt,
+        'Entity_Count': _column(df, 'Entity_Count'),
+        'Revenue_Prev': np.where(has_prev, prev, 0.0),
+        'Revenue_Matched': np.where(has_prev, revenue, 0.0)
+    }, index=df.index)
+
+
+def totals(df, df_all=None):
+    """SUM_COLUMNS totals of a (filtered) snapshot, e.g. with a revenue cut-off the cube can't answer."""
+    return additive_columns(df, df_all).sum()
+
+
+def build_cube(df_all):
+    """
+    Sums of SUM_COLUMNS per (Year, Level, Sector) for all rows in one grouped pass.
+
+    Returns:
+        pd.DataFrame: Index KEY_COLUMNS (Sector = pkd.sector_labels, as in the sidebar), SUM_COLUMNS + 'Rows'.
+    """
+    levels = pkd.pkd_level(df_all['PKD_Code']).to_numpy()
+    keep = levels != ''
+    df = df_all[keep]
+
+    measures = additive_columns(df, df_all)
+    measures['Rows'] = 1
+    keys = [df['Year'].to_numpy(), levels[keep], pkd.sector_labels(df['PKD_Code'], df_all).to_numpy()]
+    cube = measures.groupby(keys).sum()
+    cube.index.names = KEY_COLUMNS
+    return cube
+
+
+def lookup(cube, year, level, sector=None):
+    """
+    SUM_COLUMNS totals of one sidebar filter; sector None / "Wszystkie" sums all sectors of the level.
+
+    Returns:
+        pd.Series or None: None if the (year, level) is not in the cube.
+    """
+    if cube is None:
+        return None
+    if sector and sector != "Wszystkie":
+        key = (year, level, sector)
+        return cube.loc[key] if key in cube.index else None
+    try:
+        return cube.loc[(year, level)].sum()
+    except KeyError:
+        return None
+
+
+def kpis(sums):
+    """
+    Headline KPIs from SUM_COLUMNS totals.
+
+    Returns:
+        dict: total_revenue, dynamics (%), net_margin (%), debt_ratio (x), cash_ratio, risk (%), bankruptcies.
+    """
+    revenue = sums['Revenue']
+    prev = sums['Revenue_Prev']
+    return {
+        'total_revenue': revenue,
+        'dynamics': (sums['Revenue_Matched'] - prev) / prev * 100 if prev else 0,
+        'net_margin': sums['Net_Profit'] / revenue * 100 if revenue else 0,
+        'debt_ratio': sums['Total_Debt'] / revenue if revenue else 0,
+        'cash_ratio': sums['Cash'] / sums['Liabilities_Short'] if sums['Liabilities_Short'] else 0,
+        'risk': sums['Bankruptcy_Count'] / sums['Entity_Count'] * 100 if sums['Entity_Count'] else 0,
+        'bankruptcies': sums['Bankruptcy_Count']
+    }
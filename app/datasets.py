@@ -0,0 +1,134 @@
+"""
+Dataset version manager: hot reload of the data artifacts without restarting the server.
+
+The artifacts (processed index CSV, AI debates JSON) are watched with watchdog. A change is
+debounced (writers may touch a file several times), then:
+
+    1. the new version token is computed from the files' (size, mtime),
+    2. prepare(token) loads the new version into the caches (in the watcher thread),
+    3. only then the token is published - one assignment, so readers see the old or the new
+       version, never a mix. A failing prepare (e.g. a half-written CSV) keeps the old version.
+
+Every downstream cache is keyed by the token (utils.load_*), and a script run reads the token once
+at its start, so in-flight sessions finish on the version they started with while new reruns get
+the new one. Without watchdog the files are re-checked on every current() call instead.
+"""
+import hashlib
+import os
+import threading
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to checking the files on every current() call
+    FileSystemEventHandler = object
+    Observer = None
+
+DEBOUNCE_S = 1.0
+
+
+def version_token(paths):
+    """Short token of the artifacts' (size, mtime); changes whenever any of them is rewritten or replaced."""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+        except OSError:
+            digest.update(f"{path}:missing;".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _ArtifactHandler(FileSystemEventHandler):
+    # watchdog calls on_any_event for every event in the watched directories
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        touched = {os.path.abspath(p) for p in (event.src_path, getattr(event, 'dest_path', '')) if p}
+        if touched.intersection(self.manager['paths']):
+            _schedule_refresh(self.manager)
+
+
+def watch(paths, prepare=None, debounce_s=DEBOUNCE_S):
+    """
+    Starts watching the artifacts (the initial version is published as is, without prepare).
+
+    Args:
+        paths (list): Artifact files.
+        prepare (callable, optional): prepare(token) loads a new version before it is published.
+        debounce_s (float): Quiet time after the last file event before a refresh.
+
+    Returns:
+        dict: Manager state: token (published version), swaps (count), error (last failed refresh), ...
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    manager = {
+        'paths': paths, 'prepare': prepare, 'debounce_s': debounce_s,
+        'token': version_token(paths), 'swaps': 0, 'error': None,
+        'lock': threading.Lock(), 'timer': None, 'observer': None
+    }
+    if Observer is not None:
+        observer = Observer()
+        handler = _ArtifactHandler(manager)
+        for directory in sorted({os.path.dirname(p) for p in paths}):
+            if os.path.isdir(directory):
+                observer.schedule(handler, directory, recursive=False)
+        observer.daemon = True
+        observer.start()
+        manager['observer'] = observer
+    return manager
+
+
+def _schedule_refresh(manager):
+    # Debounce: every event restarts the timer
+    with manager['lock']:
+        if manager['timer'] is not None:
+            manager['timer'].cancel()
+        timer = threading.Timer(manager['debounce_s'], refresh, args=(manager,))
+        timer.daemon = True
+        manager['timer'] = timer
+        timer.start()
+
+
+def refresh(manager):
+    """
+    Publishes a new version if the artifacts changed (prepare first, then the token swap).
+
+    Returns:
+        bool: True if a new version was published.
+    """
+    with manager['lock']:
+        token = version_token(manager['paths'])
+        if token == manager['token']:
+            return False
+        if manager['prepare'] is not None:
+            try:
+                manager['prepare'](token)
+            except Exception as e:
+                manager['error'] = f"{token}: {e}"
+                return False
+        manager['token'] = token
+        manager['swaps'] += 1
+        manager['error'] = None
+        return True
+
+
+def current(manager):
+    """Published version token (without watchdog the files are checked first)."""
+    if manager['observer'] is None:
+        refresh(manager)
+    return manager['token']
+
+
+def stop(manager):
+    """Stops the watcher thread and a pending refresh."""
+    with manager['lock']:
+        if manager['timer'] is not None:
+            manager['timer'].cancel()
+    if manager['observer'] is not None:
+        manager['observer'].stop()
+        manager['observer'].join()
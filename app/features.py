@@ -0,0 +1,105 @@
+"""
+Rolling-window risk features per PKD code, computed once at load (pipeline.read_processed_index).
+
+Single-year YoY dynamics and point-in-time ratios can't tell a volatile industry from a steady
+one. For every real (non-forecast) row, over the calendar years up to and including its own:
+
+    Revenue_CAGR_3Y / _5Y     - (Revenue / Revenue k years earlier) ** (1 / k) - 1
+    Dynamics_Volatility_5Y    - std of Dynamics_YoY over the last 5 years
+    Margin_Volatility_5Y      - std of Net_Profit_Margin (p.p.) over the last 5 years
+    Revenue_Max_Drawdown_5Y   - largest drop from a running revenue peak within the last 5 years
+                                (0.25 = revenue fell 25% below an earlier peak; 0 = no drop)
+
+The history is scattered once into a dense (PKD, calendar year) grid, so all windows of all codes
+are computed in one vectorized pass; missing years are gaps (NaN), never shifted neighbours.
+Volatility needs 3 observations in the window, drawdown 2, CAGR both endpoints with revenue > 0.
+Forecast rows get NaN.
+"""
+import numpy as np
+import pandas as pd
+
+import forecasting
+import perf
+
+WINDOW_YEARS = 5
+CAGR_YEARS = (3, 5)
+MIN_VOLATILITY_OBS = 3
+
+FEATURE_COLUMNS = [
+    'Revenue_CAGR_3Y', 'Revenue_CAGR_5Y', 'Dynamics_Volatility_5Y', 'Margin_Volatility_5Y',
+    'Revenue_Max_Drawdown_5Y'
+]
+
+
+def _windows(grid, width):
+    """(n_codes, n_years, width) trailing windows along the year axis (NaN before the first year)."""
+    padded = np.pad(grid, ((0, 0), (width - 1, 0)), constant_values=np.nan)
+    return np.lib.stride_tricks.sliding_window_view(padded, width, axis=1)
+
+
+def _cagr(revenue, years):
+    prev = np.full(revenue.shape, np.nan)
+    prev[:, years:] = revenue[:, :-years]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((revenue > 0) & (prev > 0), (revenue / prev) ** (1.0 / years) - 1, np.nan)
+
+
+def _volatility(grid, width=WINDOW_YEARS, min_obs=MIN_VOLATILITY_OBS):
+    """Sample std (ddof=1) per trailing window, NaN below min_obs observations."""
+    win = _windows(grid, width)
+    valid = ~np.isnan(win)
+    n = valid.sum(axis=2)
+    values = np.where(valid, win, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = values.sum(axis=2) / n
+        sq = np.where(valid, win - mean[:, :, None], 0.0) ** 2
+        std = np.sqrt(sq.sum(axis=2) / (n - 1))
+    return np.where(n >= min_obs, std, np.nan)
+
+
+def _max_drawdown(revenue, width=WINDOW_YEARS):
+    """Largest relative drop below the running peak within each trailing window (>= 0)."""
+    win = _windows(revenue, width)
+    peak = np.fmax.accumulate(win, axis=2)  # fmax skips NaN gaps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drop = np.where(peak > 0, 1 - win / peak, np.nan)
+    n = (~np.isnan(win)).sum(axis=2)
+    drop = np.where(np.isnan(drop), -np.inf, drop).max(axis=2)
+    return np.where((n >= 2) & np.isfinite(drop), np.maximum(drop, 0.0), np.nan)
+
+
+@perf.timed("features:add_risk_features")
+def add_risk_features(df):
+    """
+    Adds FEATURE_COLUMNS (float32) to a long-format index (one row per PKD and year).
+
+    Returns:
+        pd.DataFrame: New frame with the feature columns (existing ones are overwritten).
+    """
+    real = forecasting.real_rows_mask(df).to_numpy(dtype=bool)
+    code_idx, codes = pd.factorize(df['PKD_Code'])
+    years = df['Year'].to_numpy(dtype=int)
+
+    out = {c: np.full(len(df), np.nan, dtype=np.float32) for c in FEATURE_COLUMNS}
+    if not real.any():
+        return df.assign(**out)
+
+    first_year = years[real].min()
+    n_years = years[real].max() - first_year + 1
+    rows, cols = code_idx[real], years[real] - first_year
+
+    def grid(column):
+        g = np.full((len(codes), n_years), np.nan)
+        g[rows, cols] = df[column].to_numpy(dtype=float, na_value=np.nan)[real]
+        return g
+
+    revenue = grid('Revenue')
+    features = {
+        **{f'Revenue_CAGR_{k}Y': _cagr(revenue, k) for k in CAGR_YEARS},
+        'Dynamics_Volatility_5Y': _volatility(grid('Dynamics_YoY')),
+        'Margin_Volatility_5Y': _volatility(grid('Net_Profit_Margin')),
+        'Revenue_Max_Drawdown_5Y': _max_drawdown(revenue),
+    }
+    for column, values in features.items():
+        out[column][real] = values[rows, cols]
+    return df.assign(**out)
@@ -0,0 +1,140 @@
+import collections
+import functools
+import hashlib
+import inspect
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Process-wide LRU cache of built Plotly figures (shared by all Streamlit sessions).
+# Keys are cheap fingerprints of the DataFrame/Series columns a chart reads + its other arguments,
+# so a rerun caused by an unrelated widget gets the already built figure back.
+_lock = threading.Lock()
+_entries = collections.OrderedDict()
+_stats = collections.defaultdict(lambda: {'hits': 0, 'misses': 0, 'evictions': 0})
+_config = {
+    'enabled': os.environ.get('FIGURE_CACHE', '1') != '0',
+    'max_entries': int(os.environ.get('FIGURE_CACHE_SIZE', 64))
+}
+
+
+def set_enabled(enabled):
+    """Turns the cache on/off (e.g. to time uncached builds). Returns the previous setting."""
+    previous = _config['enabled']
+    _config['enabled'] = bool(enabled)
+    return previous
+
+
+def set_max_entries(max_entries):
+    """Bounds the number of cached figures (least recently used ones are evicted)."""
+    with _lock:
+        _config['max_entries'] = max(0, int(max_entries))
+        _evict()
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+
+
+def _evict():
+    while len(_entries) > _config['max_entries']:
+        key, _ = _entries.popitem(last=False)
+        _stats[key[0]]['evictions'] += 1
+
+
+def _update_digest(digest, label, values):
+    # Raw bytes for numeric / bool / datetime arrays, joined text for everything else
+    values = np.asarray(values)
+    digest.update(f"{label}:{values.dtype}:{len(values)};".encode('utf-8'))
+    if values.dtype.kind in 'biufcmM':
+        digest.update(np.ascontiguousarray(values).tobytes())
+    else:
+        digest.update('\x1f'.join(map(str, values.tolist())).encode('utf-8', 'surrogatepass'))
+
+
+def fingerprint(value, columns=None):
+    """
+    Cheap content fingerprint of a chart argument.
+
+    DataFrames are hashed on the index (charts embed it as row ids) and on the given columns only
+    (the ones the chart reads), column by column; Series (single rows) on the given labels;
+    other values by repr.
+    """
+    if isinstance(value, pd.DataFrame):
+        cols = [c for c in columns if c in value.columns] if columns is not None else list(value.columns)
+        digest = hashlib.blake2b(digest_size=16)
+        _update_digest(digest, '__index__', value.index.to_numpy())
+        for col in cols:
+            _update_digest(digest, col, value[col].to_numpy())
+        return ('df', tuple(cols), len(value), digest.hexdigest())
+    if isinstance(value, pd.Series):
+        if columns is not None:
+            value = value[value.index.intersection(columns, sort=False)]
+        return ('series', repr(value.to_dict()))
+    if isinstance(value, np.ndarray):
+        return ('array', value.shape, hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest())
+    return repr(value)
+
+
+def cached(name, columns=None, column_args=()):
+    """
+    Decorator caching a chart builder by fingerprint of its arguments.
+
+    Args:
+        name (str): Chart name (stats key).
+        columns (list, optional): Columns of DataFrame/Series arguments the chart reads (all if None).
+        column_args (tuple): Names of arguments whose values are column names read by the chart
+                             (e.g. 'metric_col').
+
+    The cached figure is shared: callers must treat it as read-only.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _config['enabled'] or _config['max_entries'] == 0:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cols = None
+            if columns is not None:
+                cols = list(columns) + [bound.arguments[a] for a in column_args]
+            key = (name,) + tuple((arg, fingerprint(value, cols)) for arg, value in bound.arguments.items())
+
+            with _lock:
+                fig = _entries.get(key)
+                if fig is not None:
+                    _entries.move_to_end(key)
+                    _stats[name]['hits'] += 1
+                    return fig
+                _stats[name]['misses'] += 1
+
+            fig = func(*args, **kwargs)
+            with _lock:
+                _entries[key] = fig
+                _evict()
+            return fig
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def stats():
+    """Hit/miss/eviction counters per chart + hit rate, sorted by name."""
+    with _lock:
+        rows = []
+        for name, item in sorted(_stats.items()):
+            calls = item['hits'] + item['misses']
+            rows.append({'chart': name, **item, 'hit_rate': item['hits'] / calls if calls else 0.0})
+        return rows
+
+
+def size():
+    return len(_entries)
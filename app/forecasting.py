@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Metrics required for S&T Calculation + Interest (2026 Ranking)
+METRICS_TO_FORECAST = [
+    'Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate',
+    'Dynamics_YoY', 'Profitability', 'Capex_Intensity', 'Arxiv_Papers', 'Revenue'
+]
+
+# ArXiv Hype Fix: AI Hype is recent (2019+).
+# If we train on 2005-2024 (mostly zeros), the trendline will be flattened.
+TRAINING_START_YEAR = {
+    'Arxiv_Papers': 2019
+}
+
+
+def real_rows_mask(df):
+    """Returns a boolean mask of historical (non-forecast) rows, handling 'True'/'False' strings."""
+    if 'Is_Forecast' not in df.columns:
+        return pd.Series(True, index=df.index)
+
+    flags = df['Is_Forecast']
+    if flags.dtype == 'object':
+        flags = flags.replace({'True': True, 'False': False})
+    return flags == False
+
+
+def fit_linear_trends(df_history, metrics=None, start_years=None):
+    """
+    Fits a linear OLS trend (y = slope * Year + intercept) for every PKD and metric in one batched pass.
+
+    This is the vectorized equivalent of calling utils.calculate_forecast once per (PKD, metric):
+    training uses ONLY real (non-forecast) rows, NaNs are ignored and at least 2 points are required.
+
+    Args:
+        df_history (pd.DataFrame): Long-format history with 'PKD_Code', 'Year' and metric columns.
+        metrics (list, optional): Metrics to fit. Defaults to METRICS_TO_FORECAST.
+        start_years (dict, optional): Per-metric first training year. Defaults to TRAINING_START_YEAR.
+
+    Returns:
+        dict: {
+            'PKD_Code': array of codes (n_series,),
+            'metrics': list of metrics (n_metrics,),
+            'slope', 'intercept': float arrays (n_series, n_metrics), NaN if not fittable,
+            'n_obs': int array (n_series, n_metrics) with number of training points,
+            'last_year': float array (n_series, n_metrics) with the last real year in the training window,
+            'mean_year', 'sxx': float arrays (n_series, n_metrics), mean and sum of squared deviations
+                                of the training years (prediction intervals)
+        }
+    """
+    metrics = list(metrics or METRICS_TO_FORECAST)
+    start_years = TRAINING_START_YEAR if start_years is None else start_years
+
+    real_df = df_history[real_rows_mask(df_history)]
+    codes, series_idx = np.unique(real_df['PKD_Code'].astype(str).values, return_inverse=True)
+    years = real_df['Year'].to_numpy(dtype=float)
+
+    n_series, n_metrics = len(codes), len(metrics)
+    slope = np.full((n_series, n_metrics), np.nan)
+    intercept = np.full((n_series, n_metrics), np.nan)
+    n_obs = np.zeros((n_series, n_metrics), dtype=int)
+    last_year = np.full((n_series, n_metrics), np.nan)
+    mean_year = np.full((n_series, n_metrics), np.nan)
+    sxx_all = np.full((n_series, n_metrics), np.nan)
+
+    for j, metric in enumerate(metrics):
+        in_window = years >= start_years.get(metric, -np.inf)
+
+        # Forecast anchor = LAST REAL YEAR in the training window (not the last valid value)
+        anchor = np.full(n_series, -np.inf)
+        np.maximum.at(anchor, series_idx[in_window], years[in_window])
+        last_year[:, j] = np.where(np.isinf(anchor), np.nan, anchor)
+
+        if metric not in real_df.columns:
+            continue
+
+        y_all = real_df[metric].to_numpy(dtype=float)
+        valid = in_window & ~np.isnan(y_all)
+        idx, x, y = series_idx[valid], years[valid], y_all[valid]
+
+        # Closed-form OLS on centered data (per-series sums via bincount)
+        n = np.bincount(idx, minlength=n_series).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_x = np.bincount(idx, x, n_series) / n
+            mean_y = np.bincount(idx, y, n_series) / n
+            dx = x - mean_x[idx]
+            sxx = np.bincount(idx, dx * dx, n_series)
+            sxy = np.bincount(idx, dx * (y - mean_y[idx]), n_series)
+            b = sxy / sxx
+            a = mean_y - b * mean_x
+
+        fittable = (n >= 2) & (sxx > 0)
+        slope[:, j] = np.where(fittable, b, np.nan)
+        intercept[:, j] = np.where(fittable, a, np.nan)
+        n_obs[:, j] = n.astype(int)
+        mean_year[:, j] = mean_x
+        sxx_all[:, j] = sxx
+
+    return {
+        'PKD_Code': codes,
+        'metrics': metrics,
+        'slope': slope,
+        'intercept': intercept,
+        'n_obs': n_obs,
+        'last_year': last_year,
+        'mean_year': mean_year,
+        'sxx': sxx_all
+    }
+
+
+def trend_residuals(df_history, fit, start_years=None):
+    """
+    In-sample residuals (actual - trend) of every series fitted by fit_linear_trends.
+
+    Residuals are left-aligned in year order, so position k refers to the same year for all
+    metrics of a PKD that share the training window.
+
+    Args:
+        df_history (pd.DataFrame): The history passed to fit_linear_trends.
+        fit (dict): fit_linear_trends() result.
+        start_years (dict, optional): Per-metric first training year (as used for the fit).
+
+    Returns:
+        np.ndarray: (n_series, n_metrics, max_obs) residuals, NaN-padded (all NaN if not fittable).
+    """
+    start_years = TRAINING_START_YEAR if start_years is None else start_years
+    metrics = fit['metrics']
+
+    real_df = df_history[real_rows_mask(df_history)]
+    series_idx = np.searchsorted(fit['PKD_Code'], real_df['PKD_Code'].astype(str).values)
+    years = real_df['Year'].to_numpy(dtype=float)
+
+    max_obs = int(fit['n_obs'].max()) if fit['n_obs'].size else 0
+    residuals = np.full((len(fit['PKD_Code']), len(metrics), max(max_obs, 1)), np.nan)
+
+    for j, metric in enumerate(metrics):
+        if metric not in real_df.columns:
+            continue
+        y_all = real_df[metric].to_numpy(dtype=float)
+        valid = (years >= start_years.get(metric, -np.inf)) & ~np.isnan(y_all)
+        idx, x, y = series_idx[valid], years[valid], y_all[valid]
+
+        # Position of every point inside its series (ordered by year)
+        order = np.lexsort((x, idx))
+        idx, x, y = idx[order], x[order], y[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(idx)) + 1]
+        pos = np.arange(len(idx)) - np.repeat(group_start, np.diff(np.r_[group_start, len(idx)]))
+
+        residuals[idx, j, pos] = y - (fit['intercept'][idx, j] + fit['slope'][idx, j] * x)
+
+    return residuals
+
+
+def forecast_batch(df_history, target_year, metrics=None, years_ahead=2, start_years=None):
+    """
+    Forecasts all metrics of all PKD codes for a single target year.
+
+    Follows utils.calculate_forecast semantics: the forecast exists only if target_year lies within
+    'years_ahead' years after the last real year of the series; otherwise the value is NaN
+    (the caller decides about the fallback, e.g. the current value).
+
+    Args:
+        df_history (pd.DataFrame): Long-format history (may contain old forecast rows, they are ignored).
+        target_year (int): Year to predict (e.g. 2026).
+        metrics (list, optional): Metrics to forecast. Defaults to METRICS_TO_FORECAST.
+        years_ahead (int): Forecast horizon counted from the last real year.
+        start_years (dict, optional): Per-metric first training year. Defaults to TRAINING_START_YEAR.
+
+    Returns:
+        pd.DataFrame: One row per PKD_Code with forecasted metric columns.
+    """
+    fit = fit_linear_trends(df_history, metrics, start_years)
+
+    in_horizon = (target_year > fit['last_year']) & (target_year <= fit['last_year'] + years_ahead)
+    values = np.where(in_horizon, fit['slope'] * target_year + fit['intercept'], np.nan)
+
+    df_forecast = pd.DataFrame(values, columns=fit['metrics'])
+    df_forecast.insert(0, 'PKD_Code', fit['PKD_Code'])
+    return df_forecast
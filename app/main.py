@@ -1,18 +1,26 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import json
+import functools
 import os
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import utils # Local import
 import charts # Local import
-
-# --- CONSTANTS ---
-color_map = {
-    'CRITICAL': '#ff4b4b',
-    'OPPORTUNITY': '#2ecc71',
-    'Neutral': '#3498db'
-}
+import correlation # Local import
+import cube # Local import
+import pkd # Local import
+import perf # Local import
+import figure_cache # Local import
+import normalization # Local import
+import peers # Local import
+import pipeline # Local import
+import report_cache # Local import
+import scenarios # Local import
+import schema # Local import
+import scoring # Local import
+import sensitivity # Local import
+import simulation # Local import
+import store # Local import
+import warmup # Local import
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -22,6 +30,83 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- PERFORMANCE INSTRUMENTATION (opt-in) ---
+# Toggle lives in the sidebar "⏱️ Performance" expander (or set ST_PROFILE=1 to enable by default).
+# Set ST_PROFILE_JSONL=<path> to change where exported reruns are appended.
+PERF_JSONL_PATH = os.environ.get(
+    "ST_PROFILE_JSONL",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'perf_reruns.jsonl')
+)
+perf.begin_run(st.session_state.get("perf_enabled", os.environ.get("ST_PROFILE") == "1"))
+
+def render_perf_panel():
+    """Sidebar panel with per-stage timings of the current rerun. Call before st.stop()."""
+    with st.sidebar.expander("⏱️ Performance"):
+        st.toggle("Profiluj przebiegi (rerun)", key="perf_enabled", value=os.environ.get("ST_PROFILE") == "1")
+        export = st.toggle("Eksportuj do JSON Lines", key="perf_export", help=PERF_JSONL_PATH)
+        
+        if not perf.is_enabled():
+            st.caption("Profilowanie wyłączone. Włącz i odśwież widok.")
+            return
+        
+        st.metric("Czas przebiegu (do tego miejsca)", f"{perf.total_ms():,.0f} ms")
+        st.caption(f"Wersja danych: {data_version}")
+        summary = perf.summarize()
+        if summary:
+            st.dataframe(
+                pd.DataFrame([{
+                    'Etap': ("  " * item['depth']) + item['stage'],
+                    'Wywołania': item['calls'],
+                    'Suma [ms]': round(item['total_ms'], 1),
+                    'Max [ms]': round(item['max_ms'], 1),
+                    'Wiersze': item['rows']
+                } for item in summary]),
+                hide_index=True,
+                use_container_width=True
+            )
+        cache_stats = figure_cache.stats()
+        if cache_stats:
+            st.caption(f"Cache wykresów: {figure_cache.size()} figur w pamięci")
+            st.dataframe(
+                pd.DataFrame([{
+                    'Wykres': item['chart'],
+                    'Trafienia': item['hits'],
+                    'Chybienia': item['misses'],
+                    'Usunięte': item['evictions'],
+                    'Hit rate': f"{item['hit_rate']:.0%}"
+                } for item in cache_stats]),
+                hide_index=True,
+                use_container_width=True
+            )
+        if export:
+            perf.export_jsonl(PERF_JSONL_PATH)
+            st.caption(f"Zapisano do {PERF_JSONL_PATH}")
+
+def timed_fragment(name):
+    """
+    st.fragment timed as a perf stage. On a fragment-only rerun (e.g. a drill-down click) the script
+    above doesn't run, so the fragment starts its own recording and shows its time inline.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if ctx is None or not ctx.fragment_ids_this_run:
+                with perf.stage(name):
+                    return func(*args, **kwargs)
+            
+            perf.begin_run(st.session_state.get("perf_enabled", os.environ.get("ST_PROFILE") == "1"), fragment=name)
+            with perf.stage(name):
+                result = func(*args, **kwargs)
+            if perf.is_enabled():
+                st.caption(f"⏱️ Przebieg fragmentu '{name}': {perf.total_ms():,.0f} ms (bez przeliczania reszty strony)")
+                if st.session_state.get("perf_export"):
+                    perf.export_jsonl(PERF_JSONL_PATH)
+            return result
+        return st.fragment(wrapper)
+    return decorator
+
+
 # --- LOAD ASSETS ---
 try:
     # Adjust path if running locally from root
@@ -31,9 +116,19 @@ except FileNotFoundError:
     st.warning("CSS file not found.")
 
 # --- LOAD DATA ---
+# Dataset version token (hot reload, see datasets.py): read ONCE per run, so a run started on the
+# old version finishes on it even if new files are swapped in meanwhile.
+data_version = utils.dataset_version()
+
+# Background warm-up of the cached loaders (once per process and version, never awaited here; see warmup.py)
+warm = utils.start_warmup(data_version)
+
 try:
-    df_all = utils.load_data()
-    debates = utils.load_debates()
+    with perf.stage("load_data") as rec:
+        df_all = utils.load_data(data_version)
+        index_store = utils.load_store(data_version)
+        debates = utils.load_debates(data_version)
+        rec['rows'] = len(df_all)
 except Exception as e:
     st.error(f"Error loading data: {e}")
     st.stop()
@@ -51,6 +146,16 @@ with st.sidebar:
         st.error(f"Logo error: {e}")
     st.title("S&T Dashboard")
     
+    # --- CACHE WARM-UP PROGRESS (polls until the warm-up thread is done) ---
+    if not warm['finished']:
+        @st.fragment(run_every="2s")
+        def render_warmup_progress():
+            if warm['finished']:
+                st.caption(f"🔥 Cache rozgrzany ({warm['elapsed_s']:.1f} s).")
+                return
+            st.progress(warmup.progress(warm), text=f"🔥 Rozgrzewanie cache: {warm['current'] or '...'} ({warm['done']}/{warm['total']})")
+        render_warmup_progress()
+    
     # --- TIME SLIDER (New!) ---
     min_year = int(df_all['Year'].min())
     # Limit max year to 2024 as per request (forecasts shown separately)
@@ -60,9 +165,6 @@ with st.sidebar:
     
     st.divider()
     
-    # Filter by Year first
-    df = df_all[df_all['Year'] == selected_year].copy()
-    
     # --- VIEW SELECTOR ---
     view_mode = st.radio("Tryb Widoku:", ["Macierz S&T (Główna)", "Analiza Ryzyka (Upadłości)", "🏆 Ranking & Eksport"], index=0)
     
@@ -75,21 +177,18 @@ with st.sidebar:
         st.divider()
         kill_switch_limit = st.slider("⚠️ Próg upadłości (Kill Switch %)", 0.0, 10.0, 4.5, 0.1, help="Branże powyżej tej wartości otrzymają status CRITICAL.")
         
+    # --- MACRO WHAT-IF SCENARIO ---
+    with st.expander("🌍 Scenariusz Makro (What-If)"):
+        st.caption("Szoki makro przesuwają bąbelki na żywo (marża, dynamika, ryzyko upadłości).")
+        scenario = {
+            'rate_bp': st.slider("Stopy Procentowe (zmiana, bp)", -200, 500, 0, 25, help="Koszt obsługi długu rośnie z Debt/Revenue."),
+            'energy_pct': st.slider("Ceny Energii (zmiana, %)", -50, 200, 0, 10, help="Skalowane wrażliwością energetyczną branży (PKD)."),
+            'gdp_pct': st.slider("Wzrost PKB (zmiana, p.p.)", -5.0, 5.0, 0.0, 0.5, help="Skalowane elastycznością branży względem PKB.")
+        }
+        scenario_active = not scenarios.is_neutral(**scenario)
+        
     st.divider()
     
-    # --- DYNAMIC STATUS RECALCULATION ---
-    # Overwrite Status based on new Kill Switch Limit
-    def recalc_status(row):
-        # 1. Check Kill Switch
-        if row.get('Bankruptcy_Rate', 0) > kill_switch_limit:
-            return 'CRITICAL'
-        # 2. Check Opportunity (Mock thresholds based on scores)
-        if row.get('Stability_Score', 0) > 60 and row.get('Transformation_Score', 0) > 60:
-            return 'OPPORTUNITY'
-        return 'Neutral'
-        
-    df['Status'] = df.apply(recalc_status, axis=1)
-
     # --- LEVEL OF DETAIL ---
     level_map = {
         "Sekcje (Makro)": "L1",
@@ -100,81 +199,36 @@ with st.sidebar:
     selected_level_label = st.radio("Poziom Szczegółowości:", list(level_map.keys()), index=0)
     selected_level = level_map[selected_level_label]
     
-    # Filter Logic
-    if selected_level == "L1":
-        # Sections (SEK_A, SEK_B...)
-        df = df[df['PKD_Code'].astype(str).str.startswith('SEK_')]
-    elif selected_level == "L2":
-        # Divisions (01., 02. -> Length 3)
-        df = df[(df['PKD_Code'].astype(str).str.len() == 3) & (~df['PKD_Code'].astype(str).str.startswith('SEK'))]
-    elif selected_level == "L3":
-        # Groups (01.1 -> Length 4)
-        df = df[df['PKD_Code'].astype(str).str.len() == 4]
-    elif selected_level == "L4":
-        # Classes (01.11 -> Length 5, excluding SEK_)
-        df = df[(df['PKD_Code'].astype(str).str.len() == 5) & (~df['PKD_Code'].astype(str).str.startswith('SEK'))]
-    
-    # Sector Filter (using first digit of PKD as proxy if Sector col mock is gone, or using the new Sector col if available)
-    # The new real index script assigns "Ogólny" or we can infer.
-    # Let's try to extract Sector from Industry Name to make it cooler or just show top 100 to avoid lag.
-    
-    # Ensure Sector column exists, if not fill it
-    # Ensure Sector column exists or populate it dynamically
-    # This logic maps every PKD code to its parent Macro Section (e.g. 41.20 -> Section F Construction)
-    if 'Sector' not in df.columns or df['Sector'].iloc[0] == 'All':
-        # 1. Define Ranges
-        ranges = {
-            'A': (1, 3), 'B': (5, 9), 'C': (10, 33), 'D': (35, 35), 'E': (36, 39),
-            'F': (41, 43), 'G': (45, 47), 'H': (49, 53), 'I': (55, 56), 'J': (58, 63),
-            'K': (64, 66), 'L': (68, 68), 'M': (69, 75), 'N': (77, 82), 'O': (84, 84),
-            'P': (85, 85), 'Q': (86, 88), 'R': (90, 93), 'S': (94, 96)
-        }
-        
-        # 2. Get Section Names Map (Code -> Name) for clean display
-        # We look at global df_all to ensure we have the names even if current year is filtered
-        section_rows = df_all[df_all['PKD_Code'].astype(str).str.startswith('SEK_')]
-        # Create map: "A" -> "ROLNICTWO...", "B" -> "GÓRNICTWO..."
-        section_map = {}
-        for _, row in section_rows.iterrows():
-            code = str(row['PKD_Code']) # SEK_A
-            letter = code.split('_')[1]
-            name = row['Industry_Name']
-            section_map[letter] = f"{letter} - {name}"
-
-        # 3. Helper to find sector
-        def find_sector(pkd):
-            pkd = str(pkd)
-            if pkd.startswith('SEK_'):
-                letter = pkd.split('_')[1]
-                return section_map.get(letter, pkd)
-            
-            # Numeric
-            try:
-                digits = int(pkd[:2])
-                for letter, (start, end) in ranges.items():
-                    if start <= digits <= end:
-                        return section_map.get(letter, f"Sekcja {letter}")
-            except:
-                pass
-            return "Inne"
-
-        df['Sector'] = df['PKD_Code'].apply(find_sector)
-        
-    unique_sectors = sorted(df['Sector'].dropna().unique())
+    # Filter Logic (Sections SEK_A / Divisions 01. / Groups 01.1 / Classes 01.11)
+    # Year / level / sector / revenue filters are pushed down to the embedded store (store.py):
+    # indexed queries on precomputed Level and Sector columns, no intermediate frames of df_all.
+    # Sector = parent Macro Section of every PKD code (e.g. 41.20 -> Section F Construction).
+    unique_sectors = store.sectors(index_store, selected_year, selected_level)
     selected_sector = st.selectbox("Wybierz Sektor:", ["Wszystkie"] + list(unique_sectors))
-    
-    if selected_sector != "Wszystkie":
-        filtered_df = df[df['Sector'] == selected_sector]
-    else:
-        filtered_df = df
 
     # Revenue Filter
-    min_rev_val = int(df['Revenue'].min())
-    max_rev_val = int(df['Revenue'].max())
+    min_rev, max_rev = store.revenue_range(index_store, selected_year, selected_level)
+    min_rev_val = int(min_rev)
+    max_rev_val = int(max_rev)
     
     # Filter by Revenue first (to avoid skews from micro entities in normalization)
     revenue_threshold = st.slider("Minimalne Przychody (mln PLN):", min_value=min_rev_val, max_value=max_rev_val, value=min_rev_val)
-    filtered_df = filtered_df[filtered_df['Revenue'] >= revenue_threshold].copy()
+    with perf.stage("store:snapshot") as rec:
+        filtered_df = store.snapshot(index_store, selected_year, selected_level, selected_sector, revenue_threshold)
+        rec['rows'] = len(filtered_df)
+
+    # --- DYNAMIC STATUS RECALCULATION ---
+    # Overwrite Status based on new Kill Switch Limit
+    with perf.stage("status_recalc", rows=len(filtered_df)):
+        filtered_df['Status'] = scoring.recalc_status(filtered_df, kill_switch_limit)
+    
+    # --- CHART RENDERING (large views, e.g. "Klasy (4 cyfry)") ---
+    with st.expander("🖥️ Renderowanie Wykresów"):
+        render_label = st.radio("Silnik:", ["Auto", "SVG", "WebGL"], horizontal=True,
+                                help=f"Auto: WebGL powyżej {charts.WEBGL_POINT_THRESHOLD} punktów.")
+        chart_render_mode = render_label.lower()
+        aggregate_small = st.checkbox("Agreguj najmniejsze branże (łącznie < 1% przychodów)", value=False)
+        chart_aggregate_share = 0.01 if aggregate_small else None
     
     st.sidebar.divider()
     with st.sidebar.expander("ℹ️ Metodologia i Wzory"):
@@ -212,59 +266,42 @@ with st.sidebar:
             w_profit=w_profit, 
             w_safety=w_safety
         )
+        
+        # What-If: shocked metrics -> rescoring -> Status (all array operations)
+        if scenario_active:
+            with perf.stage("scenario:apply", rows=len(filtered_df)):
+                filtered_df = scenarios.apply_scenario(
+                    filtered_df, **scenario,
+                    w_growth=w_growth, w_profit=w_profit, w_safety=w_safety,
+                    kill_switch_limit=kill_switch_limit
+                )
+            st.warning(
+                f"🌍 Scenariusz: stopy {scenario['rate_bp']:+d} bp, energia {scenario['energy_pct']:+d}%, "
+                f"PKB {scenario['gdp_pct']:+.1f} p.p. Średnia zmiana Stability: {filtered_df['Stability_Delta'].mean():+.1f} pkt."
+            )
          
         st.info("💡 **Instrukcja:** Kliknij w bąbelek na wykresie, aby zobaczyć debatę Zarządu.")
         st.caption(f"Dane dla roku: {selected_year}. Liczba branż: {len(filtered_df)}")
 
 
 # --- HELPER: AGGREGATES DISPLAY ---
-def display_aggregates(df_subset, title="Globalny Wynik (Suma)"):
-    # Calculate aggregates
-    # Note: df_subset should be non-overlapping (e.g. only Sections, or only Divisions)
-    
-    # --- CALCULATE 5 KEY METRICS ---
-    
-    # 1. Total Revenue (Wielkość)
-    total_revenue = df_subset['Revenue'].sum()
-    
-    # 2. Revenue Dynamics (Wzrost)
-    # Weighted avg dynamics or Total Current Rev / Total Prev Rev - 1
-    # We need to reconstruct Total Prev Rev.
-    # RevPrev = Revenue / (1 + Dynamics_YoY)
-    current_revs = df_subset['Revenue']
-    current_dyns = df_subset['Dynamics_YoY']
-    # Avoid zero div
-    prev_revs = [r / (1 + d) if (not pd.isna(d) and d != -1) else r for r, d in zip(current_revs, current_dyns)]
-    total_prev_rev = sum(prev_revs)
-    
-    agg_dynamics = ((total_revenue - total_prev_rev) / total_prev_rev * 100) if total_prev_rev else 0
-    
-    # 3. Net Profit Margin (Rentowność)
-    # Sum(Net Profit) / Sum(Revenue)
-    total_net_profit = df_subset.get('Net_Profit', pd.Series(0)).sum()
-    agg_net_margin = (total_net_profit / total_revenue * 100) if total_revenue else 0
-    
-    # 4. Debt Burden (Zadłużenie)
-    # Sum(Total Debt) / Sum(Revenue)
-    total_debt = df_subset.get('Total_Debt', pd.Series(0)).sum()
-    agg_debt_ratio = (total_debt / total_revenue) if total_revenue else 0
-    
-    # 5. Cash Ratio (Płynność)
-    # Sum(Cash) / Sum(Short Term Liabilities)
-    total_cash = df_subset.get('Cash', pd.Series(0)).sum()
-    total_short_liab = df_subset.get('Liabilities_Short', pd.Series(0)).sum()
-    agg_cash_ratio = (total_cash / total_short_liab) if total_short_liab else 0
-    
-    # 6. Relative Risk (Ryzyko)
-    # Sum(Bankruptcies) / Sum(Entities) * 100
-    if 'Bankruptcy_Count' in df_subset.columns:
-        total_bankrupt = df_subset['Bankruptcy_Count'].sum()
-    else:
-        total_bankrupt = (df_subset['Bankruptcy_Rate'] * df_subset['Entity_Count'] / 100).sum()
-    
-    total_entities = df_subset['Entity_Count'].sum()
-    agg_risk_percent = (total_bankrupt / total_entities * 100) if total_entities else 0
-    
+@perf.timed("aggregates")
+def display_aggregates(sums, title="Globalny Wynik (Suma)"):
+    # 'sums' are additive totals (cube.SUM_COLUMNS) of a non-overlapping subset
+    # (e.g. only Sections, or only Divisions): a cube lookup or cube.totals() of the filtered rows.
+    
+    # --- CALCULATE 5 KEY METRICS (see cube.kpis) ---
+    # Wielkość = Sum(Revenue), Wzrost = vs TRUE prior-year revenue, Rentowność = Sum(Net Profit) / Sum(Revenue),
+    # Zadłużenie = Sum(Total Debt) / Sum(Revenue), Płynność = Sum(Cash) / Sum(Short Liabilities),
+    # Ryzyko = Sum(Bankruptcies) / Sum(Entities)
+    kpi = cube.kpis(sums)
+    total_revenue = kpi['total_revenue']
+    agg_dynamics = kpi['dynamics']
+    agg_net_margin = kpi['net_margin']
+    agg_debt_ratio = kpi['debt_ratio']
+    agg_cash_ratio = kpi['cash_ratio']
+    agg_risk_percent = kpi['risk']
+    total_bankrupt = kpi['bankruptcies']
     
     # Display 5 Cols
     st.markdown(f"#### 📊 {title}")
@@ -283,7 +320,13 @@ st.title(f"S&T Index ({selected_year})")
 st.markdown("### `System Diagnostyki Branżowej AI PKO BP` (Real Data)")
 
 # DISPLAY GLOBAL AGGREGATES FOR CURRENT SELECTION
-display_aggregates(filtered_df, title=f"Agregat dla: {selected_level_label} | {selected_sector}")
+# Precomputed cube (year x level x sector) unless a revenue cut-off selects a subset of rows
+agg_sums = None
+if revenue_threshold <= min_rev_val:
+    agg_sums = cube.lookup(utils.load_cube(data_version), selected_year, selected_level, selected_sector)
+if agg_sums is None:
+    agg_sums = cube.totals(filtered_df, df_all)
+display_aggregates(agg_sums, title=f"Agregat dla: {selected_level_label} | {selected_sector}")
 
 col_main, col_details = st.columns([2, 1])
 # --- RISK VIEW LOGIC ---
@@ -318,8 +361,9 @@ if view_mode == "Analiza Ryzyka (Upadłości)":
     # Cap Leverage for visualization (e.g. at 200%) to avoid outliers blowing up scale
     filtered_df['Leverage_Vis'] = filtered_df['Leverage_Ratio'].clip(upper=5.0)
     
-    fig_risk = charts.create_risk_radar_chart(filtered_df)
-    st.plotly_chart(fig_risk, use_container_width=True)
+    fig_risk = charts.create_risk_radar_chart(filtered_df, render_mode=chart_render_mode, aggregate_share=chart_aggregate_share)
+    with perf.stage("render:risk_radar", rows=len(filtered_df)):
+        st.plotly_chart(fig_risk, use_container_width=True)
     
     # RED ZONE TABLE
     st.markdown("### 🚨 Lista Ostrzeżeń (Red Zone)")
@@ -347,7 +391,7 @@ if view_mode == "Analiza Ryzyka (Upadłości)":
     else:
         st.success("Brak branż w strefie krytycznej dla wybranych filtrów! 🎉")
         
-
+    render_perf_panel()
     st.stop() # Ensure Main View doesn't run
 
 # --- RANKING & EXPORT VIEW LOGIC ---
@@ -356,184 +400,72 @@ if view_mode == "🏆 Ranking & Eksport":
     st.markdown("### 🏆 Ranking Sektorów (Prognoza 2026)")
     st.caption("Ranking oparty o **prognozowaną kondycję branż na rok 2026**, uwzględniający trendy AI, zadłużenia i rentowności.")
     
-    # 1. FORECASTING ENGINE
-    # We iterate through each industry in the filtered view and project it to 2026.
-    
-    # progress_text = "Trwa generowanie zaawansowanych prognoz na rok 2026 dla wszystkich sektorów..."
-    # my_bar = st.progress(0, text=progress_text)
-    
-    future_rows = []
-    # total_items = len(filtered_df)
-    
-    # Metrics required for S&T Calculation + Interest
-    metrics_to_forecast = [
-        'Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate',
-        'Dynamics_YoY', 'Profitability', 'Capex_Intensity', 'Arxiv_Papers', 'Revenue'
-    ]
-    
-    with st.spinner("Generowanie prognoz na rok 2026..."):
-        for idx, row in filtered_df.iterrows():
-            pkd = row['PKD_Code']
-            
-            # Get Full History for this entity
-            hist_df = df_all[df_all['PKD_Code'] == pkd].sort_values('Year')
-            
-            # Base for Future Row
-            # We explicitly store CURRENT scores to preserve them before recalculation
-            future_row = {
-                'PKD_Code': pkd, 
-                'Industry_Name': row['Industry_Name'], 
-                'Year': 2026,
-                'Current_Revenue': row['Revenue'],
-                'Stability_Current': row.get('Stability_Score', 0),
-                'Transformation_Current': row.get('Transformation_Score', 0),
-                'Is_Forecast': True # Trigger for utils.recalculate_future_st_scores
-            }
-            
-            # Forecast each metric
-            for metric in metrics_to_forecast:
-                try:
-                    # ArXiv Hype Fix: Train only on recent data
-                    temp_hist = hist_df.copy()
-                    if metric == 'Arxiv_Papers':
-                        temp_hist = temp_hist[temp_hist['Year'] >= 2019]
-                        
-                    # Run Regressions
-                    forecast_df = utils.calculate_forecast(temp_hist, metric, years_ahead=2) # 2024 -> 2026
-                    
-                    # Get 2026 value
-                    val_2026 = forecast_df[forecast_df['Year'] == 2026][metric].iloc[0]
-                    future_row[metric] = val_2026
-                except:
-                    # Fallback to current if forecast fails
-                    future_row[metric] = row.get(metric, 0)
-
-            future_rows.append(future_row)
-            
-    # 2. CREATE FUTURE DATAFRAME
-    df_2026 = pd.DataFrame(future_rows)
-    
-    # 3. RECALCULATE SCORES (On 2026 Data)
-    # The utils function overwrites 'Stability_Score' and 'Transformation_Score' based on the metrics in the row.
-    # Since the row now contains 2026 metrics, these will be 2026 Scores.
-    if not df_2026.empty:
-        df_2026 = utils.recalculate_future_st_scores(
-            df_2026, 
-            w_growth=w_growth, 
-            w_profit=w_profit, 
-            w_safety=w_safety
-        )
+    # Precomputed report (scripts/ranking_report.py --build-cache) when the sidebar matches a cached key:
+    # precomputed weights for this level/year, all sectors, no revenue cut-off, no What-If scenario.
+    cached_report, cache_source = None, "data/results/report_cache"
+    if selected_sector == "Wszystkie" and revenue_threshold <= min_rev_val and not scenario_active:
+        with perf.stage("ranking:report_cache"):
+            cached_report = report_cache.lookup(
+                utils.load_report_cache(data_version),
+                selected_level, selected_year, w_growth, w_profit, w_safety
+            )
+            # Default-weights reports built by the startup warm-up (only once ready: never wait for it here)
+            if cached_report is None and warm['finished']:
+                cached_report = report_cache.lookup(utils.load_default_reports(data_version), selected_level, selected_year, w_growth, w_profit, w_safety)
+                cache_source = "pamięć, rozgrzane przy starcie"
+
+    sort_col = st.selectbox("Sortuj Ranking:", list(pipeline.REPORT_RENAME.values()), index=0)
+
+    if cached_report is not None:
+        st.caption(f"⚡ Raport z cache ({cache_source}).")
+        display_df = cached_report.sort_values(sort_col, ascending=False).reset_index(drop=True)
     else:
-        # Handle empty case
-        df_2026 = pd.DataFrame(columns=['PKD_Code', 'Industry_Name', 'Transformation_Score', 'Stability_Score'])
-
-    # Rename for clarity
-    df_2026.rename(columns={
-        'Stability_Score': 'Stability_2026',
-        'Transformation_Score': 'Transformation_2026'
-    }, inplace=True)
-    
-    # 4. CALCULATE LENDING SCORE (Future Based)
-    # Using Future Transformation Score (Potential) and Future Stability (Risk)
-    # Ensure columns exist (fixes KeyError)
-    if 'Transformation_2026' not in df_2026.columns:
-         df_2026['Transformation_2026'] = 0
-    if 'Stability_2026' not in df_2026.columns:
-         df_2026['Stability_2026'] = 0
-
-    # Helper wrapper to map new names to expected keys
-    def calc_future_lending(r):
-        # We construct a mock row that looks like what calculate_lending_opportunity expects
-        # It expects 'Stability_Score' or we pass it explicit args?
-        # Function sig: calculate_lending_opportunity(current_row, future_trans_score, current_liquidity=None)
-        # Inside it uses row.get('Stability_Score')
-        # So we need to cheat or modify the function.
-        # Let's cheat by passing a mock dict
-        mock_row = r.copy()
-        mock_row['Stability_Score'] = r['Stability_2026'] # Use Future Stability? Or Current?
-        # User wants "Future" Lending Score basically.
-        # Original plan: 40% Future Trans, 40% **Current** Stability.
-        # User Request: "Stability teraz, i stability prognozowane".
-        # Let's stick to the "Lending Score 2026" being Fully Future.
+        # 1. FORECASTING ENGINE -> 2. 2026 RESCORING -> 3. LENDING SCORE -> 4. CLASSIFICATION
+        # The whole ranking logic lives in pipeline.py (headless, also used by scripts/ranking_report.py).
+        # The trends of all PKD codes are fitted once per dataset version on the dense tensor (tensor.py);
+        # a rerun only rescores the snapshot.
+        with st.spinner("Generowanie prognoz na rok 2026..."), perf.stage("ranking:forecast", rows=len(filtered_df)):
+            df_forecast = utils.load_forecast(data_version)
+            if scenario_active:
+                # The same macro shocks as the current snapshot, applied to the 2026 trend forecast
+                df_forecast = scenarios.shock_frame(df_forecast, **scenario)
+            df_2026 = pipeline.forecast_ranking(
+                filtered_df, 
+                df_all, 
+                w_growth=w_growth, 
+                w_profit=w_profit, 
+                w_safety=w_safety,
+                df_forecast=df_forecast
+            )
+        if scenario_active:
+            st.caption("🌍 Prognoza 2026 uwzględnia aktywny scenariusz makro.")
         
-        return utils.calculate_lending_opportunity(mock_row, r['Transformation_2026'])
+        # 5. DISPLAY
+        # Sort
+        display_df = pipeline.to_report(df_2026, sort_col)
 
-    df_2026['Lending_Score_2026'] = df_2026.apply(calc_future_lending, axis=1)
-    
-    # 5. CLASSIFICATION (Updated for Future Context)
-    def classify_future(row):
-        # 1. Critical Risk
-        if row['Bankruptcy_Rate'] > 2.5: 
-            return "⚠️ Wysokie Ryzyko (2026)"
-            
-        # 2. AI Powerhouses
-        if row['Transformation_2026'] > 60:
-            if row['Stability_2026'] > 50:
-                return "🌟 Liderzy Przyszłości"
-            else:
-                return "🚀 Wschodzące Gwiazdy"
-                
-        # 3. Cash Cows
-        if row['Stability_2026'] > 65:
-            return "🛡️ Bezpieczne Przystanie"
-         
-        # 4. Lending Targets
-        if row['Lending_Score_2026'] > 70:
-            return "💰 Cel Kredytowy"
-            
-        return "🔹 Neutralne"
-
-    df_2026['Klasyfikacja'] = df_2026.apply(classify_future, axis=1)
-    
-    # 6. DISPLAY
-    # Combine Columns
-    
-    cols = [
-        'PKD_Code', 'Industry_Name', 'Klasyfikacja', 
-        'Lending_Score_2026', 
-        'Stability_Current', 'Stability_2026', 
-        'Transformation_Current', 'Transformation_2026',
-        'Revenue', 'Dynamics_YoY', 'Bankruptcy_Rate'
-    ]
-    
-    rename_map = {
-        'Lending_Score_2026': 'Lending Opp (2026)',
-        'Stability_Current': 'Stability (Now)',
-        'Stability_2026': 'Stability (2026)',
-        'Transformation_Current': 'Transformation (Now)',
-        'Transformation_2026': 'Transformation (2026)',
-        'Revenue': 'Est. Revenue',
-        'Dynamics_YoY': 'Est. Growth',
-        'Bankruptcy_Rate': 'Est. Risk %'
-    }
-    
-    display_df = df_2026[cols].rename(columns=rename_map)
-    
-    # Sort
-    sort_col = st.selectbox("Sortuj Ranking:", list(rename_map.values()), index=0)
-    display_df = display_df.sort_values(sort_col, ascending=False).reset_index(drop=True)
-
-    st.dataframe(
-        display_df.style.format({
-            'Lending Opp (2026)': "{:.1f}",
-            'Stability (Now)': "{:.1f}",
-            'Stability (2026)': "{:.1f}",
-            'Transformation (Now)': "{:.1f}",
-            'Transformation (2026)': "{:.1f}",
-            'Est. Revenue': "{:,.0f}",
-            'Est. Growth': "{:+.1%}",
-            'Est. Risk %': "{:.2f}%"
-        }).background_gradient(subset=['Lending Opp (2026)'], cmap='Greens'),
-        column_config={
-            "Lending Opp (2026)": st.column_config.ProgressColumn("Lending Opp", min_value=0, max_value=100, format="%d"),
-            "Stability (Now)": st.column_config.NumberColumn("Stab (Now)"),
-            "Stability (2026)": st.column_config.NumberColumn("Stab (2026)"),
-            "Transformation (Now)": st.column_config.NumberColumn("Trans (Now)"),
-            "Transformation (2026)": st.column_config.NumberColumn("Trans (2026)"),
-        },
-        use_container_width=True,
-        height=600
-    )
+    with perf.stage("render:ranking_table", rows=len(display_df)):
+        st.dataframe(
+            display_df.style.format({
+                'Lending Opp (2026)': "{:.1f}",
+                'Stability (Now)': "{:.1f}",
+                'Stability (2026)': "{:.1f}",
+                'Transformation (Now)': "{:.1f}",
+                'Transformation (2026)': "{:.1f}",
+                'Est. Revenue': "{:,.0f}",
+                'Est. Growth': "{:+.1%}",
+                'Est. Risk %': "{:.2f}%"
+            }).background_gradient(subset=['Lending Opp (2026)'], cmap='Greens'),
+            column_config={
+                "Lending Opp (2026)": st.column_config.ProgressColumn("Lending Opp", min_value=0, max_value=100, format="%d"),
+                "Stability (Now)": st.column_config.NumberColumn("Stab (Now)"),
+                "Stability (2026)": st.column_config.NumberColumn("Stab (2026)"),
+                "Transformation (Now)": st.column_config.NumberColumn("Trans (Now)"),
+                "Transformation (2026)": st.column_config.NumberColumn("Trans (2026)"),
+            },
+            use_container_width=True,
+            height=600
+        )
     
     # Export
     csv = display_df.to_csv(index=False).encode('utf-8')
@@ -544,7 +476,82 @@ if view_mode == "🏆 Ranking & Eksport":
         mime='text/csv',
         type='primary'
     )
+
+    # WEIGHT SENSITIVITY (whole slider grid in one pass, see sensitivity.py)
+    with st.expander("⚖️ Wrażliwość na Wagi (Stability)"):
+        st.caption(
+            "Ranking przeliczony dla wszystkich kombinacji wag Stability (0-10, krok 1) naraz: "
+            "zakres wyniku i pozycji każdej branży oraz wkład składników w wynik przy obecnych wagach (pkt)."
+        )
+        if st.toggle("Pokaż analizę wrażliwości", key="st_sensitivity"):
+            if cached_report is not None:
+                with perf.stage("ranking:forecast", rows=len(filtered_df)):
+                    df_2026 = pipeline.forecast_ranking(filtered_df, df_all, w_growth=w_growth, w_profit=w_profit, w_safety=w_safety,
+                                                       df_forecast=utils.load_forecast(data_version))
+            with perf.stage("ranking:sensitivity", rows=len(df_2026)):
+                sens_df = sensitivity.weight_sensitivity(df_2026, w_growth=w_growth, w_profit=w_profit, w_safety=w_safety)
+            st.dataframe(
+                sens_df.style.format({
+                    col: "{:.1f}" for col in ['Lending_Score_2026', 'Lending_Min', 'Lending_Max', 'Rank_Std'] + sensitivity.ATTRIBUTION_COLUMNS
+                } | {'Top_Share': "{:.0%}"}),
+                column_config={
+                    "Lending_Score_2026": st.column_config.NumberColumn("Lending Opp"),
+                    "Rank": st.column_config.NumberColumn("Pozycja"),
+                    "Rank_Best": st.column_config.NumberColumn("Najlepsza"),
+                    "Rank_Worst": st.column_config.NumberColumn("Najgorsza"),
+                    "Top_Share": st.column_config.NumberColumn("W Top 10", help="Odsetek kombinacji wag z pozycją <= 10"),
+                    "Contrib_Potential": st.column_config.NumberColumn("Potencjał"),
+                    "Contrib_Liquidity": st.column_config.NumberColumn("Płynność"),
+                    "Contrib_Growth": st.column_config.NumberColumn("Wzrost"),
+                    "Contrib_Profit": st.column_config.NumberColumn("Zyskowność"),
+                    "Contrib_Cash": st.column_config.NumberColumn("Gotówka"),
+                    "Contrib_Debt": st.column_config.NumberColumn("Dług"),
+                    "Contrib_Risk": st.column_config.NumberColumn("Upadłości"),
+                },
+                use_container_width=True,
+                height=400
+            )
+
+    # MONTE CARLO STRESS TEST (uncertainty of the 2026 point estimates, see simulation.py)
+    with st.expander("🎲 Stress Test (Monte Carlo)"):
+        st.caption(
+            "Każda prognoza 2026 jest losowana N razy z reszt historycznego trendu (bootstrap). "
+            "Tabela pokazuje przedziały Lending Opp (P5–P95) i szansę przekroczenia Kill Switch."
+        )
+        n_paths = st.select_slider("Liczba ścieżek", options=[1_000, 5_000, 10_000, 20_000], value=simulation.DEFAULT_PATHS)
+        # The result is kept only for the sidebar state it was computed for
+        stress_key = (selected_level, selected_year, selected_sector, revenue_threshold,
+                      w_growth, w_profit, w_safety, kill_switch_limit, tuple(scenario.items()), n_paths)
+        if st.button("▶️ Uruchom symulację", key="run_stress_test"):
+            with st.spinner(f"Symulacja {n_paths:,} ścieżek..."), perf.stage("ranking:stress_test", rows=len(filtered_df)):
+                st.session_state['stress_test'] = (stress_key, simulation.stress_test(
+                    filtered_df, df_all, n_paths=n_paths,
+                    w_growth=w_growth, w_profit=w_profit, w_safety=w_safety,
+                    kill_switch_limit=kill_switch_limit
+                ))
+
+        stress_state = st.session_state.get('stress_test')
+        stress_df = stress_state[1] if stress_state is not None and stress_state[0] == stress_key else None
+        if stress_df is not None:
+            st.dataframe(
+                stress_df.style.format({
+                    col: "{:.1f}" for col in stress_df.columns if col not in ('PKD_Code', 'Industry_Name', 'P_Kill_Switch')
+                } | {'P_Kill_Switch': "{:.1%}"}),
+                column_config={
+                    "Lending_Score_2026": st.column_config.NumberColumn("Lending (Prognoza)"),
+                    "P_Kill_Switch": st.column_config.NumberColumn("P(Kill Switch)"),
+                },
+                use_container_width=True,
+                height=400
+            )
+            st.download_button(
+                label="📥 Pobierz Przedziały (CSV)",
+                data=stress_df.to_csv(index=False).encode('utf-8'),
+                file_name='Stress_Test_2026.csv',
+                mime='text/csv'
+            )
     
+    render_perf_panel()
     st.stop()
 
 
@@ -557,18 +564,12 @@ selected_row = None
 
 # 1. Chart Selection Priority
 if selection:
-    point = selection[0]
-    x_val = point['x']
-    y_val = point['y']
-    
-    # Find exact match
-    possible_rows = filtered_df[
-        (abs(filtered_df['Stability_Score'] - x_val) < 0.001) & 
-        (abs(filtered_df['Transformation_Score'] - y_val) < 0.001)
-    ]
-    
-    if not possible_rows.empty:
-        selected_row = possible_rows.iloc[0]
+    # Bubbles carry their filtered_df index label as row id (see charts.create_main_bubble_chart)
+    row_id = charts.selected_row_id(selection[0])
+    
+    # Ids from an older rerun (other year / level) are simply not in the index anymore
+    if row_id is not None and row_id in filtered_df.index:
+        selected_row = filtered_df.loc[row_id]
         selected_pkd = str(selected_row['PKD_Code'])
         
 # 2. Fallback: Auto-select Sector if no point clicked but Sector Filter is active
@@ -590,16 +591,38 @@ with col_main:
     # Calculate max revenue for global scaling
     max_rev_global = df_all['Revenue'].max()
     
-    # Pass selected_pkd to the chart function
-    fig = charts.create_main_bubble_chart(filtered_df, max_rev_global, highlight_pkd=selected_pkd)
+    # TIME TRAVEL: all years scored in one pass and shipped as animation frames (scrubbing runs in the browser)
+    animate = st.toggle("🎞️ Animacja w czasie (Time Travel)", key="st_animation",
+                        help="Bąbelki 'pływają' po macierzy rok po roku. Kliknięcia (Boardroom) działają w widoku statycznym.")
+    
+    if animate:
+        with perf.stage("animation:score_history"):
+            df_history = pipeline.score_history(
+                df_all, selected_level,
+                w_growth=w_growth, w_profit=w_profit, w_safety=w_safety,
+                sector=selected_sector, min_revenue=revenue_threshold,
+                kill_switch_limit=kill_switch_limit, max_year=max_year
+            )
+        fig = charts.create_animated_bubble_chart(df_history, max_rev_global, start_year=selected_year)
+        with perf.stage("render:animated_bubble", rows=len(df_history)):
+            st.plotly_chart(fig, use_container_width=True, key="bubble_animation")
+    else:
+        # Pass selected_pkd to the chart function
+        fig = charts.create_main_bubble_chart(
+            filtered_df, max_rev_global, highlight_pkd=selected_pkd,
+            render_mode=chart_render_mode, aggregate_share=chart_aggregate_share
+        )
 
-    # Display Chart
-    # Important: selection_mode="points" enables the click interaction
-    st.plotly_chart(fig, use_container_width=True, key="bubble_chart", on_select="rerun", selection_mode="points")
+        # Display Chart
+        # Important: selection_mode="points" enables the click interaction
+        with perf.stage("render:main_bubble", rows=len(filtered_df)):
+            st.plotly_chart(fig, use_container_width=True, key="bubble_chart", on_select="rerun", selection_mode="points")
 
 
 # --- DETAILS (RIGHT + BOTTOM) ---
-with col_details:
+# Fragment: reruns triggered inside the Boardroom don't recompute the matrix / sidebar.
+@timed_fragment("boardroom")
+def render_boardroom(selected_row, selected_year, selected_level, w_growth, w_profit, w_safety):
     st.subheader("AI Boardroom")
     
     # Logic moved up, just using result now
@@ -620,8 +643,59 @@ with col_details:
         m1.metric("Stability", f"{selected_row.get('Stability_Score', 0):.1f}", delta_color="normal")
         m2.metric("Transformation", f"{selected_row.get('Transformation_Score', 0):.1f}", delta_color="normal")
         
+        # --- PEER PERCENTILES (precomputed per Year / Level / Section, see peers.py) ---
+        peer_row = peers.lookup(utils.load_peer_percentiles(data_version, w_growth, w_profit, w_safety), selected_year, selected_pkd)
+        if peer_row is not None and scenario_active:
+            # Percentiles rank the unshocked data: drop the metrics the scenario moves
+            peer_row = peer_row.drop([m for m in scenarios.SHOCKED_COLUMNS if m in peer_row.index])
+        if peer_row is not None:
+            peer_group = f"sekcja {peer_row['Section']}" if peer_row['Section'] else "wszystkie sekcje"
+            st.caption(f"Percentyl wśród konkurentów ({peer_group}, {peer_row['Level']}, {int(peer_row['Peers'])} branż; 100 = najlepsza):")
+            peer_labels = {
+                'Stability_Score': 'Stability', 'Transformation_Score': 'Transformation', 'Revenue': 'Przychody',
+                'Dynamics_YoY': 'Dynamika', 'Net_Profit_Margin': 'Marża', 'Debt_to_Revenue': 'Zadłużenie (niskie)',
+                'Bankruptcy_Rate': 'Upadłości (niskie)'
+            }
+            peer_labels = {m: label for m, label in peer_labels.items() if m in peer_row.index}
+            st.dataframe(
+                pd.DataFrame({
+                    'Wskaźnik': list(peer_labels.values()),
+                    'Percentyl': [peer_row.get(m) for m in peer_labels],
+                    'Porównano z': [peer_row.get(peers.peers_column(m)) for m in peer_labels]
+                }),
+                column_config={
+                    "Percentyl": st.column_config.ProgressColumn("Percentyl", min_value=0, max_value=100, format="%.0f"),
+                    "Porównano z": st.column_config.NumberColumn("Porównano z", format="%d", help="Branże z grupy, które raportują ten wskaźnik.")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+            if scenario_active:
+                st.caption("Scenariusz aktywny: percentyle wskaźników zmienianych przez szok (Stability, Transformation, "
+                           "dynamika, marża, upadłości) są ukryte - ranking liczony jest bez scenariusza.")
+        
+        # --- CO-MOVING INDUSTRIES (top-k precomputed per PKD level, see correlation.py) ---
+        code_level = pkd.pkd_level(pd.Series([selected_pkd])).iloc[0]
+        level_corr = utils.load_correlations(data_version, code_level)
+        with st.expander("🔗 Powiązane branże (korelacja w czasie)"):
+            st.caption(f"Korelacja rocznych szeregów z branżami tego samego poziomu ({code_level}), "
+                       f"min. {correlation.MIN_OVERLAP_YEARS} wspólnych lat.")
+            corr_labels = {'PKD_Code': 'PKD', 'Industry_Name': 'Branża', 'Dynamics_YoY': 'Dynamika', 'Bankruptcy_Rate': 'Upadłości'}
+            corr_config = {label: st.column_config.NumberColumn(label, format="%.2f") for label in ['Dynamika', 'Upadłości']}
+            tab_dyn, tab_bankr = st.tabs(["Wspólna dynamika przychodów", "Zarażanie upadłościami"])
+            for tab, metric in [(tab_dyn, 'Dynamics_YoY'), (tab_bankr, 'Bankruptcy_Rate')]:
+                corr_peers = correlation.top_peers(level_corr, selected_pkd, metric, k=5)
+                if corr_peers.empty:
+                    tab.caption("Za krótka historia do wyznaczenia korelacji.")
+                else:
+                    tab.dataframe(corr_peers.rename(columns=corr_labels), column_config=corr_config, hide_index=True, use_container_width=True)
+        
         # --- STABILITY RADAR CHART ---
-        radar_fig = charts.create_stability_radar_chart(selected_row, filtered_df)
+        radar_bounds = normalization.bounds_for(utils.load_norm_bounds(data_version), selected_year, selected_level)
+        radar_percentiles = None
+        if peer_row is not None:
+            radar_percentiles = {m: peer_row.get(m) for m in ['Net_Profit_Margin', 'Dynamics_YoY', 'Debt_to_Revenue', 'Cash_Ratio']}
+        radar_fig = charts.create_stability_radar_chart(selected_row, radar_bounds, radar_percentiles)
         st.plotly_chart(radar_fig, use_container_width=True, config={'displayModeBar': False})
         
         # Detailed Breakdown
@@ -641,6 +715,15 @@ with col_details:
                     
                 return f'<span style="color:{color}; font-weight:bold;">{display_val:+.2f}{suffix}</span>'
 
+            # Rolling risk features (features.py) are NaN without enough history
+            def window_val(col, scale=1, suffix=''):
+                val = selected_row.get(col)
+                return "-" if pd.isna(val) else f"**{val * scale:.1f}{suffix}**"
+
+            def window_growth(col):
+                val = selected_row.get(col)
+                return "-" if pd.isna(val) else utils.color_val(val * 100, is_percent=True)
+
             st.markdown(f"""
             **Twoje Wagi Stability Score:**
             - Wzrost: {w_growth}
@@ -654,7 +737,13 @@ with col_details:
             - Płynność (Cash Ratio): {color_val(selected_row.get('Cash_Ratio', 0), is_percent=False)}
             - Zadłużenie (Debt/Rev): {color_val(selected_row.get('Debt_to_Revenue', 0), inverse=True)}x
             - Ryzyko (Upadłości): {color_val(selected_row.get('Bankruptcy_Rate', 0), inverse=True, is_percent=False)}%
-            
+
+            **Ryzyko w czasie (okna kroczące):**
+            - CAGR przychodów 3 / 5 lat: {window_growth('Revenue_CAGR_3Y')} / {window_growth('Revenue_CAGR_5Y')}
+            - Zmienność dynamiki (5 lat): {window_val('Dynamics_Volatility_5Y', 100, '%')}
+            - Zmienność marży (5 lat): {window_val('Margin_Volatility_5Y', suffix=' p.p.')}
+            - Max spadek przychodów od szczytu (5 lat): {window_val('Revenue_Max_Drawdown_5Y', 100, '%')}
+
             **Transformacja (Inwestycje + Innowacje):**
             - Nakłady: **{selected_row.get('Investment', 0):,.1f} mln PLN**
             - Intensywność (Capex/Rev): {color_val(selected_row.get('Capex_Intensity', 0), is_percent=False)}%
@@ -701,37 +790,9 @@ with col_details:
             # Recommendation
             # --- DYNAMIC LENDING SCORE (CALCULATED ON THE FLY) ---
             # 1. Get 2026 Forecast for Context
-            forecast_trans_score = None
-            try:
-                # Need to run forecast specifically for this item if not already done?
-                # For speed in UI, we might just estimate or look if we have it.
-                # Since we haven't run global forecast yet in this block, let's run a quick one for this row.
-                hist_data = df_all[df_all['PKD_Code'] == selected_pkd].sort_values('Year')
-                if not hist_data.empty:
-                    # Quick Forecast for Transformation Score components
-                    # Note: We need recalculate_future_st_scores functionality
-                    # Simpler approach: Calculate Forecast for 'Transformation_Score' directly if it was a column?
-                    # No, it's calculated from components. 
-                    # Let's perform the full forecast logic for this single entity.
-                    
-                    # Forecast Capex & Arxiv
-                    df_capex = utils.calculate_forecast(hist_data, 'Capex_Intensity', 2)
-                    df_arxiv = utils.calculate_forecast(hist_data, 'Arxiv_Papers', 2)
-                    
-                    # Get 2026 values
-                    future_capex = df_capex[df_capex['Year'] == 2026]['Capex_Intensity'].iloc[0]
-                    # Arxiv needs 2019+ filter inside forecast, but here we just take result if robust
-                    # Let's assume utils handled it or we do basic linear
-                    future_arxiv = df_arxiv[df_arxiv['Year'] == 2026]['Arxiv_Papers'].iloc[0]
-                    
-                    # Normalize & Score (Manual Re-impl or Helper?)
-                    # Let's simple-norm using bounds from utils
-                    b_capex = utils.norm(future_capex, *utils.bounds['Capex_Intensity'])
-                    b_arxiv = utils.norm(future_arxiv, *utils.bounds['Arxiv_Papers'])
-                    
-                    forecast_trans_score = ((0.5 * b_capex) + (0.5 * b_arxiv)) * 100
-            except:
-                pass
+            # Quick batched forecast of the Transformation components (Capex + ArXiv) for this entity
+            hist_data = store.history(index_store, selected_pkd, columns=schema.VIEW_COLUMNS['transformation_history'])
+            forecast_trans_score = pipeline.future_transformation(hist_data) if not hist_data.empty else None
             
             # 2. Compute Score
             lending_score = utils.calculate_lending_opportunity(selected_row, forecast_trans_score)
@@ -755,251 +816,146 @@ with col_details:
     else:
         st.write("👈 Kliknij bąbelek lub wybierz Sektor!")
 
-# --- RECURSIVE DRILL DOWN SECTION ---
-current_selection_pkd = selected_pkd
-level_depth = 0
-max_depth = 3 # Safety break
+with col_details:
+    render_boardroom(selected_row, selected_year, selected_level, w_growth, w_profit, w_safety)
 
-while current_selection_pkd and level_depth < max_depth:
-    st.divider()
+# --- RECURSIVE DRILL DOWN SECTION ---
+# Fragment: a click in a level's sub-chart reruns only the drill-down, not the matrix / Boardroom.
+# Level inputs are cached (utils.load_drill_forecast, indexed store lookups), so the levels above
+# the click are cache hits and only the levels below it are computed.
+@timed_fragment("drilldown")
+def render_drilldown(data_version, index_store, root_pkd, selected_year, w_growth, w_profit, w_safety):
+    current_selection_pkd = root_pkd
+    level_depth = 0
+    max_depth = 3 # Safety break
+    
+    while current_selection_pkd and level_depth < max_depth:
+        st.divider()
     
-    # Get details for current selection
-    # Need to find row for current_selection_pkd in df_all (for correct Year)
-    # We use df_all because child might not be in the initial 'filtered_df' if user filtered by something else, 
-    # but logically drill down should show global context.
+        # Get details for current selection
+        # Need to find row for current_selection_pkd in df_all (for correct Year)
+        # We use df_all because child might not be in the initial 'filtered_df' if user filtered by something else, 
+        # but logically drill down should show global context.
     
-    current_row_df = df_all[(df_all['PKD_Code'] == current_selection_pkd) & (df_all['Year'] == selected_year)]
-    if current_row_df.empty:
-        break
+        current_row_df = store.row(index_store, current_selection_pkd, selected_year, columns=schema.VIEW_COLUMNS['drill_row'])
+        if current_row_df.empty:
+            break
         
-    current_row = current_row_df.iloc[0]
-    st.markdown(f"### 📉 Poziom {level_depth + 1}: `{current_row['Industry_Name']}`")
-    
-    # --- METRICS FOR CURRENT LEVEL ---
-    # Use Metrics Calculated in Loader
-    lev_rev = current_row['Revenue']
-    lev_dyn = current_row['Dynamics_YoY']
-    # Profit Margin
-    lev_margin = current_row.get('Net_Profit_Margin', 0)
-    # Debt Ratio
-    lev_debt_ratio = current_row.get('Debt_to_Revenue', 0)
-    # Cash Ratio
-    lev_cash_ratio = current_row.get('Cash_Ratio', 0)
-    # Risk
-    lev_risk_percent = current_row.get('Bankruptcy_Rate', 0)
-    lev_bankrupt_count = current_row.get('Bankruptcy_Count', 0)
-    
-    m1, m2, m3, m4, m5 = st.columns(5)
-    m1.metric("Wielkość", f"{lev_rev/1000:,.1f} mld PLN", f"{lev_dyn*100:+.1f}% r/r")
-    m2.metric("Rentowność (Marża)", f"{lev_margin:.1f}%", help="Zysk Netto / Przychody")
-    m3.metric("Zadłużenie", f"{lev_debt_ratio:.2f}x", help="Dług / Przychody")
-    m4.metric("Płynność", f"{lev_cash_ratio:.2f}", help="Gotówka / Zobowiązania Krótkie")
-    m5.metric("Ryzyko (Upadłości)", f"{lev_risk_percent:.2f}%", f"{lev_bankrupt_count:.0f} firm", delta_color="inverse")
+        current_row = current_row_df.iloc[0]
+        st.markdown(f"### 📉 Poziom {level_depth + 1}: `{current_row['Industry_Name']}`")
+    
+        # --- METRICS FOR CURRENT LEVEL ---
+        # Use Metrics Calculated in Loader
+        lev_rev = current_row['Revenue']
+        lev_dyn = current_row['Dynamics_YoY']
+        # Profit Margin
+        lev_margin = current_row.get('Net_Profit_Margin', 0)
+        # Debt Ratio
+        lev_debt_ratio = current_row.get('Debt_to_Revenue', 0)
+        # Cash Ratio
+        lev_cash_ratio = current_row.get('Cash_Ratio', 0)
+        # Risk
+        lev_risk_percent = current_row.get('Bankruptcy_Rate', 0)
+        lev_bankrupt_count = current_row.get('Bankruptcy_Count', 0)
+    
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Wielkość", f"{lev_rev/1000:,.1f} mld PLN", f"{lev_dyn*100:+.1f}% r/r")
+        m2.metric("Rentowność (Marża)", f"{lev_margin:.1f}%", help="Zysk Netto / Przychody")
+        m3.metric("Zadłużenie", f"{lev_debt_ratio:.2f}x", help="Dług / Przychody")
+        m4.metric("Płynność", f"{lev_cash_ratio:.2f}", help="Gotówka / Zobowiązania Krótkie")
+        m5.metric("Ryzyko (Upadłości)", f"{lev_risk_percent:.2f}%", f"{lev_bankrupt_count:.0f} firm", delta_color="inverse")
     
-    st.divider()
+        st.divider()
     
-    col_hist, col_sub = st.columns(2)
+        col_hist, col_sub = st.columns(2)
     
-    # 1. HISTORY CHART
-    # 1. HISTORY & FORECAST CHARTS
-    with col_hist:
-        st.caption(f"📈 Trendy i Prognozy (2019-2026): {current_selection_pkd}")
+        # 1. HISTORY CHART
+        # 1. HISTORY & FORECAST CHARTS
+        with col_hist, perf.stage(f"drilldown:L{level_depth + 1}:history"):
+            st.caption(f"📈 Trendy i Prognozy (2019-2026): {current_selection_pkd}")
         
-        # Get full history
-        hist_df = df_all[df_all['PKD_Code'] == current_selection_pkd].sort_values('Year')
+            # Forecast frame of this level (cached per PKD + weights): re-rendering a level is a cache hit
+            df_final = utils.load_drill_forecast(data_version, current_selection_pkd, w_growth, w_profit, w_safety)
         
-        if not hist_df.empty:
-            # Prepare Forecasts for Key Metrics
-            # We predict 2 years ahead (2025-2026)
-            
-            # Prepare Forecasts for Key Metrics (2025-2026)
-            # We need a Master Forecast DF with all metrics to recalculate S&T Scores
-            
-            # 1. Initialize Master with Anchor Metric
-            # Ensure derived columns exist
-            if 'Debt_to_Revenue' not in hist_df.columns:
-                 hist_df['Debt_to_Revenue'] = hist_df['Total_Debt'] / hist_df['Revenue']
-            
-            # List of metrics to forecast
-            metrics_to_forecast = [
-                'Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate',
-                'Dynamics_YoY', 'Profitability', 'Capex_Intensity', 'Arxiv_Papers'
-            ]
-            
-            # Initialize df_final with the first metric to set up the skeleton (rows)
-            df_final = utils.calculate_forecast(hist_df, metrics_to_forecast[0], years_ahead=2)
-            
-            # Loop through the rest and fill in
-            for metric in metrics_to_forecast[1:]:
-                # We forecast based on the HISTORY PART only
-                df_hist_only = df_final[df_final['Is_Forecast'] == False].copy()
-                
-                # Special handling for Arxiv: AI Hype is recent (2019+)
-                # If we train on 2005-2024 (mostly zeros), the trendline will be flattened.
-                # Train only on recent years to capture the "Hype".
-                if metric == 'Arxiv_Papers':
-                     df_hist_only = df_hist_only[df_hist_only['Year'] >= 2019]
-                
-                # Run forecast
-                df_temp = utils.calculate_forecast(df_hist_only, metric, years_ahead=2)
-                
-                # Assign the forecast values to our master DF
-                # Use careful assignment by Year to match rows
-                for idx, row in df_temp[df_temp['Is_Forecast'] == True].iterrows():
-                     yr = row['Year']
-                     val = row[metric]
-                     mask = (df_final['Year'] == yr) & (df_final['Is_Forecast'] == True)
-                     df_final.loc[mask, metric] = val
-
-            # 2. Recalculate S&T Scores based on forecasted metrics
-            # NOW DYNAMIC: Passing weights from Sidebar Sliders
-            df_final = utils.recalculate_future_st_scores(
-                df_final, 
-                w_growth=w_growth, 
-                w_profit=w_profit, 
-                w_safety=w_safety
-            )
-            
-            # 3. Create Charts
-            fig_profit = charts.create_historical_chart(df_final, 'Net_Profit_Margin', 'Rentowność (Marża)', 'Marża %', is_percent=False)
-            fig_debt = charts.create_historical_chart(df_final, 'Debt_to_Revenue', 'Zadłużenie (Debt/Rev)', 'x', is_percent=False)
-            fig_cash = charts.create_historical_chart(df_final, 'Cash_Ratio', 'Płynność (Gotówka)', 'Ratio', is_percent=False)
-            fig_risk_chart = charts.create_historical_chart(df_final, 'Bankruptcy_Rate', 'Ryzyko Upadłości', '% Firm', is_percent=False)
+            if not df_final.empty:
+                # 3. Create Charts
+                fig_profit = charts.create_historical_chart(df_final, 'Net_Profit_Margin', 'Rentowność (Marża)', 'Marża %', is_percent=False)
+                fig_debt = charts.create_historical_chart(df_final, 'Debt_to_Revenue', 'Zadłużenie (Debt/Rev)', 'x', is_percent=False)
+                fig_cash = charts.create_historical_chart(df_final, 'Cash_Ratio', 'Płynność (Gotówka)', 'Ratio', is_percent=False)
+                fig_risk_chart = charts.create_historical_chart(df_final, 'Bankruptcy_Rate', 'Ryzyko Upadłości', '% Firm', is_percent=False)
             
-            # New S&T Time Chart
-            # Now showing Stability & Transformation over Time (Lines) instead of Matrix Trajectory
-            fig_st_time = charts.create_st_time_chart(df_final)
+                # New S&T Time Chart
+                # Now showing Stability & Transformation over Time (Lines) instead of Matrix Trajectory
+                fig_st_time = charts.create_st_time_chart(df_final)
 
-            # 4. Display in Tabs
-            t1, t2, t3 = st.tabs(["📊 Finanse", "🛡️ Ryzyko", "🧭 Strategia (S&T)"])
+                # 4. Display in Tabs
+                t1, t2, t3 = st.tabs(["📊 Finanse", "🛡️ Ryzyko", "🧭 Strategia (S&T)"])
             
-            with t1:
-                st.plotly_chart(fig_profit, use_container_width=True, key=f"p_hist_{level_depth}_{current_selection_pkd}")
-                st.plotly_chart(fig_debt, use_container_width=True, key=f"d_hist_{level_depth}_{current_selection_pkd}")
+                with t1:
+                    st.plotly_chart(fig_profit, use_container_width=True, key=f"p_hist_{level_depth}_{current_selection_pkd}")
+                    st.plotly_chart(fig_debt, use_container_width=True, key=f"d_hist_{level_depth}_{current_selection_pkd}")
                 
-            with t2:
-                st.plotly_chart(fig_risk_chart, use_container_width=True, key=f"r_hist_{level_depth}_{current_selection_pkd}")
-                st.plotly_chart(fig_cash, use_container_width=True, key=f"c_hist_{level_depth}_{current_selection_pkd}")
+                with t2:
+                    st.plotly_chart(fig_risk_chart, use_container_width=True, key=f"r_hist_{level_depth}_{current_selection_pkd}")
+                    st.plotly_chart(fig_cash, use_container_width=True, key=f"c_hist_{level_depth}_{current_selection_pkd}")
                 
-            with t3:
-                st.caption("Ewolucja wyników Stability & Transformation (2019-2026).")
-                st.plotly_chart(fig_st_time, use_container_width=True, key=f"st_time_{level_depth}_{current_selection_pkd}")
-    # 2. CHILDREN CHART
-    next_selection = None
-    with col_sub:
-        st.caption(f"Składowe: {current_selection_pkd}")
+                with t3:
+                    st.caption("Ewolucja wyników Stability & Transformation (2019-2026).")
+                    st.plotly_chart(fig_st_time, use_container_width=True, key=f"st_time_{level_depth}_{current_selection_pkd}")
+        # 2. CHILDREN CHART
+        next_selection = None
+        with col_sub, perf.stage(f"drilldown:L{level_depth + 1}:children"):
+            st.caption(f"Składowe: {current_selection_pkd}")
         
-        children_df = pd.DataFrame()
+            # --- FIND CHILDREN LOGIC ---
+            children_df = store.children(index_store, current_selection_pkd, selected_year, columns=schema.VIEW_COLUMNS['drill_children'])
         
-        # --- FIND CHILDREN LOGIC ---
-        if current_selection_pkd.startswith('SEK_'):
-             # Section Logic
-            section_char = current_selection_pkd.split('_')[1]
-            ranges = {
-                'A': (1, 3), 'B': (5, 9), 'C': (10, 33), 'D': (35, 35), 'E': (36, 39),
-                'F': (41, 43), 'G': (45, 47), 'H': (49, 53), 'I': (55, 56), 'J': (58, 63),
-                'K': (64, 66), 'L': (68, 68), 'M': (69, 75), 'N': (77, 82), 'O': (84, 84),
-                'P': (85, 85), 'Q': (86, 88), 'R': (90, 93), 'S': (94, 96)
-            }
-            if section_char in ranges:
-                start, end = ranges[section_char]
-                l2_candidates = df_all[
-                    (df_all['Year'] == selected_year) & 
-                    (df_all['PKD_Code'].str.len() == 3) & 
-                    (~df_all['PKD_Code'].str.startswith('SEK'))
-                ].copy()
-                def get_prefix(code):
-                    try: return int(str(code)[:2])
-                    except: return -1
-                l2_candidates['Prefix'] = l2_candidates['PKD_Code'].apply(get_prefix)
-                children_df = l2_candidates[(l2_candidates['Prefix'] >= start) & (l2_candidates['Prefix'] <= end)]
-        else:
-            # Standard Logic
-            # 01. (3) -> 01.x (4) | 01.1 (4) -> 01.xx (5)
-            curr_len = len(current_selection_pkd)
-            target_len = 0
-            if curr_len == 3: target_len = 4
-            elif curr_len == 4: target_len = 5
-            
-            if target_len:
-                child_candidates = df_all[
-                    (df_all['Year'] == selected_year) & 
-                    (df_all['PKD_Code'].str.startswith(current_selection_pkd)) &
-                    (df_all['PKD_Code'].str.len() == target_len)
-                ].copy()
-                children_df = child_candidates
-        
-        # --- RENDER SUB CHART ---
-        if not children_df.empty:
-            fig_sub = go.Figure()
-            max_rev_sub = children_df['Revenue'].max()
-            if max_rev_sub == 0: max_rev_sub = 1
+            # --- RENDER SUB CHART ---
+            if not children_df.empty:
+                fig_sub = charts.create_drill_children_chart(children_df)
             
-            fig_sub.add_trace(go.Scatter(
-                x=children_df['Stability_Score'],
-                y=children_df['Transformation_Score'],
-                mode='markers',
-                text=children_df['Industry_Name'],
-                marker=dict(
-                    size=np.sqrt(children_df['Revenue'] / max_rev_sub) * 60 + 10,
-                    color=children_df['Status'].map(color_map).fillna('#888'),
-                    line=dict(width=1, color='white')
-                ),
-                customdata=children_df[['PKD_Code']], # Pass PKD for selection
-                hovertemplate="<b>%{text}</b><extra></extra>"
-            ))
+                # UNIQUE KEY for each level to capture selection
+                chart_key = f"drill_chart_{level_depth}_{current_selection_pkd}"
+                st.plotly_chart(fig_sub, use_container_width=True, key=chart_key, on_select="rerun", selection_mode="points")
             
-            fig_sub.update_layout(
-                xaxis_title="Stability Score",
-                yaxis_title="Transformation Score",
-                xaxis=dict(autorange=True, showgrid=False, zeroline=False),
-                yaxis=dict(autorange=True, showgrid=False, zeroline=False),
-                height=300,
-                margin=dict(l=0,r=0,t=0,b=0),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                showlegend=False,
-                font=dict(color='white')
-            )
-            
-            # UNIQUE KEY for each level to capture selection
-            chart_key = f"drill_chart_{level_depth}_{current_selection_pkd}"
-            st.plotly_chart(fig_sub, use_container_width=True, key=chart_key, on_select="rerun", selection_mode="points")
-            
-            # CHECK SELECTION
-            sub_sel = st.session_state.get(chart_key, {}).get("selection", {}).get("points", [])
-            if sub_sel:
-                # Find which point
-                p = sub_sel[0]
-                # Match by index or coordinate. 
-                # Plotly selection returns pointIndex which corresponds to dataframe index IF reset.
-                # Safer: Match x/y or use pointIndex if we ensure order.
-                # "pointIndex" is reliable if we used 1 trace and didn't shuffle.
-                # We used 1 trace here!
-                
-                try:
+                # CHECK SELECTION
+                sub_sel = st.session_state.get(chart_key, {}).get("selection", {}).get("points", [])
+                if sub_sel:
+                    # Find which point
                     p = sub_sel[0]
-                    next_pkd_code = children_df.iloc[p['point_index']]['PKD_Code']
-                    child_row = children_df.iloc[p['point_index']]
-                    next_selection = next_pkd_code
+                    # Match by index or coordinate. 
+                    # Plotly selection returns pointIndex which corresponds to dataframe index IF reset.
+                    # Safer: Match x/y or use pointIndex if we ensure order.
+                    # "pointIndex" is reliable if we used 1 trace and didn't shuffle.
+                    # We used 1 trace here!
+                
+                    try:
+                        p = sub_sel[0]
+                        next_pkd_code = children_df.iloc[p['point_index']]['PKD_Code']
+                        child_row = children_df.iloc[p['point_index']]
+                        next_selection = next_pkd_code
                     
-                    # --- DETAILS INLINE ---
-                    with st.expander(f"📊 Detale: {child_row['Industry_Name']}", expanded=True):
-                        c1, c2, c3, c4 = st.columns(4)
-                        c1.markdown(f"**Dynamika:**<br>{utils.color_val(child_row.get('Dynamics_YoY',0)*100, is_percent=True)}", unsafe_allow_html=True)
-                        c2.markdown(f"**Marża:**<br>{utils.color_val(child_row.get('Net_Profit_Margin',0), is_percent=False)}%", unsafe_allow_html=True)
-                        c3.markdown(f"**Upadłość:**<br>{utils.color_val(child_row.get('Bankruptcy_Rate',0), inverse=True)}%", unsafe_allow_html=True)
-                        c4.markdown(f"**Przychody:**<br>{child_row.get('Revenue',0):,.0f} mln", unsafe_allow_html=True)
-                except Exception as e:
-                    # st.error(f"Selection error: {e}")
-                    pass
-        else:
-            st.write("Brak podkategorii.")
+                        # --- DETAILS INLINE ---
+                        with st.expander(f"📊 Detale: {child_row['Industry_Name']}", expanded=True):
+                            c1, c2, c3, c4 = st.columns(4)
+                            c1.markdown(f"**Dynamika:**<br>{utils.color_val(child_row.get('Dynamics_YoY',0)*100, is_percent=True)}", unsafe_allow_html=True)
+                            c2.markdown(f"**Marża:**<br>{utils.color_val(child_row.get('Net_Profit_Margin',0), is_percent=False)}%", unsafe_allow_html=True)
+                            c3.markdown(f"**Upadłość:**<br>{utils.color_val(child_row.get('Bankruptcy_Rate',0), inverse=True)}%", unsafe_allow_html=True)
+                            c4.markdown(f"**Przychody:**<br>{child_row.get('Revenue',0):,.0f} mln", unsafe_allow_html=True)
+                    except Exception as e:
+                        # st.error(f"Selection error: {e}")
+                        pass
+            else:
+                st.write("Brak podkategorii.")
             
-    # Advance loop
-    if next_selection:
-        current_selection_pkd = next_selection
-        level_depth += 1
-    else:
-        break
+        # Advance loop
+        if next_selection:
+            current_selection_pkd = next_selection
+            level_depth += 1
+        else:
+            break
+
+
+render_drilldown(data_version, index_store, selected_pkd, selected_year, w_growth, w_profit, w_safety)
 
+render_perf_panel()
@@ -0,0 +1,84 @@
+"""
+Robust (quantile-based) normalization bounds, precomputed per (Year, Level, Metric).
+
+Min-max normalization lets a single outlier squash a whole year; here every metric is winsorized
+to its [5th, 95th] percentile within the same year and PKD level and then scaled to 0-1
+(scoring.norm with per-row bounds). The bounds table is built with ONE grouped quantile pass
+(compute_bounds) when the data is loaded; charts and scoring only look it up.
+
+Used by scripts/04_real_data_loader.py (relative S&T scores) and the Stability radar chart.
+"""
+import numpy as np
+import pandas as pd
+
+import pkd
+import scoring
+
+LOWER_Q = 0.05
+UPPER_Q = 0.95
+
+# Metrics with bounds (the S&T inputs)
+NORM_METRICS = list(scoring.BOUNDS)
+
+
+def compute_bounds(df, metrics=None, lower=LOWER_Q, upper=UPPER_Q):
+    """
+    Quantile bounds of every metric per (Year, Level) in one grouped pass. NaNs are ignored.
+
+    Returns:
+        pd.DataFrame: Index (Year, Level); columns ('low' | 'high', metric).
+    """
+    metrics = [m for m in (metrics or NORM_METRICS) if m in df.columns]
+    levels = pkd.pkd_level(df['PKD_Code']).to_numpy()
+    keep = levels != ''
+
+    values = df.loc[keep, metrics].astype(float)
+    q = values.groupby([df.loc[keep, 'Year'].to_numpy(), levels[keep]]).quantile([lower, upper])
+    q.index.names = ['Year', 'Level', 'q']
+
+    return pd.concat({'low': q.xs(lower, level='q'), 'high': q.xs(upper, level='q')}, axis=1)
+
+
+def bounds_for(table, year, level):
+    """
+    Bounds of one (year, level) as a scoring.BOUNDS-like dict {metric: (low, high)}.
+    Metrics without data (or a missing key) fall back to the absolute scoring.BOUNDS.
+    """
+    bounds = dict(scoring.BOUNDS)
+    if table is None or (year, level) not in table.index:
+        return bounds
+
+    row = table.loc[(year, level)]
+    for metric in row['low'].index:
+        low, high = row[('low', metric)], row[('high', metric)]
+        if pd.notna(low) and pd.notna(high):
+            bounds[metric] = (float(low), float(high))
+    return bounds
+
+
+def row_bounds(df, table):
+    """
+    Per-row bounds for a frame mixing years / levels: {metric: (low_array, high_array)},
+    usable as the 'bounds' argument of scoring.st_components / score_stability_transformation.
+    """
+    keys = pd.MultiIndex.from_arrays([df['Year'].to_numpy(), pkd.pkd_level(df['PKD_Code']).to_numpy()])
+    bounds = {}
+    for metric, (abs_low, abs_high) in scoring.BOUNDS.items():
+        if ('low', metric) in table.columns:
+            low = table[('low', metric)].reindex(keys).to_numpy()
+            high = table[('high', metric)].reindex(keys).to_numpy()
+            bounds[metric] = (np.where(np.isnan(low), abs_low, low), np.where(np.isnan(high), abs_high, high))
+        else:
+            bounds[metric] = (abs_low, abs_high)
+    return bounds
+
+
+def robust_norm(df, table, metric):
+    """Winsorized 0-1 normalization of one metric column against its (Year, Level) bounds."""
+    low, high = row_bounds(df, table)[metric]
+    return scoring.norm(df[metric].to_numpy(dtype=float), low, high)
+
+
+def score_robust(df, table, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    """S&T scores (0-100) relative to each row's (Year, Level) peers instead of the absolute BOUNDS."""
+    return scoring.score_stability_transformation(df, w_growth, w_profit, w_safety, bounds=row_bounds(df, table))
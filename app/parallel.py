@@ -0,0 +1,120 @@
+"""
+Multi-process 2026 Ranking reports, sharded by PKD Macro Section.
+
+Every row of the ranking depends only on its own PKD history (absolute S&T scoring, per-series
+trends) and on the section row for the Sector label, so the full grid (levels x years x weight
+presets) splits cleanly by section letter.
+
+The input is written once, sorted by section, to an uncompressed Arrow IPC file; workers memory-map
+it and materialize only their own contiguous slice, so the dataset is never pickled to the pool.
+Shard results are merged in section order and put into report_cache.sort_reports() order,
+which makes the output identical to the single-process report_cache.build_reports().
+"""
+import concurrent.futures
+import os
+import tempfile
+
+import pandas as pd
+
+import pkd
+import pipeline
+import report_cache
+import scoring
+
+SHARED_FILE = 'index.arrow'
+
+# Codes outside any section range get their own shard
+NO_SECTION = '~'
+
+# Starting the pool and mapping the shared file costs over a second; below this many
+# rows x weight presets the in-process path is faster even with free cores
+MIN_PARALLEL_WORK = 500_000
+
+
+def pool_workers(workers, n_rows, n_presets=1):
+    """
+    Processes build_reports() actually uses: capped at the CPU count, and 1 (in-process)
+    for small grids where the pool start-up would dominate.
+    """
+    workers = min(workers or 1, os.cpu_count() or 1)
+    if workers <= 1 or n_rows * n_presets < MIN_PARALLEL_WORK:
+        return 1
+    return workers
+
+
+def write_shared_index(df_all, work_dir):
+    """
+    Writes df_all sorted by section letter to an Arrow IPC file.
+
+    Returns:
+        (str, list): File path and the shards as (section, offset, length), in section order.
+    """
+    import pyarrow as pa
+
+    sections = pkd.section_letter(df_all['PKD_Code']).fillna(NO_SECTION).to_numpy()
+    order = pd.Series(sections).sort_values(kind='stable').index.to_numpy()
+    df_sorted = df_all.iloc[order].reset_index(drop=True)
+    sections = sections[order]
+
+    path = os.path.join(work_dir, SHARED_FILE)
+    table = pa.Table.from_pandas(df_sorted, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    keys, starts = [], []
+    for i, section in enumerate(sections):
+        if not keys or keys[-1] != section:
+            keys.append(section)
+            starts.append(i)
+    shards = [(key, start, end - start) for key, start, end in zip(keys, starts, starts[1:] + [len(sections)])]
+    return path, shards
+
+
+def read_shard(path, offset, length):
+    """Rows [offset, offset + length) of the shared file (only this slice is copied out of the mmap)."""
+    import pyarrow as pa
+
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+        return table.slice(offset, length).to_pandas()
+
+
+def _shard_reports(path, offset, length, years, weights_list):
+    df_shard = read_shard(path, offset, length)
+    df_forecast = pipeline.forecast_metrics(df_shard)
+    return [report_cache.build_reports(df_shard, years, weights, df_forecast=df_forecast) for weights in weights_list]
+
+
+def build_reports(df_all, years=None, weights_list=None, workers=1):
+    """
+    Ranking reports for every (level, year, weight preset), optionally in a process pool.
+
+    Args:
+        df_all (pd.DataFrame): Full dataset (pipeline.read_processed_index).
+        years (list, optional): Snapshot years (default: report_cache.report_years).
+        weights_list (list, optional): Weight presets as dicts (default: [scoring.DEFAULT_WEIGHTS]).
+        workers (int): Maximum processes; 1 = in-process, no sharding (see pool_workers()).
+
+    Returns:
+        pd.DataFrame: report_cache.build_reports() layout for all presets, in sort_reports() order.
+    """
+    weights_list = weights_list or [scoring.DEFAULT_WEIGHTS]
+    years = report_cache.report_years(df_all) if years is None else list(years)
+
+    workers = pool_workers(workers, len(df_all), len(weights_list))
+    if workers <= 1:
+        df_forecast = pipeline.forecast_metrics(df_all)
+        parts = [report_cache.build_reports(df_all, years, weights, df_forecast=df_forecast) for weights in weights_list]
+        return report_cache.sort_reports(pd.concat(parts, ignore_index=True))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path, shards = write_shared_index(df_all, work_dir)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            futures = [
+                pool.submit(_shard_reports, path, offset, length, years, weights_list)
+                for _, offset, length in shards
+            ]
+            # Deterministic merge: section order, then the canonical sort
+            parts = [part for future in futures for part in future.result()]
+
+    return report_cache.sort_reports(pd.concat(parts, ignore_index=True))
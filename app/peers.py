@@ -0,0 +1,75 @@
+"""
+Peer-relative percentile ranks ("where does this PKD stand among its peers").
+
+Peers = industries of the same Year, PKD level and Macro Section; Sections themselves (L1) are
+compared with all Sections of the year. The table for the whole dataset is built with ONE grouped
+rank pass (compute_percentiles); the Boardroom panel and the radar chart look a row up by
+(Year, PKD_Code).
+
+Percentiles are 0-100 and oriented so that 100 = best in the group (metrics where lower is better,
+e.g. Debt_to_Revenue, are ranked descending). A metric is ranked only among the peers that report
+it: 'Peers' is the size of the group, 'Peers_<metric>' the number of non-NaN values the percentile
+of that metric was computed from.
+"""
+import numpy as np
+import pandas as pd
+
+import pkd
+
+PEER_METRICS = [
+    'Revenue', 'Dynamics_YoY', 'Net_Profit_Margin', 'Profitability', 'Cash_Ratio',
+    'Debt_to_Revenue', 'Bankruptcy_Rate', 'Capex_Intensity', 'Arxiv_Papers',
+    'Stability_Score', 'Transformation_Score'
+]
+LOWER_IS_BETTER = {'Debt_to_Revenue', 'Bankruptcy_Rate'}
+
+
+def compute_percentiles(df, metrics=None):
+    """
+    Percentile of every metric / score within its peer group, for all rows at once.
+
+    Args:
+        df (pd.DataFrame): Rows of any years / levels (e.g. the full dataset, rescored).
+        metrics (list, optional): Columns to rank. Defaults to PEER_METRICS.
+
+    Returns:
+        pd.DataFrame: Index (Year, PKD_Code); one 0-100 column per metric (NaN where the value is missing),
+                      'Peers' (group size), 'Peers_<metric>' (non-NaN values of the metric in the group),
+                      'Level' and 'Section' ('' for L1 = all Sections).
+    """
+    metrics = [m for m in (metrics or PEER_METRICS) if m in df.columns]
+    levels = pkd.pkd_level(df['PKD_Code']).to_numpy()
+    sections = pkd.section_letter(df['PKD_Code']).fillna('').to_numpy()
+    sections = np.where(levels == 'L1', '', sections)
+    keep = levels != ''
+
+    values = df.loc[keep, metrics].astype(float)
+    for metric in LOWER_IS_BETTER.intersection(metrics):
+        values[metric] = -values[metric]
+
+    keys = [df.loc[keep, 'Year'].to_numpy(), levels[keep], sections[keep]]
+    pct = values.groupby(keys).rank(pct=True) * 100
+    pct['Peers'] = values.groupby(keys)[metrics[0]].transform('size').to_numpy() if metrics else 0
+    counts = values.notna().groupby(keys).transform('sum')
+    for metric in metrics:
+        pct[peers_column(metric)] = counts[metric].to_numpy()
+    pct['Level'] = levels[keep]
+    pct['Section'] = sections[keep]
+
+    pct.index = pd.MultiIndex.from_arrays(
+        [df.loc[keep, 'Year'].to_numpy(), df.loc[keep, 'PKD_Code'].astype(str).to_numpy()], names=['Year', 'PKD_Code']
+    )
+    return pct[~pct.index.duplicated()]
+
+
+def peers_column(metric):
+    """Name of the column holding the number of peers a metric's percentile was ranked among."""
+    return f'Peers_{metric}'
+
+
+def lookup(table, year, pkd_code):
+    """Percentile row of one industry (pd.Series), or None if it isn't in the table."""
+    key = (year, str(pkd_code))
+    if table is None or key not in table.index:
+        return None
+    return table.loc[key]
@@ -0,0 +1,104 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# Per-rerun stage timings.
+# Streamlit executes every session's script run in its own thread, so a thread-local
+# recorder keeps concurrent sessions apart. Recording is OFF unless begin_run(enabled=True).
+_state = threading.local()
+
+
+def begin_run(enabled, **meta):
+    """Starts a new recording for the current rerun (or disables recording)."""
+    _state.records = [] if enabled else None
+    _state.depth = 0
+    _state.meta = meta
+    _state.run_start = time.perf_counter()
+
+
+def is_enabled():
+    return getattr(_state, 'records', None) is not None
+
+
+@contextlib.contextmanager
+def stage(name, rows=None):
+    """
+    Context manager timing one stage of the rerun.
+
+    The yielded dict can be used to report the row count once it is known:
+        with perf.stage("ranking:forecast") as rec:
+            ...
+            rec['rows'] = len(df_2026)
+    """
+    if not is_enabled():
+        yield {}
+        return
+
+    record = {'stage': name, 'rows': rows, 'depth': _state.depth}
+    _state.depth += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['ms'] = (time.perf_counter() - start) * 1000
+        _state.depth -= 1
+        _state.records.append(record)
+
+
+def _row_count(value):
+    # Row count of 2-D inputs (DataFrames / arrays); None for everything else
+    if getattr(value, 'ndim', None) == 2:
+        return int(value.shape[0])
+    return None
+
+
+def timed(name):
+    """Decorator timing every call of a function as a stage (rows = length of the first argument)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            rows = _row_count(args[0]) if args else None
+            with stage(name, rows=rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def records():
+    """Returns stage records of the current rerun (in completion order)."""
+    return list(getattr(_state, 'records', None) or [])
+
+
+def total_ms():
+    return (time.perf_counter() - _state.run_start) * 1000 if hasattr(_state, 'run_start') else 0.0
+
+
+def summarize(recs=None):
+    """Aggregates records by stage name: calls, total/max wall time and rows."""
+    summary = {}
+    for rec in (records() if recs is None else recs):
+        item = summary.setdefault(rec['stage'], {'stage': rec['stage'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'depth': rec['depth']})
+        item['calls'] += 1
+        item['total_ms'] += rec['ms']
+        item['max_ms'] = max(item['max_ms'], rec['ms'])
+        item['rows'] += rec['rows'] or 0
+        item['depth'] = min(item['depth'], rec['depth'])
+    return sorted(summary.values(), key=lambda x: -x['total_ms'])
+
+
+def export_jsonl(path):
+    """Appends the current rerun (meta + total + stages) as one JSON line."""
+    line = {
+        'ts': time.time(),
+        'total_ms': total_ms(),
+        **getattr(_state, 'meta', {}),
+        'stages': records()
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,228 @@
+"""
+Headless S&T scoring & 2026 Ranking pipeline.
+
+Everything the "🏆 Ranking & Eksport" view computes, without Streamlit:
+    year snapshot -> Kill Switch status -> level / sector / revenue filter -> S&T rescoring
+    -> batched 2026 forecast -> 2026 rescoring -> Lending Opportunity -> classification -> report.
+
+Used by app/main.py and by scripts/ranking_report.py (batch CSV reports).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import features
+import forecasting
+import perf
+import pkd
+import schema
+import scoring
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(BASE_PATH, 'data', 'processed_real_index.csv')
+
+RANKING_TARGET_YEAR = 2026
+
+# Report layout (same as the CSV export of the Ranking view)
+REPORT_COLUMNS = [
+    'PKD_Code', 'Industry_Name', 'Klasyfikacja',
+    'Lending_Score_2026',
+    'Stability_Current', 'Stability_2026',
+    'Transformation_Current', 'Transformation_2026',
+    'Revenue', 'Dynamics_YoY', 'Bankruptcy_Rate'
+]
+
+REPORT_RENAME = {
+    'Lending_Score_2026': 'Lending Opp (2026)',
+    'Stability_Current': 'Stability (Now)',
+    'Stability_2026': 'Stability (2026)',
+    'Transformation_Current': 'Transformation (Now)',
+    'Transformation_2026': 'Transformation (2026)',
+    'Revenue': 'Est. Revenue',
+    'Dynamics_YoY': 'Est. Growth',
+    'Bankruptcy_Rate': 'Est. Risk %'
+}
+
+
+@perf.timed("pipeline:read_processed_index")
+def read_processed_index(processed_path=DEFAULT_INDEX_PATH, columns=None):
+    """
+    Reads processed_real_index.csv (output of scripts/04_real_data_loader.py) without any caching,
+    with the declared lean dtypes (schema.py) and the rolling risk features (features.py).
+
+    Args:
+        columns (list, optional): Projection; defaults to every declared column (intermediates such as
+            Norm_* are skipped). Revenue / Total_Debt are always read for the dead-entity filter.
+            Projected reads skip the risk features.
+    """
+    wanted = set(schema.INDEX_SCHEMA if columns is None else columns) | {'Revenue', 'Total_Debt'}
+    usecols = [c for c in pd.read_csv(processed_path, nrows=0).columns if c in wanted]
+    # PKD codes like "01." stay strings (categories of the original text, not floats);
+    # the pyarrow parser is multi-threaded and builds the categoricals directly
+    df = pd.read_csv(processed_path, engine='pyarrow', usecols=usecols, dtype=schema.csv_dtypes(usecols))
+    df = schema.apply_schema(df)
+
+    # Filter out "Dead Entities" / Outliers
+    # Rows where both Revenue and Total_Debt are 0 (likely dormant or data errors)
+    # This prevents crowding at (0,0) on charts.
+    df = df[~((df['Revenue'] == 0) & (df['Total_Debt'] == 0))]
+
+    if columns is None:
+        df = features.add_risk_features(df)
+    return df
+
+
+def _filter_snapshot(df, df_all, level, sector, min_revenue, kill_switch_limit):
+    # Kill Switch status -> level -> sector -> revenue (same order as main.py)
+    df['Status'] = scoring.recalc_status(df, kill_switch_limit)
+
+    df = pkd.filter_level(df, level)
+    if 'Sector' not in df.columns or (not df.empty and df['Sector'].iloc[0] == 'All'):
+        df['Sector'] = pd.Categorical(pkd.sector_labels(df['PKD_Code'], df_all).values)
+
+    if sector and sector != "Wszystkie":
+        df = df[df['Sector'] == sector]
+    if min_revenue is not None:
+        df = df[df['Revenue'] >= min_revenue]
+    return df.copy()
+
+
+def select_view(df_all, year, level, sector=None, min_revenue=None, kill_switch_limit=scoring.DEFAULT_KILL_SWITCH):
+    """
+    Applies the sidebar filters in the same order as main.py.
+
+    Args:
+        df_all (pd.DataFrame): Full dataset.
+        year (int): Snapshot year.
+        level (str): 'L1'..'L4'.
+        sector (str, optional): Sector label ("F - BUDOWNICTWO"); None / "Wszystkie" = all.
+        min_revenue (float, optional): Minimal revenue (mln PLN).
+        kill_switch_limit (float): Bankruptcy Rate (%) above which Status = CRITICAL.
+
+    Returns:
+        pd.DataFrame: Filtered snapshot with 'Status' and 'Sector' columns.
+    """
+    df = df_all[df_all['Year'] == year].copy()
+    return _filter_snapshot(df, df_all, level, sector, min_revenue, kill_switch_limit)
+
+
+def rescore(df, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    """Absolute S&T rescoring of a snapshot with the given Stability weights."""
+    df = df.copy()
+    if df.empty:
+        return df
+    df['Stability_Score'], df['Transformation_Score'] = scoring.score_stability_transformation(df, w_growth, w_profit, w_safety)
+    return df
+
+
+def forecast_metrics(df_all, codes=None, target_year=RANKING_TARGET_YEAR):
+    """Batched forecast of METRICS_TO_FORECAST for the given PKD codes (all codes if None)."""
+    hist = df_all if codes is None else df_all[df_all['PKD_Code'].isin(codes)]
+    return forecasting.forecast_batch(hist, target_year, forecasting.METRICS_TO_FORECAST, years_ahead=2)
+
+
+@perf.timed("pipeline:forecast_ranking")
+def forecast_ranking(filtered_df, df_all, w_growth=4.0, w_profit=6.0, w_safety=3.0,
+                     target_year=RANKING_TARGET_YEAR, df_forecast=None):
+    """
+    Projects every industry of a (rescored) snapshot to the target year and ranks it.
+
+    Args:
+        filtered_df (pd.DataFrame): Current snapshot, already rescored (Stability_Score = "Now").
+        df_all (pd.DataFrame): Full history used for the trends.
+        w_growth, w_profit, w_safety (float): Stability weights.
+        target_year (int): Forecast year.
+        df_forecast (pd.DataFrame, optional): Precomputed forecast_metrics() result (reused in batch runs).
+
+    Returns:
+        pd.DataFrame: One row per industry with forecasted metrics, Stability_2026, Transformation_2026,
+                      Lending_Score_2026 and Klasyfikacja.
+    """
+    metrics = forecasting.METRICS_TO_FORECAST
+    if df_forecast is None:
+        df_forecast = forecast_metrics(df_all, filtered_df['PKD_Code'], target_year)
+
+    # Base for Future Rows
+    # We explicitly store CURRENT scores to preserve them before recalculation
+    zeros = pd.Series(0.0, index=filtered_df.index)
+    df_future = pd.DataFrame({
+        'PKD_Code': filtered_df['PKD_Code'].values,
+        'Industry_Name': filtered_df['Industry_Name'].values,
+        'Year': target_year,
+        'Current_Revenue': filtered_df['Revenue'].values,
+        'Stability_Current': filtered_df.get('Stability_Score', zeros).values,
+        'Transformation_Current': filtered_df.get('Transformation_Score', zeros).values,
+        'Is_Forecast': True
+    })
+    df_future = df_future.merge(df_forecast[['PKD_Code'] + metrics], on='PKD_Code', how='left')
+
+    # Fallback to current if forecast fails
+    for metric in metrics:
+        current_vals = filtered_df[metric].values if metric in filtered_df.columns else 0
+        df_future[metric] = df_future[metric].fillna(pd.Series(current_vals, index=df_future.index))
+
+    # RECALCULATE SCORES (On 2026 Data)
+    stability, transformation = scoring.score_stability_transformation(df_future, w_growth, w_profit, w_safety)
+    df_future['Stability_2026'] = stability
+    df_future['Transformation_2026'] = transformation
+
+    # LENDING SCORE ("Lending Score 2026" is Fully Future: 2026 Stability + 2026 Transformation)
+    df_future['Lending_Score_2026'] = scoring.lending_opportunity(
+        stability, transformation,
+        df_future['Cash_Ratio'], df_future['Bankruptcy_Rate']
+    )
+
+    # CLASSIFICATION (Updated for Future Context)
+    df_future['Klasyfikacja'] = scoring.classify_future(df_future)
+    return df_future
+
+
+def to_report(df_future, sort_col='Lending Opp (2026)'):
+    """Selects/renames report columns (Raport_Prognoza_2026_Sektory layout) and sorts descending."""
+    report = df_future.reindex(columns=REPORT_COLUMNS).rename(columns=REPORT_RENAME)
+    return report.sort_values(sort_col, ascending=False).reset_index(drop=True)
+
+
+@perf.timed("pipeline:score_history")
+def score_history(df_all, level, w_growth=4.0, w_profit=6.0, w_safety=3.0, sector=None, min_revenue=None,
+                  kill_switch_limit=scoring.DEFAULT_KILL_SWITCH, max_year=2024):
+    """
+    All real years of one level, filtered and rescored in ONE vectorized pass
+    (the same result as select_view + rescore for every year separately).
+
+    Returns:
+        pd.DataFrame: Rows of every year <= max_year with 'Status', 'Sector' and rescored S&T columns.
+    """
+    df = df_all[forecasting.real_rows_mask(df_all) & (df_all['Year'] <= max_year)].copy()
+    df = _filter_snapshot(df, df_all, level, sector, min_revenue, kill_switch_limit)
+    return rescore(df, w_growth, w_profit, w_safety)
+
+
+def future_transformation(df_history, target_year=RANKING_TARGET_YEAR):
+    """
+    Forecast Transformation Score of a single industry (Capex + ArXiv trends).
+
+    Returns:
+        float: Score 0-100, or NaN if the trends can't be estimated.
+    """
+    df_forecast = forecasting.forecast_batch(df_history, target_year, ['Capex_Intensity', 'Arxiv_Papers'], years_ahead=2)
+    if df_forecast.empty or df_forecast[['Capex_Intensity', 'Arxiv_Papers']].isna().any(axis=None):
+        return np.nan
+
+    comp = scoring.st_components(df_forecast)
+    return float(scoring.transformation_from_components(comp)[0])
+
+
+def build_report(df_all, year, level, w_growth=4.0, w_profit=6.0, w_safety=3.0, sector=None,
+                 min_revenue=None, kill_switch_limit=scoring.DEFAULT_KILL_SWITCH, df_forecast=None):
+    """
+    End-to-end Ranking report for one configuration (what the Ranking view shows and exports).
+
+    Returns:
+        pd.DataFrame: Report sorted by 'Lending Opp (2026)'.
+    """
+    df_view = select_view(df_all, year, level, sector, min_revenue, kill_switch_limit)
+    df_view = rescore(df_view, w_growth, w_profit, w_safety)
+    df_future = forecast_ranking(df_view, df_all, w_growth, w_profit, w_safety, df_forecast=df_forecast)
+    return to_report(df_future)
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# PKD hierarchy:
+#   L1 - Sections  (SEK_A, SEK_B ...)
+#   L2 - Divisions (01.   -> Length 3)
+#   L3 - Groups    (01.1  -> Length 4)
+#   L4 - Classes   (01.11 -> Length 5)
+LEVELS = ['L1', 'L2', 'L3', 'L4']
+
+# Section letter -> range of 2-digit divisions
+SECTION_RANGES = {
+    'A': (1, 3), 'B': (5, 9), 'C': (10, 33), 'D': (35, 35), 'E': (36, 39),
+    'F': (41, 43), 'G': (45, 47), 'H': (49, 53), 'I': (55, 56), 'J': (58, 63),
+    'K': (64, 66), 'L': (68, 68), 'M': (69, 75), 'N': (77, 82), 'O': (84, 84),
+    'P': (85, 85), 'Q': (86, 88), 'R': (90, 93), 'S': (94, 96)
+}
+
+
+def pkd_level(codes):
+    """
+    Maps PKD codes to their hierarchy level (vectorized).
+
+    Mirrors the level filters of the sidebar in main.py.
+
+    Args:
+        codes (pd.Series | list): PKD codes (e.g. 'SEK_C', '10.', '10.1', '10.11').
+
+    Returns:
+        pd.Series: 'L1'..'L4' for every code ('' if the code does not fit any level).
+    """
+    codes = pd.Series(codes).astype(str)
+    is_section = codes.str.startswith('SEK')
+    code_len = codes.str.len()
+
+    level = np.select(
+        [is_section, code_len == 3, code_len == 4, code_len == 5],
+        ['L1', 'L2', 'L3', 'L4'],
+        default=''
+    )
+    return pd.Series(level, index=codes.index)
+
+
+def find_children(df, parent_code, year):
+    """
+    Finds the direct children of a PKD code for the drill-down.
+
+    SEK_F (Section) -> 41., 42., 43. (Divisions)
+    01.  (3)        -> 01.x  (4)
+    01.1 (4)        -> 01.xx (5)
+
+    Args:
+        df (pd.DataFrame): Full dataset (all years).
+        parent_code (str): PKD code of the selected industry.
+        year (int): Year of the snapshot.
+
+    Returns:
+        pd.DataFrame: Child rows for the given year (empty if none).
+    """
+    parent_code = str(parent_code)
+    # Year first: the string tests then run on one year's codes only
+    df = df[df['Year'] == year]
+    codes = df['PKD_Code'].astype(str)
+
+    if parent_code.startswith('SEK_'):
+        # Section Logic
+        section_char = parent_code.split('_')[1]
+        if section_char not in SECTION_RANGES:
+            return df.iloc[0:0]
+
+        start, end = SECTION_RANGES[section_char]
+        prefix = pd.to_numeric(codes.str[:2], errors='coerce')
+        is_division = (codes.str.len() == 3) & (~codes.str.startswith('SEK'))
+        return df[is_division & (prefix >= start) & (prefix <= end)]
+
+    # Standard Logic
+    target_len = {3: 4, 4: 5}.get(len(parent_code))
+    if not target_len:
+        return df.iloc[0:0]
+
+    return df[codes.str.startswith(parent_code) & (codes.str.len() == target_len)]
+
+
+def filter_level(df, level):
+    """Returns the rows of the given PKD level ('L1'..'L4')."""
+    return df[pkd_level(df['PKD_Code']).values == level]
+
+
+def section_letter(codes):
+    """
+    Maps PKD codes to their parent Macro Section letter (e.g. 41.20 -> 'F', SEK_F -> 'F'), vectorized.
+    Codes outside the section ranges map to NaN.
+    """
+    codes = pd.Series(codes).astype(str)
+
+    # Lookup table: 2-digit division -> section letter
+    division_to_letter = np.full(100, None, dtype=object)
+    for letter, (start, end) in SECTION_RANGES.items():
+        division_to_letter[start:end + 1] = letter
+
+    divisions = pd.to_numeric(codes.str[:2], errors='coerce')
+    valid = divisions.notna().to_numpy() & divisions.between(0, 99).to_numpy()
+    letters = np.full(len(codes), None, dtype=object)
+    letters[valid] = division_to_letter[divisions[valid].astype(int).to_numpy()]
+
+    is_section = codes.str.startswith('SEK_').to_numpy()
+    letters[is_section] = codes[is_section].str.split('_').str[1].to_numpy()
+    return pd.Series(letters, index=codes.index)
+
+
+def section_names(df_all):
+    """Section letter -> display label ("F - BUDOWNICTWO") from the SEK_ rows of the full dataset."""
+    section_rows = df_all[df_all['PKD_Code'].astype(str).str.startswith('SEK_')]
+    section_rows = section_rows.drop_duplicates('PKD_Code', keep='last')
+    return {
+        str(code).split('_')[1]: f"{str(code).split('_')[1]} - {name}"
+        for code, name in zip(section_rows['PKD_Code'], section_rows['Industry_Name'])
+    }
+
+
+def sector_labels(codes, df_all):
+    """
+    Sector label for every PKD code (its parent Macro Section), used by the sidebar Sector filter.
+    Unknown sections fall back to "Sekcja X", codes outside any section to "Inne".
+    """
+    names = section_names(df_all)
+    codes = pd.Series(codes).astype(str)
+    letters = section_letter(codes)
+
+    labels = [
+        (names.get(letter, code if code.startswith('SEK_') else f"Sekcja {letter}") if pd.notna(letter) else "Inne")
+        for code, letter in zip(codes, letters)
+    ]
+    return pd.Series(labels, index=codes.index)
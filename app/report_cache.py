@@ -0,0 +1,173 @@
+"""
+Precomputed 2026 Ranking reports (columnar cache in data/results/report_cache).
+
+One parquet file holds the reports of every (Level, Year) combination for the default weights,
+keyed by the 'Level' / 'Year' / 'Weights' columns. manifest.json stores the input fingerprints
+(source CSV content + scoring parameters); a cache whose fingerprints don't match is ignored.
+
+Built by: python scripts/ranking_report.py --build-cache
+"""
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+import forecasting
+import pipeline
+import pkd
+import scoring
+
+CACHE_DIR = os.path.join(pipeline.BASE_PATH, 'data', 'results', 'report_cache')
+REPORTS_FILE = 'reports.parquet'
+MANIFEST_FILE = 'manifest.json'
+
+# Bump when the report logic changes in a way the parameters below don't capture
+CACHE_VERSION = 1
+
+KEY_COLUMNS = ['Level', 'Year', 'Weights']
+
+
+def weights_key(w_growth, w_profit, w_safety):
+    """(4.0, 6.0, 3.0) -> '4-6-3'"""
+    return f"{w_growth:g}-{w_profit:g}-{w_safety:g}"
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """SHA-256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def params_fingerprint():
+    """Hash of everything (besides the data) the cached reports depend on."""
+    params = {
+        'version': CACHE_VERSION,
+        'bounds': scoring.BOUNDS,
+        'transformation_weights': [scoring.W_CAPEX, scoring.W_INNOV],
+        'metrics': forecasting.METRICS_TO_FORECAST,
+        'training_start': forecasting.TRAINING_START_YEAR,
+        'target_year': pipeline.RANKING_TARGET_YEAR,
+        'report_columns': pipeline.REPORT_COLUMNS
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def report_years(df_all):
+    """Snapshot years covered by the cache: all real years up to 2024."""
+    real_years = df_all.loc[forecasting.real_rows_mask(df_all), 'Year']
+    return sorted(int(y) for y in real_years.unique() if y <= 2024)
+
+
+def sort_reports(report):
+    """Canonical row order: key columns, then Lending Opp descending, ties by PKD code."""
+    report = report.sort_values(
+        ['Level', 'Year', 'Weights', 'Lending Opp (2026)', 'PKD_Code'],
+        ascending=[True, True, True, False, True], kind='stable'
+    )
+    return report.reset_index(drop=True)
+
+
+def build_reports(df_all, years=None, weights=None, df_forecast=None):
+    """
+    Ranking reports for every (level, year) in one vectorized pass.
+
+    The 2026 forecast does not depend on the snapshot year, so it is fitted once for all PKD codes;
+    all snapshot rows of all years are then rescored / projected together.
+
+    Args:
+        df_all (pd.DataFrame): Full dataset (pipeline.read_processed_index).
+        years (list, optional): Snapshot years (default: all real years up to 2024).
+        weights (dict, optional): Stability weights (default: scoring.DEFAULT_WEIGHTS).
+        df_forecast (pd.DataFrame, optional): Precomputed pipeline.forecast_metrics(df_all)
+                                              (reused across weight presets).
+
+    Returns:
+        pd.DataFrame: Report columns (pipeline.REPORT_RENAME labels) + KEY_COLUMNS,
+                      in sort_reports() order.
+    """
+    weights = weights or scoring.DEFAULT_WEIGHTS
+    if years is None:
+        years = report_years(df_all)
+
+    df = df_all[df_all['Year'].isin(years)].copy()
+    df['Level'] = pkd.pkd_level(df['PKD_Code']).values
+    df = df[df['Level'] != '']
+
+    df = pipeline.rescore(df, **weights)
+    if df_forecast is None:
+        df_forecast = pipeline.forecast_metrics(df_all)
+    df_future = pipeline.forecast_ranking(df, df_all, df_forecast=df_forecast, **weights)
+
+    # forecast_ranking keeps the row order of its input
+    report = df_future.reindex(columns=pipeline.REPORT_COLUMNS).rename(columns=pipeline.REPORT_RENAME)
+    report['Level'] = df['Level'].values
+    report['Year'] = df['Year'].values.astype(int)
+    report['Weights'] = weights_key(**weights)
+
+    return sort_reports(report)
+
+
+def save(report, source_path, cache_dir=CACHE_DIR):
+    """Writes the reports + manifest (fingerprints and available keys)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    report.to_parquet(os.path.join(cache_dir, REPORTS_FILE), index=False)
+
+    keys = report[KEY_COLUMNS].drop_duplicates()
+    manifest = {
+        'data_fingerprint': file_fingerprint(source_path),
+        'params_fingerprint': params_fingerprint(),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'rows': int(len(report)),
+        'keys': keys.to_dict(orient='records')
+    }
+    with open(os.path.join(cache_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load(data_fingerprint, cache_dir=CACHE_DIR):
+    """
+    Loads the cached reports if they were built from the same inputs.
+
+    Args:
+        data_fingerprint (str): file_fingerprint() of the current processed_real_index.csv.
+
+    Returns:
+        pd.DataFrame or None: None if the cache is missing, stale or unreadable.
+    """
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('data_fingerprint') != data_fingerprint or manifest.get('params_fingerprint') != params_fingerprint():
+            return None
+        return pd.read_parquet(os.path.join(cache_dir, REPORTS_FILE))
+    except (OSError, ValueError, ImportError):
+        return None
+
+
+def lookup(reports, level, year, w_growth, w_profit, w_safety):
+    """
+    Cached report for one sidebar configuration.
+
+    Returns:
+        pd.DataFrame or None: Report in the pipeline.to_report layout, None if the key wasn't precomputed.
+    """
+    if reports is None:
+        return None
+    mask = (
+        (reports['Level'] == level) & (reports['Year'] == year)
+        & (reports['Weights'] == weights_key(w_growth, w_profit, w_safety))
+    )
+    if not mask.any():
+        return None
+    report_columns = [c for c in reports.columns if c not in KEY_COLUMNS]
+    return reports.loc[mask, report_columns].reset_index(drop=True)
@@ -0,0 +1,226 @@
+"""
+Macro What-If scenarios ("🌍 Scenariusz Makro" in the sidebar, ideas.md option 2).
+
+A scenario is a set of macro shocks applied to the metric columns as array operations;
+the shocked rows are then rescored with the vectorized S&T scorer (scoring.py).
+
+    rate_bp    - interest rate change in basis points: extra debt service on Debt_to_Revenue
+    energy_pct - energy price change in %: cost hit scaled by the per-PKD energy sensitivity
+    gdp_pct    - GDP growth change in p.p.: demand shift scaled by the per-PKD GDP elasticity
+
+evaluate_grid() scores a whole grid of scenarios in one pass (scenarios x industries).
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import pkd
+import scoring
+
+NEUTRAL_SCENARIO = {'rate_bp': 0.0, 'energy_pct': 0.0, 'gdp_pct': 0.0}
+
+# Columns an active scenario changes (shock_metrics + the rescored scores of apply_scenario)
+SHOCKED_COLUMNS = [
+    'Net_Profit_Margin', 'Profitability', 'Dynamics_YoY', 'Bankruptcy_Rate', 'Stability_Score', 'Transformation_Score'
+]
+
+# Share of revenue spent on energy by an industry with sensitivity 1.0
+ENERGY_COST_SHARE = 0.05
+
+# Energy sensitivity (0 = no energy cost, 1 = heavy industry), per section, with division overrides
+ENERGY_SENSITIVITY_SECTION = {
+    'A': 0.5, 'B': 0.8, 'C': 0.6, 'D': 0.5, 'E': 0.6, 'F': 0.4, 'G': 0.2, 'H': 0.7, 'I': 0.5,
+    'J': 0.1, 'K': 0.05, 'L': 0.2, 'M': 0.1, 'N': 0.2, 'O': 0.1, 'P': 0.15, 'Q': 0.2, 'R': 0.3, 'S': 0.2
+}
+ENERGY_SENSITIVITY_DIVISION = {
+    17: 0.8,   # Paper
+    19: 1.0,   # Coke & refined petroleum
+    20: 0.9,   # Chemicals
+    23: 1.0,   # Non-metallic minerals (cement, glass, ceramics)
+    24: 1.0,   # Basic metals
+    49: 0.8,   # Land transport
+    51: 1.0,   # Air transport
+    63: 0.3,   # Data processing / hosting
+}
+
+# GDP elasticity of revenue growth (1 = moves with GDP), per section, with division overrides
+GDP_ELASTICITY_SECTION = {
+    'A': 0.5, 'B': 1.0, 'C': 1.3, 'D': 0.5, 'E': 0.5, 'F': 1.8, 'G': 1.0, 'H': 1.2, 'I': 1.5,
+    'J': 0.9, 'K': 1.1, 'L': 1.3, 'M': 1.0, 'N': 1.2, 'O': 0.3, 'P': 0.3, 'Q': 0.3, 'R': 1.4, 'S': 0.8
+}
+GDP_ELASTICITY_DIVISION = {
+    29: 1.8,   # Motor vehicles
+    41: 2.0,   # Construction of buildings
+    79: 1.8,   # Travel agencies
+}
+
+# Second-round effects
+BANKRUPTCY_PER_100BP = 0.10       # +10% bankruptcy rate per +100bp at Debt_to_Revenue = 1
+BANKRUPTCY_PER_GDP_PP = -0.08     # -8% bankruptcy rate per +1 p.p. GDP (elasticity 1)
+MARGIN_PER_GDP_PP = 0.5           # operating leverage: +0.5 p.p. margin per +1 p.p. GDP (elasticity 1)
+PROFITABLE_SHARE_PER_MARGIN_PP = 0.01
+
+
+def sensitivity(codes, section_table, division_table, default=0.0):
+    """Per-PKD sensitivity: division override, else the value of its section (vectorized)."""
+    codes = pd.Series(codes).astype(str)
+    values = pkd.section_letter(codes).map(section_table).astype(float)
+
+    divisions = pd.to_numeric(codes.str[:2], errors='coerce')
+    divisions = divisions.where(~codes.str.startswith('SEK_').to_numpy())
+    override = divisions.map(division_table)
+    return override.fillna(values).fillna(default).to_numpy(dtype=float)
+
+
+def _col(df, col):
+    return df[col].to_numpy(dtype=float) if col in df.columns else np.zeros(len(df))
+
+
+def shock_metrics(df, rate_bp=0.0, energy_pct=0.0, gdp_pct=0.0):
+    """
+    Shocked metric arrays for every row.
+
+    Shock parameters may be scalars or column vectors of shape (n_scenarios, 1); the results
+    broadcast to (n_scenarios, n_rows).
+
+    Returns:
+        dict: Net_Profit_Margin, Profitability, Dynamics_YoY, Bankruptcy_Rate (arrays).
+    """
+    codes = df['PKD_Code']
+    energy_sens = sensitivity(codes, ENERGY_SENSITIVITY_SECTION, ENERGY_SENSITIVITY_DIVISION)
+    gdp_elast = sensitivity(codes, GDP_ELASTICITY_SECTION, GDP_ELASTICITY_DIVISION, default=1.0)
+
+    debt_to_rev = np.nan_to_num(_col(df, 'Debt_to_Revenue'))
+    rate = np.asarray(rate_bp, dtype=float)
+    energy = np.asarray(energy_pct, dtype=float)
+    gdp = np.asarray(gdp_pct, dtype=float)
+
+    # Margin (p.p.): debt service + energy costs + operating leverage on demand
+    margin_delta = (
+        - debt_to_rev * rate / 100
+        - energy_sens * ENERGY_COST_SHARE * energy
+        + gdp_elast * gdp * MARGIN_PER_GDP_PP
+    )
+
+    bankruptcy_factor = (
+        1 + BANKRUPTCY_PER_100BP * debt_to_rev * rate / 100
+        + BANKRUPTCY_PER_GDP_PP * gdp_elast * gdp
+    )
+
+    return {
+        'Net_Profit_Margin': _col(df, 'Net_Profit_Margin') + margin_delta,
+        'Profitability': np.clip(_col(df, 'Profitability') + margin_delta * PROFITABLE_SHARE_PER_MARGIN_PP, 0, 1),
+        'Dynamics_YoY': _col(df, 'Dynamics_YoY') + gdp_elast * gdp / 100,
+        'Bankruptcy_Rate': _col(df, 'Bankruptcy_Rate') * np.maximum(bankruptcy_factor, 0)
+    }
+
+
+def shock_frame(df, rate_bp=0.0, energy_pct=0.0, gdp_pct=0.0):
+    """Copy of df with the shock_metrics() columns replaced by their shocked values (no rescoring)."""
+    df = df.copy()
+    if not df.empty:
+        for col, values in shock_metrics(df, rate_bp, energy_pct, gdp_pct).items():
+            df[col] = values
+    return df
+
+
+def is_neutral(rate_bp=0.0, energy_pct=0.0, gdp_pct=0.0):
+    return rate_bp == 0 and energy_pct == 0 and gdp_pct == 0
+
+
+def apply_scenario(df, rate_bp=0.0, energy_pct=0.0, gdp_pct=0.0, w_growth=4.0, w_profit=6.0, w_safety=3.0,
+                   kill_switch_limit=scoring.DEFAULT_KILL_SWITCH):
+    """
+    Applies one scenario to a snapshot and rescores it.
+
+    The incoming Status may come from another basis than the rescored scores (main.py computes it
+    from the loader's scores), so it is only changed where the shock flips it: the unshocked and the
+    shocked Status are both computed from the rescored scores, and rows where they differ take the
+    shocked one. A neutral scenario therefore leaves every Status as it was.
+
+    Returns:
+        pd.DataFrame: Copy with shocked metrics, rescored Stability/Transformation and Status,
+                      plus 'Stability_Delta' (vs the unshocked score).
+    """
+    df = df.copy()
+    if df.empty:
+        return df
+
+    base = df.copy()
+    base['Stability_Score'], base['Transformation_Score'] = scoring.score_stability_transformation(df, w_growth, w_profit, w_safety)
+    base_status = scoring.recalc_status(base, kill_switch_limit)
+    df = shock_frame(df, rate_bp, energy_pct, gdp_pct)
+
+    df['Stability_Score'], df['Transformation_Score'] = scoring.score_stability_transformation(df, w_growth, w_profit, w_safety)
+    df['Stability_Delta'] = df['Stability_Score'] - base['Stability_Score']
+    shocked_status = scoring.recalc_status(df, kill_switch_limit)
+    if 'Status' in df.columns:
+        df['Status'] = np.where(shocked_status != base_status, shocked_status, df['Status'].astype(str))
+    else:
+        df['Status'] = shocked_status
+    return df
+
+
+def scenario_grid(rate_bp=(0,), energy_pct=(0,), gdp_pct=(0,)):
+    """Cartesian product of shock values -> DataFrame [rate_bp, energy_pct, gdp_pct]."""
+    return pd.DataFrame(list(itertools.product(rate_bp, energy_pct, gdp_pct)), columns=list(NEUTRAL_SCENARIO))
+
+
+def evaluate_grid(df, grid, w_growth=4.0, w_profit=6.0, w_safety=3.0, kill_switch_limit=scoring.DEFAULT_KILL_SWITCH):
+    """
+    Scores every industry under every scenario of the grid in one vectorized pass.
+
+    Args:
+        df (pd.DataFrame): Snapshot (one row per industry); its Status, if any, is kept where a
+            scenario doesn't flip it (see apply_scenario).
+        grid (pd.DataFrame): Scenarios (scenario_grid()).
+
+    Returns:
+        (pd.DataFrame, pd.DataFrame):
+            long  - one row per (scenario, industry): scenario params, PKD_Code, Stability_Score,
+                    Transformation_Score, Stability_Delta, Bankruptcy_Rate, Status
+            summary - one row per scenario: mean Stability, mean Delta, # CRITICAL, # OPPORTUNITY
+    """
+    n_scen, n_rows = len(grid), len(df)
+    params = {k: grid[k].to_numpy(dtype=float)[:, None] for k in NEUTRAL_SCENARIO}
+    shocked = shock_metrics(df, **params)
+
+    # Tile the snapshot (scenario-major) and overwrite the shocked columns -> one scoring call
+    long = pd.DataFrame({col: np.tile(_col(df, col), n_scen) for col in scoring.BOUNDS})
+    for col, values in shocked.items():
+        long[col] = np.broadcast_to(values, (n_scen, n_rows)).ravel()
+
+    stability, transformation = scoring.score_stability_transformation(long, w_growth, w_profit, w_safety)
+    base = df.copy()
+    base['Stability_Score'], base['Transformation_Score'] = scoring.score_stability_transformation(df, w_growth, w_profit, w_safety)
+    base_stability = base['Stability_Score'].to_numpy()
+
+    result = pd.DataFrame({
+        'Scenario': np.repeat(np.arange(n_scen), n_rows),
+        **{k: np.repeat(grid[k].to_numpy(), n_rows) for k in NEUTRAL_SCENARIO},
+        'PKD_Code': np.tile(df['PKD_Code'].to_numpy(), n_scen),
+        'Stability_Score': stability,
+        'Transformation_Score': transformation,
+        'Stability_Delta': stability - np.tile(base_stability, n_scen),
+        'Bankruptcy_Rate': long['Bankruptcy_Rate'].to_numpy()
+    })
+    # Same rule as apply_scenario: the incoming Status changes only where the shock flips it
+    shocked_status = scoring.recalc_status(result, kill_switch_limit)
+    if 'Status' in df.columns:
+        base_status = np.tile(scoring.recalc_status(base, kill_switch_limit), n_scen)
+        result['Status'] = np.where(shocked_status != base_status, shocked_status, np.tile(df['Status'].astype(str).to_numpy(), n_scen))
+    else:
+        result['Status'] = shocked_status
+
+    summary = pd.DataFrame({
+        'Scenario': result['Scenario'],
+        'Stability_Mean': result['Stability_Score'],
+        'Stability_Delta_Mean': result['Stability_Delta'],
+        'Critical': result['Status'] == 'CRITICAL',
+        'Opportunity': result['Status'] == 'OPPORTUNITY'
+    }).groupby('Scenario').agg({
+        'Stability_Mean': 'mean', 'Stability_Delta_Mean': 'mean', 'Critical': 'sum', 'Opportunity': 'sum'
+    })
+    summary = grid.reset_index(drop=True).join(summary)
+    return result, summary
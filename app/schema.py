@@ -0,0 +1,68 @@
+"""
+Declared schema of the processed index: memory-lean dtypes and per-view column projections.
+
+pd.read_csv infers float64 / str for every column, ~290 bytes per row. The app only needs:
+
+    float32   - every measure and score (7 significant digits; the KPIs are shown with 1-2 decimals,
+                and aggregates / trend fits upcast to float64 before summing)
+    int16     - Year
+    category  - the repeated labels (PKD_Code, Industry_Name, Status, Sector); codes sort like strings
+    bool      - Is_Forecast
+
+Counts stay float32 because forecast rows have no counts (NaN). Columns outside the schema
+(the loader's Norm_* intermediates) are not read at all; the rolling risk features (features.py)
+are computed after the read, also as float32. VIEW_COLUMNS lists what the narrow views
+read from the store (store.query(columns=...)).
+"""
+
+CATEGORY_COLUMNS = ['PKD_Code', 'Industry_Name', 'Status', 'Sector']
+
+FLOAT_COLUMNS = [
+    'Revenue', 'Entity_Count', 'Profitable_Ent', 'Net_Profit', 'Liabilities_Long', 'Liabilities_Short',
+    'Cash', 'Investment', 'Bankruptcy_Count', 'Arxiv_Papers', 'Total_Debt', 'Capex_Intensity',
+    'Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Risk_Per_1000', 'Profitability',
+    'Bankruptcy_Rate', 'Revenue_Prev_Year', 'Dynamics_YoY', 'Stability_Score', 'Transformation_Score',
+    'Lending_Score'
+]
+
+INDEX_SCHEMA = {
+    **{c: 'category' for c in CATEGORY_COLUMNS},
+    'Year': 'int16',
+    **{c: 'float32' for c in FLOAT_COLUMNS},
+    'Is_Forecast': 'bool',
+}
+
+# The matrix / Ranking views use every column
+VIEW_COLUMNS = {
+    # Drill-down children chart + the inline details of a clicked child (main.py)
+    'drill_children': [
+        'PKD_Code', 'Industry_Name', 'Status', 'Revenue', 'Stability_Score', 'Transformation_Score',
+        'Dynamics_YoY', 'Net_Profit_Margin', 'Bankruptcy_Rate'
+    ],
+    # Metrics row of one drill-down level (main.py)
+    'drill_row': [
+        'PKD_Code', 'Industry_Name', 'Revenue', 'Dynamics_YoY', 'Net_Profit_Margin', 'Debt_to_Revenue',
+        'Cash_Ratio', 'Bankruptcy_Rate', 'Bankruptcy_Count'
+    ],
+    # pipeline.future_transformation (Boardroom Opportunity Score)
+    'transformation_history': ['PKD_Code', 'Year', 'Is_Forecast', 'Capex_Intensity', 'Arxiv_Papers'],
+}
+
+
+def csv_dtypes(columns=None):
+    """read_csv dtype mapping of the declared columns (Year is cast after the read: it may hold NaN in broken files)."""
+    columns = INDEX_SCHEMA if columns is None else columns
+    return {c: INDEX_SCHEMA[c] for c in columns if c in INDEX_SCHEMA and c not in ('Year', 'Is_Forecast')}
+
+
+def apply_schema(df):
+    """Casts the declared columns present in df to their schema dtype (other columns are left as is)."""
+    casts = {c: dtype for c, dtype in INDEX_SCHEMA.items() if c in df.columns and df[c].dtype != dtype}
+    if 'Is_Forecast' in casts and df['Is_Forecast'].dtype == 'object':
+        df['Is_Forecast'] = df['Is_Forecast'].replace({'True': True, 'False': False})
+    return df.astype(casts) if casts else df
+
+
+def bytes_per_row(df):
+    """Deep memory footprint of a frame divided by its row count."""
+    return float(df.memory_usage(deep=True).sum()) / max(len(df), 1)
@@ -0,0 +1,177 @@
+import numpy as np
+
+# Default slider values (sidebar "Konfiguracja Modelu S&T")
+DEFAULT_WEIGHTS = {'w_growth': 4.0, 'w_profit': 6.0, 'w_safety': 3.0}
+DEFAULT_KILL_SWITCH = 4.5
+
+# Market Bounds Assumptions (Based on typical data ranges seen in dashboard)
+# These effectively act as "Standard" benchmarks for ABSOLUTE scoring
+BOUNDS = {
+    'Dynamics_YoY': (-0.10, 0.20),    # -10% to +20% (More sensitive to moderate growth)
+    'Net_Profit_Margin': (-5.0, 20.0), # -5% to 20% margin
+    'Profitability': (0.4, 1.0),       # 40% to 100% profitable entities (Relaxed floor)
+    'Cash_Ratio': (0.0, 1.2),          # 0 to 1.2 coverage (Relaxed max)
+    'Debt_to_Revenue': (0.0, 4.0),     # 0 to 4x leverage
+    'Bankruptcy_Rate': (0.0, 4.0),     # 0% to 4% failure rate
+    'Capex_Intensity': (0.0, 0.15),    # 0% to 15% revenue reinvested
+    'Arxiv_Papers': (0, 5000)          # 0 to 5000 papers (Increased for 2025+ context)
+}
+
+# Transformation weights are hardcoded 50/50 currently
+W_CAPEX = 50
+W_INNOV = 50
+
+
+def _column(df, col):
+    # Missing columns behave like row.get(col, 0)
+    if isinstance(df, dict):
+        # Plain arrays of any shape (e.g. simulated paths x industries)
+        return np.asarray(df[col], dtype=float) if col in df else 0.0
+    if col in df.columns:
+        return df[col].to_numpy(dtype=float)
+    return np.zeros(len(df))
+
+
+def norm(values, min_v, max_v):
+    """
+    Clamps/normalizes values against a fixed range to 0-1. NaN -> 0.5 (neutral).
+
+    min_v / max_v may also be arrays broadcasting against values (per-row bounds, see normalization.py);
+    an empty range (max_v == min_v) gives 0.5.
+    """
+    values = np.asarray(values, dtype=float)
+    min_v = np.asarray(min_v, dtype=float)
+    span = np.asarray(max_v, dtype=float) - min_v
+    if span.ndim == 0 and span == 0:
+        return np.full(values.shape, 0.5)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = np.clip((values - min_v) / span, 0, 1)
+    return np.where(np.isnan(values) | (span == 0), 0.5, scaled)
+
+
+def st_components(df, bounds=None):
+    """
+    Normalized (0-1) S&T components for every row, vectorized.
+
+    'df' may also be a dict of equally shaped arrays (e.g. Monte Carlo paths x industries).
+
+    Returns:
+        dict: growth, margin, prof_share, profitability, cash, debt, risk, safety, capex, arxiv
+              (numpy arrays; debt and risk are inverted, i.e. 1 = safe).
+    """
+    bounds = bounds or BOUNDS
+    comp = {}
+
+    # STABILITY COMPONENTS
+    # 1. Growth
+    comp['growth'] = norm(_column(df, 'Dynamics_YoY'), *bounds['Dynamics_YoY'])
+
+    # 2. Profitability (Margin + % Profitable)
+    comp['margin'] = norm(_column(df, 'Net_Profit_Margin'), *bounds['Net_Profit_Margin'])
+    comp['prof_share'] = norm(_column(df, 'Profitability'), *bounds['Profitability'])
+    comp['profitability'] = (comp['margin'] + comp['prof_share']) / 2
+
+    # 3. Safety (Cash + Debt + Risk). Debt and Risk: Low is good
+    comp['cash'] = norm(_column(df, 'Cash_Ratio'), *bounds['Cash_Ratio'])
+    comp['debt'] = 1 - norm(_column(df, 'Debt_to_Revenue'), *bounds['Debt_to_Revenue'])
+    comp['risk'] = 1 - norm(_column(df, 'Bankruptcy_Rate'), *bounds['Bankruptcy_Rate'])
+    comp['safety'] = (comp['cash'] + comp['debt'] + comp['risk']) / 3
+
+    # TRANSFORMATION COMPONENTS
+    comp['capex'] = norm(_column(df, 'Capex_Intensity'), *bounds['Capex_Intensity'])
+    comp['arxiv'] = norm(_column(df, 'Arxiv_Papers'), *bounds['Arxiv_Papers'])
+    return comp
+
+
+def stability_from_components(comp, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    total_w = w_growth + w_profit + w_safety
+    if total_w == 0: total_w = 1
+    return (w_growth * comp['growth'] + w_profit * comp['profitability'] + w_safety * comp['safety']) / total_w * 100
+
+
+def transformation_from_components(comp):
+    return (W_CAPEX * comp['capex'] + W_INNOV * comp['arxiv']) / (W_CAPEX + W_INNOV) * 100
+
+
+def score_stability_transformation(df, w_growth=4.0, w_profit=6.0, w_safety=3.0, bounds=None):
+    """
+    ABSOLUTE S&T scoring (fixed market bounds) of all rows in one vectorized pass.
+
+    Returns:
+        (np.ndarray, np.ndarray): Stability_Score, Transformation_Score (0-100).
+    """
+    comp = st_components(df, bounds)
+    return stability_from_components(comp, w_growth, w_profit, w_safety), transformation_from_components(comp)
+
+
+def recalc_status(df, kill_switch_limit=DEFAULT_KILL_SWITCH):
+    """
+    Status based on the Kill Switch and score thresholds (vectorized).
+
+    CRITICAL    - Bankruptcy_Rate above the Kill Switch limit
+    OPPORTUNITY - Stability > 60 and Transformation > 60
+    Neutral     - otherwise
+    """
+    return np.select(
+        [
+            _column(df, 'Bankruptcy_Rate') > kill_switch_limit,
+            (_column(df, 'Stability_Score') > 60) & (_column(df, 'Transformation_Score') > 60)
+        ],
+        ['CRITICAL', 'OPPORTUNITY'],
+        default='Neutral'
+    )
+
+
+def lending_opportunity(stability, transformation, cash_ratio, bankruptcy_rate, future_transformation=None):
+    """
+    Vectorized Lending Opportunity Score (0-100), same formula as utils.calculate_lending_opportunity.
+
+    - 40% Future Potential (Forecast Transformation Score, current one if missing)
+    - 40% Stability
+    - 20% Liquidity/Risk (Cash Ratio 0-1.5 -> 0-100, or inverse Bankruptcy Rate 0-5% if no Cash Ratio)
+    """
+    stability = np.asarray(stability, dtype=float)
+    transformation = np.asarray(transformation, dtype=float)
+    cash_ratio = np.asarray(cash_ratio, dtype=float)
+    bankruptcy_rate = np.asarray(bankruptcy_rate, dtype=float)
+
+    pot_score = transformation
+    if future_transformation is not None:
+        future_transformation = np.asarray(future_transformation, dtype=float)
+        pot_score = np.where(np.isnan(future_transformation), transformation, future_transformation)
+
+    liq_cash = np.minimum(cash_ratio / 1.5, 1.0) * 100
+    liq_fail = (5 - bankruptcy_rate) / 5
+    liq_fail = np.where(np.isnan(liq_fail), 0, np.maximum(0, liq_fail)) * 100
+    liq_score = np.where(np.isnan(cash_ratio), liq_fail, liq_cash)
+
+    return (0.4 * pot_score) + (0.4 * stability) + (0.2 * liq_score)
+
+
+def classify_future(df):
+    """
+    Ranking segments (2026 context), vectorized. Expects Bankruptcy_Rate, Transformation_2026,
+    Stability_2026 and Lending_Score_2026 columns.
+    """
+    risk = _column(df, 'Bankruptcy_Rate')
+    trans = _column(df, 'Transformation_2026')
+    stab = _column(df, 'Stability_2026')
+    lending = _column(df, 'Lending_Score_2026')
+
+    return np.select(
+        [
+            risk > 2.5,                     # 1. Critical Risk
+            (trans > 60) & (stab > 50),     # 2. AI Powerhouses
+            trans > 60,
+            stab > 65,                      # 3. Cash Cows
+            lending > 70                    # 4. Lending Targets
+        ],
+        [
+            "⚠️ Wysokie Ryzyko (2026)",
+            "🌟 Liderzy Przyszłości",
+            "🚀 Wschodzące Gwiazdy",
+            "🛡️ Bezpieczne Przystanie",
+            "💰 Cel Kredytowy"
+        ],
+        default="🔹 Neutralne"
+    )
@@ -0,0 +1,127 @@
+"""
+Sensitivity of the 2026 Lending ranking to the Stability weights (sidebar sliders).
+
+The weights only enter Stability = (w_g * growth + w_p * profitability + w_s * safety) / sum(w) * 100,
+and Lending = 0.4 * Potential + 0.4 * Stability + 0.2 * Liquidity is linear in it. So the whole weight
+grid is one matrix product: (n_weights x 3) @ (3 x n_industries), plus the weight-independent part.
+
+weight_sensitivity() returns every industry's score range and rank stability over the grid;
+attribution() splits one Lending score into the points contributed by each component.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import perf
+import scoring
+
+# Weight-independent parts of the Lending score (scoring.lending_opportunity)
+W_POTENTIAL = 0.4
+W_STABILITY = 0.4
+
+ATTRIBUTION_COLUMNS = [
+    'Contrib_Potential', 'Contrib_Liquidity',
+    'Contrib_Growth', 'Contrib_Profit', 'Contrib_Cash', 'Contrib_Debt', 'Contrib_Risk'
+]
+
+
+def weight_grid(step=1.0, max_weight=10.0):
+    """
+    Every slider combination (w_growth, w_profit, w_safety) on a regular grid, without (0, 0, 0).
+
+    Returns:
+        np.ndarray: (n_weights, 3)
+    """
+    values = np.arange(0.0, max_weight + step / 2, step)
+    grid = np.array(list(itertools.product(values, repeat=3)))
+    return grid[grid.sum(axis=1) > 0]
+
+
+def _base_and_components(df_future):
+    # Lending without its Stability part + the 3 Stability pillars (n_industries,);
+    # forecast_ranking always provides Cash_Ratio and Bankruptcy_Rate
+    comp = scoring.st_components(df_future)
+    transformation = scoring.transformation_from_components(comp)
+    base = scoring.lending_opportunity(
+        0.0, transformation, df_future['Cash_Ratio'].to_numpy(dtype=float), df_future['Bankruptcy_Rate'].to_numpy(dtype=float)
+    )
+    return comp, transformation, base
+
+
+def attribution(df_future, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    """
+    Points of the 2026 Lending score contributed by each component (they sum to the score).
+
+    Args:
+        df_future (pd.DataFrame): pipeline.forecast_ranking() result (forecasted metric columns).
+
+    Returns:
+        pd.DataFrame: ATTRIBUTION_COLUMNS, aligned with df_future rows.
+    """
+    comp, transformation, base = _base_and_components(df_future)
+    total_w = (w_growth + w_profit + w_safety) or 1
+    scale = W_STABILITY * 100 / total_w
+
+    return pd.DataFrame({
+        'Contrib_Potential': W_POTENTIAL * transformation,
+        'Contrib_Liquidity': base - W_POTENTIAL * transformation,
+        'Contrib_Growth': scale * w_growth * comp['growth'],
+        'Contrib_Profit': scale * w_profit * comp['profitability'],
+        'Contrib_Cash': scale * w_safety * comp['cash'] / 3,
+        'Contrib_Debt': scale * w_safety * comp['debt'] / 3,
+        'Contrib_Risk': scale * w_safety * comp['risk'] / 3
+    }, index=df_future.index)
+
+
+@perf.timed("sensitivity:weight_sensitivity")
+def weight_sensitivity(df_future, grid=None, w_growth=4.0, w_profit=6.0, w_safety=3.0, top_k=10):
+    """
+    Lending score range and rank stability of every industry over a weight grid, in one batched pass.
+
+    Args:
+        df_future (pd.DataFrame): pipeline.forecast_ranking() result.
+        grid (np.ndarray, optional): (n_weights, 3) weights; default weight_grid().
+        w_growth, w_profit, w_safety (float): Current sliders (reference rank + attribution).
+        top_k (int): Rank counted as "top" for Top_Share.
+
+    Returns:
+        pd.DataFrame: PKD_Code, Industry_Name, Lending_Score_2026, Rank, Lending_Min, Lending_Max,
+                      Rank_Best, Rank_Worst, Rank_Std, Top_Share + ATTRIBUTION_COLUMNS; sorted by Rank.
+    """
+    grid = weight_grid() if grid is None else np.asarray(grid, dtype=float)
+    comp, _, base = _base_and_components(df_future)
+    n = len(df_future)
+
+    # (n_weights, 3) @ (3, n_industries) -> Lending for every weight combination
+    pillars = np.vstack([comp['growth'], comp['profitability'], comp['safety']])
+    totals = grid.sum(axis=1, keepdims=True)
+    shares = grid / np.where(totals == 0, 1, totals)
+    lending = base[None] + W_STABILITY * 100 * (shares @ pillars)
+
+    # Rank 1 = best, per weight combination (ties keep the input order)
+    order = np.argsort(-lending, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, n + 1)[None], axis=1)
+
+    current = base + W_STABILITY * scoring.stability_from_components(comp, w_growth, w_profit, w_safety)
+    current_rank = np.empty(n, dtype=int)
+    current_rank[np.argsort(-current, kind='stable')] = np.arange(1, n + 1)
+
+    result = pd.DataFrame({
+        'PKD_Code': df_future['PKD_Code'].values,
+        'Industry_Name': df_future['Industry_Name'].values,
+        'Lending_Score_2026': current,
+        'Rank': current_rank,
+        'Lending_Min': lending.min(axis=0),
+        'Lending_Max': lending.max(axis=0),
+        'Rank_Best': ranks.min(axis=0),
+        'Rank_Worst': ranks.max(axis=0),
+        'Rank_Std': ranks.std(axis=0),
+        'Top_Share': (ranks <= top_k).mean(axis=0)
+    })
+    contrib = attribution(df_future, w_growth, w_profit, w_safety)
+    for col in ATTRIBUTION_COLUMNS:
+        result[col] = contrib[col].to_numpy()
+
+    return result.sort_values('Rank').reset_index(drop=True)
@@ -0,0 +1,142 @@
+"""
+Monte Carlo stress test of the 2026 Lending Opportunity ranking.
+
+The 2026 ranking (pipeline.forecast_ranking) is a point estimate from linear trends. Here every
+(industry, metric) forecast gets N bootstrap draws of its own in-sample trend residuals, inflated by
+the OLS prediction factor sqrt(1 + 1/n + (T - mean_year)^2 / Sxx) so parameter uncertainty grows
+with the distance from the training window. One uniform draw per (path, industry) picks the residual
+position for all metrics, which keeps the cross-metric correlation of the same year.
+
+All paths are scored in batched arrays (paths x industries) with the same S&T and Lending formulas
+as the ranking; chunks of paths can run in a process pool.
+"""
+import concurrent.futures
+
+import numpy as np
+import pandas as pd
+
+import forecasting
+import perf
+import pipeline
+import scoring
+
+DEFAULT_PATHS = 10_000
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Forecasted metrics that cannot be negative (Profitability is a share, 0-1)
+NON_NEGATIVE = ['Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate', 'Capex_Intensity', 'Arxiv_Papers', 'Revenue']
+
+
+def _simulate_chunk(n_paths, seed, base, noise_scale, residuals, n_obs, metrics, weights, kill_switch_limit):
+    """
+    Simulates one chunk of paths.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray, np.ndarray): Lending, Stability, Transformation
+        (float32, n_paths x n_industries) and the number of paths above the Kill Switch per industry.
+    """
+    rng = np.random.default_rng(seed)
+    n_ind, n_met, _ = residuals.shape
+
+    # One draw per (path, industry) -> residual position for every metric of that industry
+    u = rng.random((n_paths, n_ind, 1))
+    pos = np.minimum((u * n_obs[None]).astype(np.intp), np.maximum(n_obs[None] - 1, 0))
+    eps = residuals[np.arange(n_ind)[None, :, None], np.arange(n_met)[None, None, :], pos]
+    values = base[None] + noise_scale[None] * eps
+
+    paths = {}
+    for j, metric in enumerate(metrics):
+        col = values[:, :, j]
+        if metric in NON_NEGATIVE:
+            col = np.maximum(col, 0)
+        elif metric == 'Profitability':
+            col = np.clip(col, 0, 1)
+        paths[metric] = col
+
+    comp = scoring.st_components(paths)
+    stability = scoring.stability_from_components(comp, **weights)
+    transformation = scoring.transformation_from_components(comp)
+    lending = scoring.lending_opportunity(stability, transformation, paths['Cash_Ratio'], paths['Bankruptcy_Rate'])
+    kill_hits = (paths['Bankruptcy_Rate'] > kill_switch_limit).sum(axis=0)
+
+    return lending.astype(np.float32), stability.astype(np.float32), transformation.astype(np.float32), kill_hits
+
+
+@perf.timed("simulation:stress_test")
+def stress_test(df_view, df_all, n_paths=DEFAULT_PATHS, w_growth=4.0, w_profit=6.0, w_safety=3.0,
+                kill_switch_limit=scoring.DEFAULT_KILL_SWITCH, target_year=pipeline.RANKING_TARGET_YEAR,
+                seed=42, chunk_size=500, workers=1):
+    """
+    Monte Carlo bands of the 2026 scores for every industry of a (rescored) snapshot.
+
+    Args:
+        df_view (pd.DataFrame): Snapshot as used by the Ranking view (pipeline.select_view + rescore).
+        df_all (pd.DataFrame): Full history (trend fits + residuals).
+        n_paths (int): Number of simulated paths.
+        w_growth, w_profit, w_safety (float): Stability weights.
+        kill_switch_limit (float): Bankruptcy Rate (%) threshold for P(Kill Switch).
+        seed (int): Base seed; results do not depend on chunking or the number of workers.
+        chunk_size (int): Paths per batch (bounds memory: chunk x industries x metrics floats).
+        workers (int): Processes for the chunks (1 = in-process).
+
+    Returns:
+        pd.DataFrame: One row per industry: PKD_Code, Industry_Name, Lending_Score_2026 (point),
+                      Lending_P5..P95, Lending_Mean, Stability_P5/P50/P95, Transformation_P50,
+                      P_Kill_Switch; sorted by Lending_P50.
+    """
+    metrics = forecasting.METRICS_TO_FORECAST
+    weights = {'w_growth': w_growth, 'w_profit': w_profit, 'w_safety': w_safety}
+
+    codes = df_view['PKD_Code'].astype(str)
+    hist = df_all[df_all['PKD_Code'].astype(str).isin(codes)]
+
+    # Point estimate (same path as the Ranking view) + per-series trend residuals
+    fit = forecasting.fit_linear_trends(hist, metrics)
+    df_forecast = pipeline.forecast_metrics(hist, target_year=target_year)
+    df_future = pipeline.forecast_ranking(df_view, df_all, target_year=target_year, df_forecast=df_forecast, **weights)
+    residuals_all = forecasting.trend_residuals(hist, fit)
+
+    series = np.searchsorted(fit['PKD_Code'], codes.to_numpy())
+    series = np.clip(series, 0, max(len(fit['PKD_Code']) - 1, 0))
+    known = fit['PKD_Code'][series] == codes.to_numpy() if len(fit['PKD_Code']) else np.zeros(len(codes), bool)
+
+    base = df_future[metrics].to_numpy(dtype=float)
+    has_forecast = df_future[['PKD_Code']].merge(df_forecast, on='PKD_Code', how='left')[metrics].notna().to_numpy()
+
+    n_obs = np.where(known[:, None], fit['n_obs'][series], 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inflation = np.sqrt(1 + 1 / n_obs + (target_year - fit['mean_year'][series]) ** 2 / fit['sxx'][series])
+    # No noise where the ranking falls back to the current value (no trend forecast)
+    noise_scale = np.where(has_forecast & known[:, None] & np.isfinite(inflation), inflation, 0.0)
+    # Padding / unfittable series -> 0 (only positions < n_obs are ever drawn)
+    residuals = np.where(known[:, None, None], np.nan_to_num(residuals_all[series]), 0.0)
+
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(size, s, base, noise_scale, residuals, n_obs, metrics, weights, kill_switch_limit) for size, s in zip(sizes, seeds)]
+
+    if workers and workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+
+    lending = np.concatenate([c[0] for c in chunks])
+    stability = np.concatenate([c[1] for c in chunks])
+    transformation = np.concatenate([c[2] for c in chunks])
+    kill_hits = np.sum([c[3] for c in chunks], axis=0)
+
+    result = pd.DataFrame({
+        'PKD_Code': df_future['PKD_Code'].values,
+        'Industry_Name': df_future['Industry_Name'].values,
+        'Lending_Score_2026': df_future['Lending_Score_2026'].values
+    })
+    for p, values in zip(PERCENTILES, np.percentile(lending, PERCENTILES, axis=0)):
+        result[f'Lending_P{p}'] = values
+    result['Lending_Mean'] = lending.mean(axis=0)
+    for p, values in zip([5, 50, 95], np.percentile(stability, [5, 50, 95], axis=0)):
+        result[f'Stability_P{p}'] = values
+    result['Transformation_P50'] = np.percentile(transformation, 50, axis=0)
+    result['P_Kill_Switch'] = kill_hits / n_paths
+
+    return result.sort_values('Lending_P50', ascending=False).reset_index(drop=True)
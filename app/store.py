@@ -0,0 +1,153 @@
+"""
+Embedded analytical store: the processed index in an in-process SQLite database.
+
+The table carries precomputed filter columns and indexes for the predicates the views use, so a
+sidebar filter is one indexed query instead of chained pandas masks over the full frame:
+
+    Level   - 'L1'..'L4' (pkd.pkd_level)
+    Section - Macro Section letter ('' if none)
+    Sector  - sidebar Sector label (pkd.sector_labels)
+    Parent  - drill-down parent (41.20 -> 41.2 -> 41. -> SEK_F), see pkd.find_children
+    Row_Id  - index label in df_all (returned as the frame index, so row ids stay stable)
+
+DuckDB would be the columnar choice, but it is not a dependency; sqlite3 ships with Python.
+The store is built once per loaded dataset (utils.load_store) and shared by all sessions,
+so queries are serialized by a lock.
+"""
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import perf
+import pkd
+
+TABLE = 'pkd_index'
+INTERNAL_COLUMNS = ['Row_Id', 'Level', 'Section', 'Parent']
+
+INDEXES = {
+    'ix_year_level_sector_revenue': ['Year', 'Level', 'Sector', 'Revenue'],
+    'ix_code_year': ['PKD_Code', 'Year'],
+    'ix_parent_year': ['Parent', 'Year'],
+}
+
+
+def parent_codes(codes):
+    """Drill-down parent of every PKD code (vectorized); '' for Sections and unknown codes."""
+    codes = pd.Series(codes).astype(str)
+    levels = pkd.pkd_level(codes).to_numpy()
+    sections = pkd.section_letter(codes).fillna('').to_numpy()
+    return pd.Series(np.select(
+        [levels == 'L2', levels == 'L3', levels == 'L4'],
+        [np.where(sections != '', 'SEK_' + sections.astype(str), ''), codes.str[:3], codes.str[:4]],
+        default=''
+    ), index=codes.index)
+
+
+@perf.timed("store:build")
+def build_store(df_all):
+    """
+    Loads df_all into an in-memory SQLite database with the filter columns and indexes.
+
+    Returns:
+        dict: {'conn': sqlite3.Connection, 'lock': threading.Lock, 'columns': list (queryable columns),
+               'bool_columns': list, 'float_columns': list}
+    """
+    df = df_all.copy()
+    df.insert(0, 'Row_Id', df_all.index.to_numpy())
+    df['Level'] = pkd.pkd_level(df['PKD_Code']).values
+    df['Section'] = pkd.section_letter(df['PKD_Code']).fillna('').values
+    if 'Sector' not in df.columns:
+        df['Sector'] = pkd.sector_labels(df['PKD_Code'], df_all).values
+    df['Parent'] = parent_codes(df['PKD_Code']).values
+
+    bool_columns = [c for c in df.columns if df[c].dtype == bool]
+    float_columns = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    df.to_sql(TABLE, conn, index=False)
+    for name, columns in INDEXES.items():
+        conn.execute(f"CREATE INDEX {name} ON {TABLE} ({', '.join(columns)})")
+    conn.execute("ANALYZE")
+    return {
+        'conn': conn, 'lock': threading.Lock(), 'columns': [c for c in df.columns if c not in INTERNAL_COLUMNS],
+        'bool_columns': bool_columns, 'float_columns': float_columns
+    }
+
+
+def query(store, where, params=(), order_by='Row_Id', columns=None):
+    """
+    Rows matching a SQL predicate as a DataFrame indexed by the df_all row labels.
+    Results come back as float64 / str (not the schema.py dtypes: they are small, and re-applying
+    those would cost more per query than it saves). The frame is built column by column from the
+    fetched tuples with the dtypes recorded at build time, so bool columns stay bool and all-NULL
+    float columns are NaN, without a cast pass over the frame.
+
+    Args:
+        where (str): Predicate with '?' placeholders, e.g. "Year = ? AND Level = ?".
+        params (tuple): Placeholder values.
+        order_by (str): ORDER BY clause (default: df_all order).
+        columns (list, optional): Projection (e.g. schema.VIEW_COLUMNS[...]); default all columns
+            except INTERNAL_COLUMNS.
+    """
+    columns = [c for c in (store['columns'] if columns is None else columns) if c != 'Row_Id']
+    sql = f"SELECT {', '.join(['Row_Id'] + columns)} FROM {TABLE} WHERE {where} ORDER BY {order_by}"
+    with store['lock']:
+        rows = store['conn'].execute(sql, list(params)).fetchall()
+
+    values = list(zip(*rows)) if rows else [()] * (len(columns) + 1)
+    data = {}
+    for col, col_values in zip(columns, values[1:]):
+        if col in store['bool_columns']:
+            data[col] = np.array(col_values, dtype=bool)
+        elif col in store['float_columns']:
+            data[col] = np.array(col_values, dtype=float)  # NULL -> NaN
+        else:
+            data[col] = list(col_values) if rows else np.array([], dtype=object)
+    return pd.DataFrame(data, index=pd.Index(values[0], dtype='int64'), columns=columns)
+
+
+def snapshot(store, year, level, sector=None, min_revenue=None):
+    """One year / level, optionally one Sector label and a revenue floor (the sidebar filters)."""
+    where, params = "Year = ? AND Level = ?", [int(year), level]
+    if sector and sector != "Wszystkie":
+        where += " AND Sector = ?"
+        params.append(sector)
+    if min_revenue is not None:
+        where += " AND Revenue >= ?"
+        params.append(float(min_revenue))
+    return query(store, where, params)
+
+
+def sectors(store, year, level):
+    """Sorted distinct Sector labels of one year / level (sidebar options)."""
+    with store['lock']:
+        rows = store['conn'].execute(
+            f"SELECT DISTINCT Sector FROM {TABLE} WHERE Year = ? AND Level = ? AND Sector IS NOT NULL ORDER BY Sector",
+            (int(year), level)
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def revenue_range(store, year, level):
+    """(min, max) Revenue of one year / level, (None, None) if empty."""
+    with store['lock']:
+        return store['conn'].execute(
+            f"SELECT MIN(Revenue), MAX(Revenue) FROM {TABLE} WHERE Year = ? AND Level = ?", (int(year), level)
+        ).fetchone()
+
+
+def history(store, pkd_code, columns=None):
+    """All years of one PKD code, sorted by Year."""
+    return query(store, "PKD_Code = ?", [str(pkd_code)], order_by='Year', columns=columns)
+
+
+def row(store, pkd_code, year, columns=None):
+    """The row of one PKD code in one year (empty frame if missing)."""
+    return query(store, "PKD_Code = ? AND Year = ?", [str(pkd_code), int(year)], columns=columns)
+
+
+def children(store, parent_code, year, columns=None):
+    """Direct drill-down children of a PKD code in one year (same rows as pkd.find_children)."""
+    return query(store, "Parent = ? AND Year = ?", [str(parent_code), int(year)], columns=columns)
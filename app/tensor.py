@@ -0,0 +1,213 @@
+"""
+Dense PKD x Year x Metric tensor: the processed index as one float32 array.
+
+The long-format frame is re-grouped by PKD on almost every hot path (trend fits, YoY changes,
+per-year slices). Here the numeric columns are scattered ONCE into
+
+    values[code_id, year_id, metric_id]   float32, NaN where missing
+    mask                                  bool, value present
+    present / real                        bool (code_id, year_id): row exists / row is not a forecast
+
+with sorted lookup tables (codes, years, metrics) and the industry name per code. Accessors return
+zero-copy views of 'values'; frame() wraps one 2-D view in a DataFrame for display.
+
+Trend fits run along the year axis (fit_linear_trends / forecast) and match
+forecasting.fit_linear_trends / forecast_batch up to float32 rounding of the inputs.
+"""
+import numpy as np
+import pandas as pd
+
+import forecasting
+import perf
+
+# Not metrics: keys and labels of the long format
+KEY_COLUMNS = ['PKD_Code', 'Year']
+
+
+def numeric_metrics(df):
+    """Numeric (non-key, non-bool) columns of the long-format frame."""
+    return [
+        c for c in df.columns
+        if c not in KEY_COLUMNS and pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])
+    ]
+
+
+@perf.timed("tensor:build")
+def build_tensor(df, metrics=None):
+    """
+    Scatters a long-format index (one row per PKD and year) into the dense tensor.
+
+    Args:
+        df (pd.DataFrame): e.g. pipeline.read_processed_index(); (PKD_Code, Year) must be unique.
+        metrics (list, optional): Columns to store. Defaults to numeric_metrics(df).
+
+    Returns:
+        dict: codes (n_codes,), names (n_codes,), years (n_years,), metrics (list),
+              values float32 (n_codes, n_years, n_metrics), mask (same shape),
+              present / real bool (n_codes, n_years).
+    """
+    metrics = list(metrics or numeric_metrics(df))
+    codes, code_idx = np.unique(df['PKD_Code'].astype(str).to_numpy(dtype=str), return_inverse=True)
+    years, year_idx = np.unique(df['Year'].to_numpy(dtype=int), return_inverse=True)
+
+    values = np.full((len(codes), len(years), len(metrics)), np.nan, dtype=np.float32)
+    values[code_idx, year_idx] = df[metrics].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    present = np.zeros((len(codes), len(years)), dtype=bool)
+    present[code_idx, year_idx] = True
+    real = np.zeros_like(present)
+    real[code_idx, year_idx] = forecasting.real_rows_mask(df).to_numpy(dtype=bool)
+
+    names = np.full(len(codes), '', dtype=object)
+    if 'Industry_Name' in df.columns:
+        names[code_idx] = df['Industry_Name'].to_numpy(dtype=object)  # last row per code wins
+
+    return {
+        'codes': codes, 'names': names, 'years': years, 'metrics': metrics,
+        'values': values, 'mask': ~np.isnan(values), 'present': present, 'real': real
+    }
+
+
+# --- LOOKUPS ---
+
+def code_ids(t, codes):
+    """Row ids of PKD codes (vectorized); -1 for unknown codes."""
+    codes = np.asarray(codes, dtype=str)
+    if not len(t['codes']):
+        return np.full(len(codes), -1)
+    pos = np.searchsorted(t['codes'], codes).clip(0, len(t['codes']) - 1)
+    return np.where(t['codes'][pos] == codes, pos, -1)
+
+
+def year_id(t, year):
+    """Position of a year on the year axis (KeyError if the year isn't in the tensor)."""
+    pos = int(np.searchsorted(t['years'], year))
+    if pos >= len(t['years']) or t['years'][pos] != year:
+        raise KeyError(year)
+    return pos
+
+
+def metric_id(t, metric):
+    return t['metrics'].index(metric)
+
+
+# --- ZERO-COPY VIEWS ---
+
+def metric_view(t, metric):
+    """(n_codes, n_years) view of one metric."""
+    return t['values'][:, :, metric_id(t, metric)]
+
+
+def snapshot_view(t, year):
+    """(n_codes, n_metrics) view of one year."""
+    return t['values'][:, year_id(t, year), :]
+
+
+def series_view(t, code):
+    """(n_years, n_metrics) view of one PKD code (KeyError if unknown)."""
+    i = code_ids(t, [code])[0]
+    if i < 0:
+        raise KeyError(code)
+    return t['values'][i]
+
+
+def frame(t, year=None, code=None):
+    """
+    Display DataFrame over a 2-D view without copying: one year (index PKD_Code) or one code (index Year).
+    Rows / years without data are NaN rows; filter on t['present'] if needed.
+    """
+    if (year is None) == (code is None):
+        raise ValueError("Pass exactly one of 'year' or 'code'.")
+    if year is not None:
+        return pd.DataFrame(snapshot_view(t, year), index=pd.Index(t['codes'], name='PKD_Code'), columns=t['metrics'], copy=False)
+    return pd.DataFrame(series_view(t, code), index=pd.Index(t['years'], name='Year'), columns=t['metrics'], copy=False)
+
+
+def yoy_change(t, metric):
+    """
+    Year-over-year relative change of a metric, (n_codes, n_years): value / previous calendar year - 1,
+    NaN in the first year and where either year is missing or the previous value is 0.
+    """
+    v = metric_view(t, metric).astype(float)
+    change = np.full(v.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change[:, 1:] = np.where(v[:, :-1] != 0, v[:, 1:] / v[:, :-1] - 1, np.nan)
+    return change
+
+
+# --- TRENDS ALONG THE YEAR AXIS ---
+
+@perf.timed("tensor:fit_linear_trends")
+def fit_linear_trends(t, metrics=None, start_years=None):
+    """
+    Linear OLS trend per (PKD, metric) over the real years, in the forecasting.fit_linear_trends layout.
+
+    Codes without any real row are left out (as in the long-format fit); metrics not in the tensor
+    get NaN trends.
+    """
+    metrics = list(metrics or forecasting.METRICS_TO_FORECAST)
+    start_years = forecasting.TRAINING_START_YEAR if start_years is None else start_years
+
+    keep = t['real'].any(axis=1)
+    real = t['real'][keep]
+    x = t['years'].astype(float)
+    n_series, n_metrics = int(keep.sum()), len(metrics)
+
+    slope = np.full((n_series, n_metrics), np.nan)
+    intercept = np.full((n_series, n_metrics), np.nan)
+    n_obs = np.zeros((n_series, n_metrics), dtype=int)
+    last_year = np.full((n_series, n_metrics), np.nan)
+    mean_year = np.full((n_series, n_metrics), np.nan)
+    sxx_all = np.full((n_series, n_metrics), np.nan)
+
+    for j, metric in enumerate(metrics):
+        rows = real & (x >= start_years.get(metric, -np.inf))
+
+        # Forecast anchor = LAST REAL YEAR in the training window (not the last valid value)
+        anchor = np.where(rows, x, -np.inf).max(axis=1) if len(x) else np.full(n_series, -np.inf)
+        last_year[:, j] = np.where(np.isinf(anchor), np.nan, anchor)
+
+        if metric not in t['metrics']:
+            continue
+
+        y = metric_view(t, metric)[keep].astype(float)
+        valid = rows & ~np.isnan(y)
+        n = valid.sum(axis=1).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_x = (valid * x).sum(axis=1) / n
+            mean_y = np.where(valid, y, 0.0).sum(axis=1) / n
+            dx = np.where(valid, x - mean_x[:, None], 0.0)
+            sxx = (dx * dx).sum(axis=1)
+            sxy = (dx * np.where(valid, y - mean_y[:, None], 0.0)).sum(axis=1)
+            b = sxy / sxx
+            a = mean_y - b * mean_x
+
+        fittable = (n >= 2) & (sxx > 0)
+        slope[:, j] = np.where(fittable, b, np.nan)
+        intercept[:, j] = np.where(fittable, a, np.nan)
+        n_obs[:, j] = n.astype(int)
+        mean_year[:, j] = np.where(n > 0, mean_x, np.nan)
+        sxx_all[:, j] = np.where(n > 0, sxx, 0.0)
+
+    return {
+        'PKD_Code': t['codes'][keep],
+        'metrics': metrics,
+        'slope': slope,
+        'intercept': intercept,
+        'n_obs': n_obs,
+        'last_year': last_year,
+        'mean_year': mean_year,
+        'sxx': sxx_all
+    }
+
+
+def forecast(t, target_year, metrics=None, years_ahead=2, start_years=None):
+    """Tensor version of forecasting.forecast_batch: one row per PKD_Code with the forecasted metrics."""
+    fit = fit_linear_trends(t, metrics, start_years)
+
+    in_horizon = (target_year > fit['last_year']) & (target_year <= fit['last_year'] + years_ahead)
+    values = np.where(in_horizon, fit['slope'] * target_year + fit['intercept'], np.nan)
+
+    df_forecast = pd.DataFrame(values, columns=fit['metrics'])
+    df_forecast.insert(0, 'PKD_Code', fit['PKD_Code'])
+    return df_forecast
@@ -2,31 +2,130 @@ import streamlit as st
 import pandas as pd
 import os
 import json
+import functools
+import correlation # Local import
+import cube # Local import
+import datasets # Local import
+import forecasting # Local import
+import normalization # Local import
+import peers # Local import
+import perf # Local import
+import pipeline # Local import
+import pkd # Local import
+import report_cache # Local import
+import scoring # Local import
+import store # Local import
+import tensor # Local import
+import warmup # Local import
 
 def load_css(file_name):
     with open(file_name) as f:
         st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    # Adjust path to find data relative to this file
-    # this file is in app/utils.py, so data is in ../data
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_path = os.path.join(base_path, 'data')
-    processed_path = os.path.join(data_path, 'processed_real_index.csv')
-    df = pd.read_csv(processed_path)
-    
-    # Filter out "Dead Entities" / Outliers
-    # Rows where both Revenue and Total_Debt are 0 (likely dormant or data errors)
-    # This prevents crowding at (0,0) on charts.
-    df = df[~((df['Revenue'] == 0) & (df['Total_Debt'] == 0))]
-    
-    return df
+# --- DATASET VERSION (hot reload, see datasets.py) ---
+# Every data cache below takes the version token as its first argument: a new version of the files
+# gets new cache entries, while sessions still running on the old token keep hitting the old ones
+# (max_entries=2 keeps the old and the new version of the dataset-wide caches).
+DATA_ARTIFACTS = [
+    pipeline.DEFAULT_INDEX_PATH,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'ai_debates.json')
+]
+
+@st.cache_resource
+def start_dataset_watch():
+    """Dataset version manager watching DATA_ARTIFACTS (one per process)."""
+    return datasets.watch(DATA_ARTIFACTS, prepare=_prepare_version)
+
+def _prepare_version(version):
+    # Runs in the watcher thread before the token swap: the first rerun on the new version finds the data loaded
+    load_data(version)
+    load_store(version)
+    load_debates(version)
+
+def dataset_version():
+    """Current dataset version token. Read it ONCE per script run and pass it to the loaders."""
+    return datasets.current(start_dataset_watch())
+
+@st.cache_data(max_entries=2)
+def load_data(version):
+    """Processed index (data/processed_real_index.csv); 'version' only keys the cache."""
+    return pipeline.read_processed_index(pipeline.DEFAULT_INDEX_PATH)
+
+@st.cache_resource(max_entries=2)
+def load_store(version):
+    """Embedded SQLite store of the processed index (store.py), one per process and dataset version (shared connection)."""
+    return store.build_store(load_data(version))
+
+@st.cache_data(max_entries=2)
+def load_cube(version):
+    """KPI roll-up cube (year x level x sector, see cube.py), built once per dataset version."""
+    return cube.build_cube(load_data(version))
+
+@st.cache_data(max_entries=2)
+def load_norm_bounds(version):
+    """Robust normalization bounds per (Year, Level, Metric), computed once per dataset version (normalization.py)."""
+    return normalization.compute_bounds(load_data(version))
+
+@st.cache_resource(max_entries=2)
+def load_tensor(version):
+    """Dense PKD x Year x Metric float32 tensor of the dataset (tensor.py), shared read-only by all sessions."""
+    return tensor.build_tensor(load_data(version))
+
+@st.cache_data(max_entries=2)
+def load_forecast(version):
+    """2026 trend forecast of every PKD code (the pipeline.forecast_ranking input), fitted on the tensor."""
+    return tensor.forecast(load_tensor(version), pipeline.RANKING_TARGET_YEAR, forecasting.METRICS_TO_FORECAST, years_ahead=2)
+
+@st.cache_resource(max_entries=8)
+def load_correlations(version, level):
+    """Top-k correlated peers of every PKD code of one level (correlation.py), once per dataset version and level."""
+    return correlation.build_correlations(load_tensor(version), level)
+
+@st.cache_data(max_entries=16)
+def load_peer_percentiles(version, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    """
+    Peer percentiles of every (Year, PKD) (peers.py), computed once per dataset version and Stability weights:
+    the scores are rescored with the sidebar weights so they match the Boardroom values.
+    """
+    return peers.compute_percentiles(pipeline.rescore(load_data(version), w_growth, w_profit, w_safety))
+
+@st.cache_data(max_entries=2)
+def load_report_cache(version):
+    """
+    Precomputed Ranking reports (see report_cache.py), or None if missing / built from other inputs.
+    A new dataset version re-validates the fingerprints.
+    """
+    return report_cache.load(report_cache.file_fingerprint(pipeline.DEFAULT_INDEX_PATH))
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_default_reports(version):
+    """
+    Ranking reports of every level / year for the default Stability weights (report_cache.build_reports),
+    computed once per dataset version: the in-memory fallback when the on-disk report cache is missing.
+    """
+    return report_cache.build_reports(load_data(version))
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def start_warmup(version):
+    """
+    Starts the background cache warm-up once per process and dataset version (warmup.py) and returns
+    its progress dict. Every step is one of the cached loaders above, so a session asking for it
+    meanwhile waits for the same computation instead of repeating it.
+    """
+    return warmup.start([
+        ("Dane (CSV)", functools.partial(load_data, version)),
+        ("Indeks PKD (SQLite)", functools.partial(load_store, version)),
+        ("Kostka KPI", functools.partial(load_cube, version)),
+        ("Tensor + prognoza 2026", functools.partial(load_forecast, version)),
+        ("Normalizacja (kwantyle)", functools.partial(load_norm_bounds, version)),
+        ("Percentyle konkurentów", functools.partial(load_peer_percentiles, version)),
+        *[(f"Korelacje branż {level}", functools.partial(load_correlations, version, level)) for level in pkd.LEVELS],
+        ("Ranking 2026 (domyślne wagi)", functools.partial(load_default_reports, version)),
+    ])
 
-def load_debates():
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    assets_path = os.path.join(base_path, 'app', 'assets')
-    json_path = os.path.join(assets_path, 'ai_debates.json')
+@st.cache_data(max_entries=2)
+def load_debates(version):
+    json_path = DATA_ARTIFACTS[1]
     try:
         with open(json_path, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -58,6 +157,7 @@ def color_val(val, inverse=False, is_percent=False):
 
 import numpy as np
 
+@perf.timed("utils:calculate_forecast")
 def calculate_forecast(df_history, target_col, years_ahead=2):
     """
     Calculates linear forecast for the next 'years_ahead' years using OLS regression.
@@ -128,6 +228,7 @@ def calculate_forecast(df_history, target_col, years_ahead=2):
     # We discard old forecasts from the input to avoid duplication/confusion
     return pd.concat([real_df, new_forecast_df], ignore_index=True)
 
+@perf.timed("utils:recalculate_future_st_scores")
 def recalculate_future_st_scores(df_full, w_growth=4.0, w_profit=6.0, w_safety=3.0):
     """
     Recalculates Stability and Transformation scores for Forecast years.
@@ -150,91 +251,66 @@ def recalculate_future_st_scores(df_full, w_growth=4.0, w_profit=6.0, w_safety=3
     # Identify Real vs Forecast
     if 'Is_Forecast' not in df.columns: return df
     
-    # We use ABSOLUTE SCORING RULES for Forecasts to be safe and consistent.
-    
-    # Define Weights (Passed as arguments)
-    # Default values match default slider values
-
-    
-    # Transformation
-    w_capex = 50
-    w_innov = 50
-    
-    # Helper to clamp/normalize single value against a fixed range (approximate market bounds)
-    def norm(val, min_v, max_v):
-        if pd.isna(val): return 0.5
-        if max_v == min_v: return 0.5
-        return np.clip((val - min_v) / (max_v - min_v), 0, 1)
-
-    # Market Bounds Assumptions (Based on typical data ranges seen in dashboard)
-    # These effectively act as "Standard" benchmarks
-    bounds = {
-        'Dynamics_YoY': (-0.10, 0.20),    # -10% to +20% (More sensitive to moderate growth)
-        'Net_Profit_Margin': (-5.0, 20.0), # -5% to 20% margin
-        'Profitability': (0.4, 1.0),       # 40% to 100% profitable entities (Relaxed floor)
-        'Cash_Ratio': (0.0, 1.2),          # 0 to 1.2 coverage (Relaxed max)
-        'Debt_to_Revenue': (0.0, 4.0),     # 0 to 4x leverage
-        'Bankruptcy_Rate': (0.0, 4.0),     # 0% to 4% failure rate
-        'Capex_Intensity': (0.0, 0.15),    # 0% to 15% revenue reinvested
-        'Arxiv_Papers': (0, 5000)          # 0 to 5000 papers (Increased for 2025+ context)
-    }
-    
-    # Apply calculation row by row
-    def calculate_row_score(row):
-        # STABILITY COMPONENTS
-        # 1. Growth
-        n_growth = norm(row.get('Dynamics_YoY', 0), *bounds['Dynamics_YoY'])
-        
-        # 2. Profitability
-        n_margin = norm(row.get('Net_Profit_Margin', 0), *bounds['Net_Profit_Margin'])
-        # If Profitability % is missing (often hard to forecast), assume high if margin is high
-        n_prof_share = norm(row.get('Profitability', 0), *bounds['Profitability']) 
-        n_profitability = (n_margin + n_prof_share) / 2
-        
-        # 3. Safety
-        n_cash = norm(row.get('Cash_Ratio', 0), *bounds['Cash_Ratio'])
-        
-        # Debt (Low is good)
-        val_debt = row.get('Debt_to_Revenue', 0)
-        n_debt = 1 - norm(val_debt, *bounds['Debt_to_Revenue'])
-        
-        # Risk (Low is good)
-        val_risk = row.get('Bankruptcy_Rate', 0)
-        n_risk = 1 - norm(val_risk, *bounds['Bankruptcy_Rate'])
-        
-        n_safety = (n_cash + n_debt + n_risk) / 3
-        
-        n_safety = (n_cash + n_debt + n_risk) / 3
-        
-        total_w = w_growth + w_profit + w_safety
-        if total_w == 0: total_w = 1
-        
-        stab_score = (w_growth * n_growth + w_profit * n_profitability + w_safety * n_safety) / total_w * 100
-        
-        # TRANSFORMATION COMPONENTS
-        n_capex = norm(row.get('Capex_Intensity', 0), *bounds['Capex_Intensity'])
-        n_arxiv = norm(row.get('Arxiv_Papers', 0), *bounds['Arxiv_Papers'])
-        
-        # Weights are hardcoded 50/50 currently
-        w_capex = 50
-        w_innov = 50
-        trans_score = (w_capex * n_capex + w_innov * n_arxiv) / (w_capex + w_innov) * 100
-        
-        return pd.Series([stab_score, trans_score])
-
-    # Apply only to forecast rows to verify feasibility, but practically we want trend line
-    # so we might recalculate ALL rows to keep trend consistent?
-    # NO, main.py uses dynamic relative scoring for history.
+    # We use ABSOLUTE SCORING RULES (scoring.BOUNDS) for Forecasts to be safe and consistent.
+    # NOTE: main.py used dynamic relative scoring for history.
     # Mixing relative (history) and absolute (forecast) might cause a "jump".
     # FIX: Recalculate ALL rows in this specific DF using these Absolute Bounds
     # This ensures the trend line is smooth and comparable self-consistently.
-    
-    scores = df.apply(calculate_row_score, axis=1)
-    df['Stability_Score'] = scores[0]
-    df['Transformation_Score'] = scores[1]
+    # Vectorized over all rows (see scoring.py).
+    stability, transformation = scoring.score_stability_transformation(df, w_growth, w_profit, w_safety)
+    df['Stability_Score'] = stability
+    df['Transformation_Score'] = transformation
     
     return df
 
+# Metrics forecast for the drill-down history charts (first one sets up the forecast rows)
+DRILL_FORECAST_METRICS = [
+    'Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate',
+    'Dynamics_YoY', 'Profitability', 'Capex_Intensity', 'Arxiv_Papers'
+]
+
+@st.cache_data(max_entries=256)
+def load_drill_forecast(version, pkd_code, w_growth=4.0, w_profit=6.0, w_safety=3.0):
+    """
+    History + 2-year forecast (2025-2026) of one PKD code with S&T scores recalculated for the
+    given weights: the input of one drill-down level (main.py), cached per PKD and weights so a
+    drill fragment rerun only pays for the levels it hasn't shown yet.
+
+    Returns:
+        pd.DataFrame: calculate_forecast frame ('Is_Forecast' flag), empty if the code has no history.
+    """
+    hist_df = store.history(load_store(version), pkd_code)
+    if hist_df.empty:
+        return hist_df
+
+    # Ensure derived columns exist
+    if 'Debt_to_Revenue' not in hist_df.columns:
+        hist_df['Debt_to_Revenue'] = hist_df['Total_Debt'] / hist_df['Revenue']
+
+    # Initialize df_final with the first metric to set up the skeleton (rows)
+    df_final = calculate_forecast(hist_df, DRILL_FORECAST_METRICS[0], years_ahead=2)
+
+    # Loop through the rest and fill in
+    for metric in DRILL_FORECAST_METRICS[1:]:
+        # We forecast based on the HISTORY PART only
+        df_hist_only = df_final[df_final['Is_Forecast'] == False].copy()
+
+        # Special handling for Arxiv: AI Hype is recent (2019+)
+        # If we train on 2005-2024 (mostly zeros), the trendline will be flattened.
+        # Train only on recent years to capture the "Hype".
+        if metric == 'Arxiv_Papers':
+            df_hist_only = df_hist_only[df_hist_only['Year'] >= 2019]
+
+        df_temp = calculate_forecast(df_hist_only, metric, years_ahead=2)
+
+        # Assign the forecast values to our master DF by Year
+        for _, row in df_temp[df_temp['Is_Forecast'] == True].iterrows():
+            mask = (df_final['Year'] == row['Year']) & (df_final['Is_Forecast'] == True)
+            df_final.loc[mask, metric] = row[metric]
+
+    # Recalculate S&T Scores based on forecasted metrics (weights from the sidebar sliders)
+    return recalculate_future_st_scores(df_final, w_growth=w_growth, w_profit=w_profit, w_safety=w_safety)
+
 def calculate_lending_opportunity(current_row, future_trans_score, current_liquidity=None):
     """
     Calculates Lending Opportunity Score (0-100).
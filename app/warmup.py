@@ -0,0 +1,53 @@
+"""
+Background cache warm-up after app startup.
+
+The first session after a deploy would otherwise pay for CSV parsing, the store / cube / bounds
+builds and the first Ranking forecast. start() runs a list of cache-filling steps in a daemon
+thread and returns a progress dict that the UI reads (the thread only updates it in place), so the
+first render never waits for steps it doesn't need. Started once per process and dataset version
+by utils.start_warmup.
+
+A failing step is recorded in 'errors' and skipped: the view that needs it computes it on demand.
+"""
+import threading
+import time
+
+
+def start(steps, name="cache-warmup"):
+    """
+    Runs steps in a background thread.
+
+    Args:
+        steps (list): [(label, callable)] in execution order (callables take no arguments).
+
+    Returns:
+        dict: Progress, updated in place: total, done, current (label or None), finished,
+              elapsed_s, timings {label: seconds}, errors {label: message}.
+    """
+    state = {
+        'total': len(steps), 'done': 0, 'current': None, 'finished': False,
+        'elapsed_s': 0.0, 'timings': {}, 'errors': {}
+    }
+    threading.Thread(target=_run, args=(steps, state), name=name, daemon=True).start()
+    return state
+
+
+def _run(steps, state):
+    run_start = time.perf_counter()
+    for label, func in steps:
+        state['current'] = label
+        step_start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            state['errors'][label] = str(e)
+        state['timings'][label] = time.perf_counter() - step_start
+        state['done'] += 1
+        state['elapsed_s'] = time.perf_counter() - run_start
+    state['current'] = None
+    state['finished'] = True
+
+
+def progress(state):
+    """Fraction of steps done (0-1)."""
+    return state['done'] / state['total'] if state['total'] else 1.0
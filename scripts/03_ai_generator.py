@@ -3,26 +3,34 @@ import os
 import pandas as pd
 import random
 import time
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-import requests
 
 # Configure API
-API_KEY = os.getenv("GEMINI_API_KEY")
+# Backends are imported on first use: in Ollama mode google.generativeai and python-dotenv are never loaded.
 USE_OLLAMA = True # Force Ollama for now as per user request
 OLLAMA_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "gemma2"
 
-if API_KEY and not USE_OLLAMA:
-    genai.configure(api_key=API_KEY)
-else:
-    print("Using Local LLM (Ollama).")
+_gemini = {}
+
+def get_gemini_api_key():
+    """GEMINI_API_KEY from the environment / .env (python-dotenv is loaded on the first call)."""
+    if 'api_key' not in _gemini:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _gemini['api_key'] = os.getenv("GEMINI_API_KEY")
+    return _gemini['api_key']
+
+def get_genai():
+    """google.generativeai, imported and configured on the first Gemini call."""
+    if 'genai' not in _gemini:
+        import google.generativeai as genai
+        genai.configure(api_key=get_gemini_api_key())
+        _gemini['genai'] = genai
+    return _gemini['genai']
 
 def get_ollama_response(prompt):
+    import requests # Ollama backend (HTTP), imported on first use
+    
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
@@ -45,10 +53,10 @@ def get_gemini_response(prompt):
     """
     Sends a prompt to Gemini and acts as a wrapper for safety/errors.
     """
-    if not API_KEY:
+    if not get_gemini_api_key():
         return None
     
-    model = genai.GenerativeModel('models/gemini-2.0-flash-lite')
+    model = get_genai().GenerativeModel('models/gemini-2.0-flash-lite')
     response = model.generate_content(prompt)
     return response.text
 
@@ -161,6 +169,9 @@ def generate_debate_content(industry_name, status, metrics):
     }
 
 def generate_debates():
+    if USE_OLLAMA or not get_gemini_api_key():
+        print("Using Local LLM (Ollama).")
+    
     base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_path = os.path.join(base_path, 'data')
     assets_path = os.path.join(base_path, 'app', 'assets')
@@ -260,7 +271,7 @@ def generate_debates():
                     break
         
         # Simple rate limiting for free tier
-        if not USE_OLLAMA and API_KEY:
+        if not USE_OLLAMA and get_gemini_api_key():
             time.sleep(15.0) # Increased base sleep to be safe
         
         # Save Incrementally
@@ -1,7 +1,12 @@
 import pandas as pd
 import os
+import sys
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+import normalization  # noqa: E402
+import schema  # noqa: E402
+
 def clean_currency_string(x):
     """Cleans strings like '1 679 774,30' to float."""
     if pd.isna(x) or x == 'bd':
@@ -261,51 +266,47 @@ def load_and_process_real_data():
     df_merged['Arxiv_Papers'] = df_merged.apply(lambda x: get_arxiv_score(x['PKD_Code'], x['Year']), axis=1)
 
     # --- CALCULATE S&T SCORE ---
-    def calculate_scores(group):
-        def norm(s):
-            if s.max() == s.min(): return pd.Series(0.5, index=s.index)
-            return (s - s.min()) / (s.max() - s.min())
-        
-        # Fundamentals
-        group['Norm_Profit'] = norm(group['Profitability'])
-        group['Norm_Dynamics'] = norm(group['Dynamics_YoY'])
-        group['Norm_Liquidity'] = norm(group['Cash_Ratio'])
-        
-        # Debt: Lower is better. 
-        # Calculate norm of debt, then invert.
-        # Handle outliers in debt? Naive min-max is risky if one co has 100x debt.
-        # But for relative ranking within year, it's okay-ish.
-        norm_debt_raw = norm(group['Debt_to_Revenue'])
-        group['Norm_Debt_Score'] = 1.0 - norm_debt_raw # 1 = No Debt, 0 = Max Debt
-        
-        # STABILITY SCORE (BANKING LOGIC)
-        # 40% Profit, 30% Growth, 15% Safety (Debt), 15% Liquidity
-        group['Stability_Score'] = (
-            (0.40 * group['Norm_Profit']) + 
-            (0.30 * group['Norm_Dynamics']) + 
-            (0.15 * group['Norm_Debt_Score']) + 
-            (0.15 * group['Norm_Liquidity'])
-        ) * 100
-        
-        # TRANSFORMATION SCORE (HYBRID: CAPEX + ARXIV)
-        group['Norm_Capex'] = norm(group['Capex_Intensity'])
-        group['Norm_Arxiv'] = norm(group['Arxiv_Papers'])
-        
-        # 50% Money (Capex), 50% Science (ArXiv)
-        group['Transformation_Score'] = ((0.5 * group['Norm_Capex']) + (0.5 * group['Norm_Arxiv'])) * 100
-        
-        # LENDING OPPORTUNITY SCORE
-        # "Ideal Borrower": Invests (Needs money) + Stable (Can pay back) + Liquid (Not desperate)
-        # Formula: 40% Capex + 40% Stability + 20% Liquidity
-        group['Lending_Score'] = (
-            (0.40 * group['Norm_Capex']) + 
-            (0.40 * (group['Stability_Score'] / 100)) + 
-            (0.20 * group['Norm_Liquidity'])
-        ) * 100
+    # Robust normalization (app/normalization.py): every metric is winsorized to the 5th/95th percentile
+    # of its (Year, PKD level) peers and scaled to 0-1. Plain min-max per year let one company with
+    # 100x debt squash the whole scale; the quantile bounds are computed in one grouped pass.
+    df_processed = df_merged.copy()
+    norm_bounds = normalization.compute_bounds(df_processed)
+
+    def norm(col):
+        return normalization.robust_norm(df_processed, norm_bounds, col)
+
+    # Fundamentals
+    df_processed['Norm_Profit'] = norm('Profitability')
+    df_processed['Norm_Dynamics'] = norm('Dynamics_YoY')
+    df_processed['Norm_Liquidity'] = norm('Cash_Ratio')
+
+    # Debt: Lower is better -> inverted
+    df_processed['Norm_Debt_Score'] = 1.0 - norm('Debt_to_Revenue') # 1 = No Debt, 0 = Max Debt
+
+    # STABILITY SCORE (BANKING LOGIC)
+    # 40% Profit, 30% Growth, 15% Safety (Debt), 15% Liquidity
+    df_processed['Stability_Score'] = (
+        (0.40 * df_processed['Norm_Profit']) +
+        (0.30 * df_processed['Norm_Dynamics']) +
+        (0.15 * df_processed['Norm_Debt_Score']) +
+        (0.15 * df_processed['Norm_Liquidity'])
+    ) * 100
+
+    # TRANSFORMATION SCORE (HYBRID: CAPEX + ARXIV)
+    df_processed['Norm_Capex'] = norm('Capex_Intensity')
+    df_processed['Norm_Arxiv'] = norm('Arxiv_Papers')
 
-        return group
+    # 50% Money (Capex), 50% Science (ArXiv)
+    df_processed['Transformation_Score'] = ((0.5 * df_processed['Norm_Capex']) + (0.5 * df_processed['Norm_Arxiv'])) * 100
 
-    df_processed = df_merged.groupby('Year').apply(calculate_scores).reset_index(drop=True)
+    # LENDING OPPORTUNITY SCORE
+    # "Ideal Borrower": Invests (Needs money) + Stable (Can pay back) + Liquid (Not desperate)
+    # Formula: 40% Capex + 40% Stability + 20% Liquidity
+    df_processed['Lending_Score'] = (
+        (0.40 * df_processed['Norm_Capex']) +
+        (0.40 * (df_processed['Stability_Score'] / 100)) +
+        (0.20 * df_processed['Norm_Liquidity'])
+    ) * 100
     
     # Remove Mock Override logic
 
@@ -371,8 +372,9 @@ def load_and_process_real_data():
         df_forecast = pd.DataFrame(forecast_rows)
         df_processed = pd.concat([df_processed, df_forecast], ignore_index=True)
 
-    # Save
+    # Save only the declared columns (schema.py): the Norm_* intermediates are not read by the app
     output_path = os.path.join(data_dir, 'processed_real_index.csv')
+    df_processed = df_processed[[c for c in df_processed.columns if c in schema.INDEX_SCHEMA]]
     df_processed.to_csv(output_path, index=False)
     print(f"Processed Real Index saved to {output_path}. Shape: {df_processed.shape}")
     print(df_processed[['Year', 'PKD_Code', 'Industry_Name', 'Revenue', 'Status']].tail())
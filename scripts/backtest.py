@@ -0,0 +1,151 @@
+"""
+Rolling-origin backtest of the 2025-2026 forecasting engine.
+
+Replays history: train on years <= origin, predict origin+1 .. origin+horizon, roll the origin forward.
+Uses the SAME batched forecasting path as the Ranking view (app/forecasting.py), so the timings
+double as a performance regression check.
+
+Usage:
+    python scripts/backtest.py
+    python scripts/backtest.py --first-origin 2016 --horizon 2 --json backtest.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_PATH, 'app'))
+
+import forecasting  # noqa: E402
+import pipeline  # noqa: E402
+import pkd  # noqa: E402
+
+
+def load_history(data_path):
+    """Loads processed_real_index.csv (same reader as the app), real rows only."""
+    df = pipeline.read_processed_index(data_path)
+    return df[forecasting.real_rows_mask(df)]
+
+
+def predict_origin(df_hist, origin, horizon, metrics):
+    """
+    Runs all models for one forecast origin.
+
+    Models:
+        linear_trend - the app path: batched OLS trend, fallback to the last known value.
+        naive_last   - persistence baseline (last known value).
+
+    Returns:
+        (pd.DataFrame, float): Long predictions [PKD_Code, Target_Year, Metric, Model, Predicted]
+                               and wall-clock seconds spent in the forecasting engine.
+    """
+    train = df_hist[df_hist['Year'] <= origin]
+
+    # Fallback = value in the origin year (the Ranking view falls back to the "current" row)
+    last_known = train[train['Year'] == origin].set_index('PKD_Code')[metrics]
+
+    frames = []
+    elapsed = 0.0
+    for target_year in range(origin + 1, origin + horizon + 1):
+        start = time.perf_counter()
+        df_fc = forecasting.forecast_batch(train, target_year, metrics, years_ahead=horizon)
+        elapsed += time.perf_counter() - start
+
+        df_fc = df_fc.set_index('PKD_Code').reindex(last_known.index)
+        df_fc = df_fc.fillna(last_known)
+
+        for model, values in [('linear_trend', df_fc), ('naive_last', last_known)]:
+            long_df = values.rename_axis('PKD_Code').reset_index().melt(
+                id_vars='PKD_Code', var_name='Metric', value_name='Predicted'
+            )
+            long_df['Target_Year'] = target_year
+            long_df['Model'] = model
+            frames.append(long_df)
+
+    return pd.concat(frames, ignore_index=True), elapsed
+
+
+def summarize_errors(df_pred):
+    """Aggregates MAE / MAPE per (Model, Level, Metric). MAPE skips zero actuals."""
+    df = df_pred.dropna(subset=['Predicted', 'Actual']).copy()
+    df['Abs_Error'] = (df['Predicted'] - df['Actual']).abs()
+    nonzero = df['Actual'] != 0
+    df['Abs_Pct_Error'] = np.where(nonzero, df['Abs_Error'] / df['Actual'].abs().where(nonzero, 1) * 100, np.nan)
+
+    return df.groupby(['Model', 'Level', 'Metric']).agg(
+        MAE=('Abs_Error', 'mean'),
+        MAPE=('Abs_Pct_Error', 'mean'),
+        N=('Abs_Error', 'size')
+    ).reset_index()
+
+
+def run_backtest(df_hist, first_origin=2018, horizon=2, metrics=None):
+    """
+    Rolling-origin backtest over all PKD series.
+
+    Returns:
+        dict: {'errors': pd.DataFrame, 'timings': pd.DataFrame}
+    """
+    metrics = list(metrics or forecasting.METRICS_TO_FORECAST)
+    last_year = int(df_hist['Year'].max())
+
+    actuals = df_hist.melt(
+        id_vars=['PKD_Code', 'Year'], value_vars=metrics, var_name='Metric', value_name='Actual'
+    ).rename(columns={'Year': 'Target_Year'})
+
+    predictions = []
+    timings = []
+    for origin in range(first_origin, last_year):
+        df_pred, elapsed = predict_origin(df_hist, origin, min(horizon, last_year - origin), metrics)
+        predictions.append(df_pred)
+
+        n_series = df_hist.loc[df_hist['Year'] <= origin, 'PKD_Code'].nunique() * len(metrics)
+        timings.append({
+            'Origin': origin,
+            'Series': n_series,
+            'Seconds': elapsed,
+            'Seconds_per_1000_series': elapsed / n_series * 1000 if n_series else np.nan
+        })
+
+    df_pred = pd.concat(predictions, ignore_index=True).merge(actuals, on=['PKD_Code', 'Target_Year', 'Metric'])
+    df_pred['Level'] = pkd.pkd_level(df_pred['PKD_Code']).values
+
+    return {'errors': summarize_errors(df_pred), 'timings': pd.DataFrame(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecasting engine.")
+    parser.add_argument('--data', default=pipeline.DEFAULT_INDEX_PATH)
+    parser.add_argument('--first-origin', type=int, default=2018, help="Last training year of the first fold.")
+    parser.add_argument('--horizon', type=int, default=2, help="Years predicted after each origin.")
+    parser.add_argument('--json', help="Optional path for a JSON dump of the results.")
+    args = parser.parse_args()
+
+    df_hist = load_history(args.data)
+    print(f"Backtesting {df_hist['PKD_Code'].nunique()} PKD series x {len(forecasting.METRICS_TO_FORECAST)} metrics...")
+
+    results = run_backtest(df_hist, args.first_origin, args.horizon)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 160):
+        print("\n--- ACCURACY (per Model / Level / Metric) ---")
+        print(results['errors'].to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+        print("\n--- ACCURACY (per Model / Level, mean over metrics) ---")
+        print(results['errors'].groupby(['Model', 'Level'])[['MAE', 'MAPE']].mean().to_string(float_format=lambda v: f"{v:,.3f}"))
+
+        print("\n--- SPEED ---")
+        print(results['timings'].to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({k: v.to_dict(orient='records') for k, v in results.items()}, f, indent=2)
+        print(f"Saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
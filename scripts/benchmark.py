@@ -0,0 +1,491 @@
+"""
+Performance benchmark of the app's hot paths on synthetic datasets.
+
+Each hot path is timed in isolation on a generated processed_real_index scaled to
+1x / 10x / 100x of the current row count (more PKD codes, more years). The cases run on the
+frame as the app loads it (pipeline.read_processed_index); every scale also reports the memory
+footprint (bytes per row with inferred vs declared dtypes).
+
+Usage:
+    python scripts/benchmark.py                          # 1x and 10x
+    python scripts/benchmark.py --scales 1x 10x 100x
+    python scripts/benchmark.py --save-baseline          # store current timings as the baseline
+    python scripts/benchmark.py --check                  # exit code 1 if any case regressed
+
+Baselines are machine specific; save them on the machine that runs the checks.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_PATH, 'app'))
+
+import charts  # noqa: E402
+import correlation  # noqa: E402
+import cube  # noqa: E402
+import features  # noqa: E402
+import figure_cache  # noqa: E402
+import forecasting  # noqa: E402
+import normalization  # noqa: E402
+import parallel  # noqa: E402
+import peers  # noqa: E402
+import pipeline  # noqa: E402
+import pkd  # noqa: E402
+import schema  # noqa: E402
+import scoring  # noqa: E402
+import simulation  # noqa: E402
+import store  # noqa: E402
+import tensor  # noqa: E402
+import utils  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BASE_PATH, 'data', 'benchmarks', 'baseline.json')
+
+# Scale -> (PKD code multiplier, year multiplier)
+SCALES = {
+    '1x': (1, 1),
+    '10x': (10, 1),
+    '100x': (10, 10)
+}
+
+
+# --- SYNTHETIC DATA ---
+
+def make_synthetic_index(code_scale=1, year_scale=1, seed=42):
+    """
+    Generates a synthetic processed_real_index.csv-like DataFrame.
+
+    At scale 1 the PKD tree has roughly the size of the real one (~19 sections, ~75 divisions,
+    ~225 groups, ~450 classes) over 2005-2024. 'code_scale' widens the tree (more groups and
+    classes per division), 'year_scale' extends the history backwards.
+
+    Args:
+        code_scale (int): Multiplier for the number of PKD codes.
+        year_scale (int): Multiplier for the number of years.
+        seed (int): Random seed (datasets are deterministic).
+
+    Returns:
+        pd.DataFrame: Long-format dataset with the columns used by the app.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_divisions = min(99, 75 * code_scale)
+    groups_per_division = min(10, 3 * code_scale)
+    classes_per_group = min(10, 2 * code_scale)
+
+    codes = [f"SEK_{letter}" for letter in pkd.SECTION_RANGES]
+    for d in range(1, n_divisions + 1):
+        codes.append(f"{d:02d}.")
+        for g in range(1, groups_per_division + 1):
+            codes.append(f"{d:02d}.{g % 10}")
+            for c in range(1, classes_per_group + 1):
+                codes.append(f"{d:02d}.{g % 10}{c % 10}")
+
+    n_years = 20 * year_scale
+    years = np.arange(2024 - n_years + 1, 2025)
+
+    n_codes, n_rows = len(codes), len(codes) * n_years
+    code_col = np.repeat(np.array(codes, dtype=object), n_years)
+    year_col = np.tile(years, n_codes)
+    t = np.tile(np.arange(n_years), n_codes)
+
+    # Revenue follows a noisy exponential trend per industry
+    base = np.repeat(rng.lognormal(8, 1.5, n_codes), n_years)
+    growth = np.repeat(rng.normal(0.04, 0.03, n_codes), n_years)
+    revenue = base * (1 + growth) ** t * rng.normal(1, 0.05, n_rows).clip(0.5)
+    entities = np.repeat(rng.integers(50, 5000, n_codes), n_years).astype(float)
+
+    df = pd.DataFrame({
+        'PKD_Code': code_col,
+        'Industry_Name': pd.Series(code_col).radd('Branża ').values,
+        'Year': year_col,
+        'Revenue': revenue,
+        'Entity_Count': entities,
+        'Profitable_Ent': entities * rng.uniform(0.5, 0.95, n_rows),
+        'Net_Profit': revenue * rng.normal(0.05, 0.04, n_rows),
+        'Liabilities_Long': revenue * rng.uniform(0, 1, n_rows),
+        'Liabilities_Short': revenue * rng.uniform(0.1, 0.8, n_rows),
+        'Cash': revenue * rng.uniform(0, 0.4, n_rows),
+        'Investment': revenue * rng.uniform(0, 0.1, n_rows),
+        'Bankruptcy_Count': rng.poisson(entities * 0.01).astype(float),
+        'Arxiv_Papers': np.where(year_col >= 2019, rng.integers(0, 3000, n_rows), 0)
+    })
+
+    # Derived metrics (same formulas as scripts/04_real_data_loader.py)
+    df['Total_Debt'] = df['Liabilities_Long'] + df['Liabilities_Short']
+    df['Capex_Intensity'] = df['Investment'] / df['Revenue'] * 100
+    df['Net_Profit_Margin'] = df['Net_Profit'] / df['Revenue'] * 100
+    df['Debt_to_Revenue'] = df['Total_Debt'] / df['Revenue']
+    df['Cash_Ratio'] = df['Cash'] / df['Liabilities_Short']
+    df['Risk_Per_1000'] = df['Bankruptcy_Count'] / df['Entity_Count'] * 1000
+    df['Profitability'] = df['Profitable_Ent'] / df['Entity_Count']
+    df['Bankruptcy_Rate'] = df['Bankruptcy_Count'] / df['Entity_Count'] * 100
+    df['Revenue_Prev_Year'] = df.groupby('PKD_Code')['Revenue'].shift(1)
+    df['Dynamics_YoY'] = ((df['Revenue'] - df['Revenue_Prev_Year']) / df['Revenue_Prev_Year']).fillna(0)
+
+    df['Stability_Score'] = rng.uniform(20, 90, n_rows)
+    df['Transformation_Score'] = rng.uniform(10, 80, n_rows)
+    df['Lending_Score'] = rng.uniform(10, 80, n_rows)
+    df['Status'] = np.where(df['Bankruptcy_Rate'] > 1.5, 'CRITICAL', 'Neutral')
+    df['Is_Forecast'] = False
+    return df
+
+
+# --- BENCHMARK CASES ---
+# Every case receives the prepared context and returns the number of rows it processed.
+
+BENCHMARK_CASES = {}
+
+
+def benchmark_case(name):
+    def register(func):
+        BENCHMARK_CASES[name] = func
+        return func
+    return register
+
+
+def prepare_context(df_all, work_dir):
+    """Precomputes inputs shared by the cases (so setup cost is not timed)."""
+    csv_path = os.path.join(work_dir, 'processed_real_index.csv')
+    df_all.to_csv(csv_path, index=False)
+    # The cases run on the frame as the app loads it (declared lean dtypes, schema.py)
+    df_all = pipeline.read_processed_index(csv_path)
+
+    last_year = int(df_all['Year'].max())
+    df_year = df_all[df_all['Year'] == last_year]
+    df_l4 = df_year[pkd.pkd_level(df_year['PKD_Code']).values == 'L4']
+    sample_pkd = df_l4['PKD_Code'].iloc[0]
+    index_store = store.build_store(df_all)
+
+    return {
+        'df_all': df_all,
+        'csv_path': csv_path,
+        'year': last_year,
+        'df_l4': df_l4,
+        'hist_l4': df_all[df_all['PKD_Code'].isin(df_l4['PKD_Code'])],
+        'hist_one': df_all[df_all['PKD_Code'] == sample_pkd].sort_values('Year'),
+        'kpi_cube': cube.build_cube(df_all),
+        'store': index_store,
+        'sector': pkd.sector_labels(df_l4['PKD_Code'].iloc[:1], df_all).iloc[0],
+        'norm_bounds': normalization.compute_bounds(df_all),
+        'tensor': tensor.build_tensor(df_all),
+        'parents': df_year.loc[pkd.pkd_level(df_year['PKD_Code']).values != 'L4', 'PKD_Code'].tolist()
+    }
+
+
+@benchmark_case('load_data')
+def bench_load_data(ctx):
+    return len(pipeline.read_processed_index(ctx['csv_path']))
+
+
+@benchmark_case('recalculate_future_st_scores')
+def bench_rescoring(ctx):
+    return len(utils.recalculate_future_st_scores(ctx['df_l4']))
+
+
+@benchmark_case('ranking_forecast')
+def bench_ranking_forecast(ctx):
+    df_forecast = forecasting.forecast_batch(ctx['hist_l4'], ctx['year'] + 2)
+    return len(df_forecast) * len(forecasting.METRICS_TO_FORECAST)
+
+
+@benchmark_case('ranking_pipeline')
+def bench_ranking_pipeline(ctx):
+    # Full Ranking view: filters + rescoring + forecast + lending + classification
+    return len(pipeline.build_report(ctx['df_all'], ctx['year'], 'L4'))
+
+
+@benchmark_case('stress_test_1k')
+def bench_stress_test(ctx):
+    # Monte Carlo bands of the 2026 ranking: 1,000 paths x all L4 classes
+    result = simulation.stress_test(ctx['df_l4'], ctx['df_all'], n_paths=1000)
+    return len(result) * 1000
+
+
+# Nightly grid (all levels x all years x 2 weight presets), sharded by section; compare the
+# ranking_grid_w* rows for the scaling (process start-up is included in the timing). w2 / w4 run
+# in-process when parallel.pool_workers() falls back (small grid or fewer cores).
+GRID_WEIGHTS = [scoring.DEFAULT_WEIGHTS, {'w_growth': 5.0, 'w_profit': 5.0, 'w_safety': 5.0}]
+
+
+def _register_grid_case(workers):
+    @benchmark_case(f'ranking_grid_w{workers}')
+    def bench_ranking_grid(ctx):
+        return len(parallel.build_reports(ctx['df_all'], weights_list=GRID_WEIGHTS, workers=workers))
+
+
+for _workers in (1, 2, 4):
+    _register_grid_case(_workers)
+
+
+@benchmark_case('view_filter_pandas')
+def bench_view_filter_pandas(ctx):
+    # Sidebar filters as chained masks over df_all (year -> level -> sector -> revenue)
+    df = ctx['df_all'][ctx['df_all']['Year'] == ctx['year']]
+    df = pkd.filter_level(df, 'L4')
+    sectors = pkd.sector_labels(df['PKD_Code'], ctx['df_all'])
+    df = df[(sectors == ctx['sector']).values]
+    return len(df[df['Revenue'] >= 0].copy())
+
+
+@benchmark_case('view_filter_store')
+def bench_view_filter_store(ctx):
+    # Same filters pushed down to the embedded SQLite store
+    return len(store.snapshot(ctx['store'], ctx['year'], 'L4', ctx['sector'], 0))
+
+
+@benchmark_case('drilldown_children')
+def bench_drilldown_children(ctx):
+    # Up to 50 parent lookups, as done by consecutive drill-down clicks
+    parents = ctx['parents'][:50]
+    for parent_code in parents:
+        pkd.find_children(ctx['df_all'], parent_code, ctx['year'])
+    return len(parents)
+
+
+@benchmark_case('drilldown_children_store')
+def bench_drilldown_children_store(ctx):
+    # Same lookups through the store's (Parent, Year) index
+    parents = ctx['parents'][:50]
+    for parent_code in parents:
+        store.children(ctx['store'], parent_code, ctx['year'])
+    return len(parents)
+
+
+@benchmark_case('drilldown_row')
+def bench_drilldown_row(ctx):
+    # The row of every drill-down level, as a pandas mask over df_all
+    df_all = ctx['df_all']
+    parents = ctx['parents'][:50]
+    for parent_code in parents:
+        df_all[(df_all['PKD_Code'] == parent_code) & (df_all['Year'] == ctx['year'])]
+    return len(parents)
+
+
+@benchmark_case('drilldown_row_store')
+def bench_drilldown_row_store(ctx):
+    # Same point lookups through the store's (PKD_Code, Year) index, projected as in main.py
+    parents = ctx['parents'][:50]
+    for parent_code in parents:
+        store.row(ctx['store'], parent_code, ctx['year'], columns=schema.VIEW_COLUMNS['drill_row'])
+    return len(parents)
+
+
+@benchmark_case('chart_main_bubble')
+def bench_chart_main_bubble(ctx):
+    charts.create_main_bubble_chart(ctx['df_l4'], ctx['df_all']['Revenue'].max())
+    return len(ctx['df_l4'])
+
+
+@benchmark_case('chart_main_bubble_cache_hit')
+def bench_chart_main_bubble_cache_hit(ctx):
+    # Rerun with unchanged inputs: fingerprint + lookup only (first repeat builds the figure)
+    previous = figure_cache.set_enabled(True)
+    try:
+        charts.create_main_bubble_chart(ctx['df_l4'], ctx['df_all']['Revenue'].max())
+    finally:
+        figure_cache.set_enabled(previous)
+    return len(ctx['df_l4'])
+
+
+@benchmark_case('chart_risk_radar')
+def bench_chart_risk_radar(ctx):
+    charts.create_risk_radar_chart(ctx['df_l4'].copy())
+    return len(ctx['df_l4'])
+
+
+@benchmark_case('chart_history_and_st_time')
+def bench_chart_history(ctx):
+    df_hist = ctx['hist_one']
+    for metric in ['Net_Profit_Margin', 'Debt_to_Revenue', 'Cash_Ratio', 'Bankruptcy_Rate']:
+        charts.create_historical_chart(df_hist.copy(), metric, metric, metric)
+    charts.create_st_time_chart(df_hist.copy())
+    return len(df_hist) * 5
+
+
+@benchmark_case('chart_stability_radar')
+def bench_chart_stability_radar(ctx):
+    charts.create_stability_radar_chart(ctx['df_l4'].iloc[0], normalization.bounds_for(ctx['norm_bounds'], ctx['year'], 'L4'))
+    return 1
+
+
+@benchmark_case('kpi_cube_build')
+def bench_kpi_cube_build(ctx):
+    # Done once per load: additive KPI sums per (Year, Level, Sector)
+    return len(cube.build_cube(ctx['df_all']))
+
+
+@benchmark_case('kpi_cube_lookup')
+def bench_kpi_cube_lookup(ctx):
+    # Headline KPIs of the "all sectors" L4 view (sum over the sector rows)
+    cube.kpis(cube.lookup(ctx['kpi_cube'], ctx['year'], 'L4'))
+    return 1
+
+
+@benchmark_case('peer_percentiles')
+def bench_peer_percentiles(ctx):
+    # Done once per load / weights: grouped rank of every metric per (Year, Level, Section)
+    return len(peers.compute_percentiles(ctx['df_all']))
+
+
+@benchmark_case('normalization_bounds')
+def bench_normalization_bounds(ctx):
+    # Done once per load: quantiles of every (Year, Level, Metric)
+    return len(normalization.compute_bounds(ctx['df_all']))
+
+
+@benchmark_case('tensor_build')
+def bench_tensor_build(ctx):
+    # Done once per load: long format -> dense PKD x Year x Metric float32 tensor
+    return int(tensor.build_tensor(ctx['df_all'])['present'].sum())
+
+
+@benchmark_case('forecast_all_long')
+def bench_forecast_all_long(ctx):
+    # 2026 trends of every PKD code on the long-format frame (grouped by PKD via bincount)
+    return len(forecasting.forecast_batch(ctx['df_all'], ctx['year'] + 2)) * len(forecasting.METRICS_TO_FORECAST)
+
+
+@benchmark_case('forecast_all_tensor')
+def bench_forecast_all_tensor(ctx):
+    # Same forecast along the year axis of the tensor (no re-grouping)
+    return len(tensor.forecast(ctx['tensor'], ctx['year'] + 2)) * len(forecasting.METRICS_TO_FORECAST)
+
+
+@benchmark_case('risk_features')
+def bench_risk_features(ctx):
+    # Rolling CAGR / volatility / drawdown of every PKD (done once per load)
+    return len(features.add_risk_features(ctx['df_all']))
+
+
+@benchmark_case('correlation_l4')
+def bench_correlation_l4(ctx):
+    # PKD x PKD correlations (dynamics + bankruptcy rate) and top-k peers of all L4 codes
+    return len(correlation.build_correlations(ctx['tensor'], 'L4')['codes'])
+
+
+# --- MEMORY ---
+
+def memory_report(csv_path):
+    """Bytes per row of the index as inferred by pd.read_csv (before) and with the declared schema (after)."""
+    df_inferred = pd.read_csv(csv_path, dtype={'PKD_Code': str})
+    df_lean = pipeline.read_processed_index(csv_path)
+    before, after = schema.bytes_per_row(df_inferred), schema.bytes_per_row(df_lean)
+    return {
+        'rows': len(df_lean),
+        'bytes_per_row_before': before,
+        'bytes_per_row_after': after,
+        'total_mb_after': after * len(df_lean) / 1e6,
+        'reduction': 1 - after / before
+    }
+
+
+# --- RUNNER ---
+
+def time_case(func, ctx, repeat):
+    """Runs one case 'repeat' times; returns median/min seconds and throughput."""
+    func(ctx)  # warm-up (imports, lazy plotly validators)
+
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func(ctx)
+        timings.append(time.perf_counter() - start)
+
+    median = float(np.median(timings))
+    return {
+        'median_s': median,
+        'min_s': float(np.min(timings)),
+        'rows': int(rows),
+        'rows_per_s': rows / median if median > 0 else float('inf')
+    }
+
+
+def run_benchmarks(scales, cases, repeat):
+    # Chart cases time the build itself; only *_cache_hit cases turn the figure cache on
+    figure_cache.set_enabled(False)
+    results = {}
+    for scale in scales:
+        code_scale, year_scale = SCALES[scale]
+        df_all = make_synthetic_index(code_scale, year_scale)
+        print(f"\n=== Scale {scale}: {len(df_all):,} rows, {df_all['PKD_Code'].nunique():,} PKD codes ===")
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            ctx = prepare_context(df_all, work_dir)
+            mem = memory_report(ctx['csv_path'])
+            results[f"{scale}/memory"] = mem
+            print(f"{'memory (bytes/row)':<32} {mem['bytes_per_row_before']:>10.0f} -> {mem['bytes_per_row_after']:.0f} "
+                  f"(-{mem['reduction']:.0%}, {mem['total_mb_after']:.1f} MB)")
+            for name in cases:
+                res = time_case(BENCHMARK_CASES[name], ctx, repeat)
+                results[f"{scale}/{name}"] = res
+                print(f"{name:<32} {res['median_s'] * 1000:>10.1f} ms  {res['rows_per_s']:>14,.0f} rows/s")
+    return results
+
+
+def check_against_baseline(results, baseline, tolerance):
+    """Returns the list of regressed cases (median slower than baseline * (1 + tolerance))."""
+    regressions = []
+    for key, res in results.items():
+        if key not in baseline or 'median_s' not in res:
+            continue
+        limit = baseline[key]['median_s'] * (1 + tolerance)
+        if res['median_s'] > limit:
+            regressions.append((key, baseline[key]['median_s'], res['median_s']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the app's hot paths on synthetic data.")
+    parser.add_argument('--scales', nargs='+', default=['1x', '10x'], choices=list(SCALES))
+    parser.add_argument('--cases', nargs='+', default=list(BENCHMARK_CASES), choices=list(BENCHMARK_CASES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON path.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline.")
+    parser.add_argument('--check', action='store_true', help="Fail if any case is slower than the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed slowdown vs baseline (0.5 = +50%%).")
+    parser.add_argument('--json', help="Optional path for a JSON dump of the results.")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.cases, args.repeat)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}. Run with --save-baseline first.")
+            sys.exit(2)
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = check_against_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ PERFORMANCE REGRESSIONS:")
+            for key, old, new in regressions:
+                print(f"  {key}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({new / old:.1f}x)")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Batch generator of the "Raport_Prognoza_2026_Sektory" CSV (Ranking & Eksport view) without Streamlit.
+
+Every combination of --levels x --years x --weights produces one CSV. The 2026 forecast is computed
+once for all PKD codes and reused by every combination.
+
+Usage:
+    python scripts/ranking_report.py --levels L1 L4 --years 2024
+    python scripts/ranking_report.py --levels L1 L2 L3 L4 --years 2023 2024 --weights 4,6,3 5,5,5
+    python scripts/ranking_report.py --build-cache    # all levels x all years (default weights) -> report cache
+    python scripts/ranking_report.py --levels L1 L2 L3 L4 --years 2020 2021 2022 2023 2024 --workers 4
+
+With --workers > 1 the grid is sharded by PKD section across a process pool (app/parallel.py).
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_PATH, 'app'))
+
+import parallel  # noqa: E402
+import pipeline  # noqa: E402
+import pkd  # noqa: E402
+import report_cache  # noqa: E402
+import scoring  # noqa: E402
+
+
+def parse_weights(text):
+    """'4,6,3' -> {'w_growth': 4.0, 'w_profit': 6.0, 'w_safety': 3.0}"""
+    values = [float(v) for v in text.split(',')]
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError("Weights must be 'growth,profit,safety', e.g. 4,6,3")
+    return dict(zip(['w_growth', 'w_profit', 'w_safety'], values))
+
+
+def report_filename(level, year, weights):
+    w = weights
+    return f"Raport_Prognoza_2026_Sektory_{level}_{year}_w{w['w_growth']:g}-{w['w_profit']:g}-{w['w_safety']:g}.csv"
+
+
+def main():
+    default_w = scoring.DEFAULT_WEIGHTS
+    parser = argparse.ArgumentParser(description="Generate 2026 Ranking reports (CSV) in batch.")
+    parser.add_argument('--data', default=pipeline.DEFAULT_INDEX_PATH)
+    parser.add_argument('--levels', nargs='+', default=pkd.LEVELS, choices=pkd.LEVELS)
+    parser.add_argument('--years', nargs='+', type=int, default=[2024])
+    parser.add_argument('--weights', nargs='+', type=parse_weights,
+                        default=[dict(default_w)],
+                        help=f"growth,profit,safety (default {default_w['w_growth']:g},{default_w['w_profit']:g},{default_w['w_safety']:g})")
+    parser.add_argument('--kill-switch', type=float, default=scoring.DEFAULT_KILL_SWITCH)
+    parser.add_argument('--out-dir', default=os.path.join(BASE_PATH, 'data', 'results'))
+    parser.add_argument('--build-cache', action='store_true',
+                        help="Precompute every level x year (default weights) into the report cache used by the app.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Max processes; > 1 shards the work by PKD section (same output as 1). "
+                             "Capped at the CPU count; small grids run in-process.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df_all = pipeline.read_processed_index(args.data)
+
+    if args.build_cache:
+        report = parallel.build_reports(df_all, workers=args.workers)
+        manifest = report_cache.save(report, args.data)
+        print(f"Cached {len(manifest['keys'])} reports ({manifest['rows']} rows) in {report_cache.CACHE_DIR}")
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+        return
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.workers > 1:
+        # Whole grid in the pool, then one CSV per key
+        grid = parallel.build_reports(df_all, years=args.years, weights_list=args.weights, workers=args.workers)
+        for level in args.levels:
+            for year in args.years:
+                for weights in args.weights:
+                    report = report_cache.lookup(grid, level, year, **weights)
+                    if report is None:
+                        print(f"{level} | {year} | {weights} -> no data")
+                        continue
+                    out_path = os.path.join(args.out_dir, report_filename(level, year, weights))
+                    report.to_csv(out_path, index=False)
+                    print(f"{level} | {year} | {weights} -> {out_path} ({len(report)} rows)")
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+        return
+
+    # One batched forecast for all PKD codes (independent of year / weights)
+    df_forecast = pipeline.forecast_metrics(df_all)
+
+    for level in args.levels:
+        for year in args.years:
+            for weights in args.weights:
+                report = pipeline.build_report(
+                    df_all, year, level, kill_switch_limit=args.kill_switch, df_forecast=df_forecast, **weights
+                )
+                out_path = os.path.join(args.out_dir, report_filename(level, year, weights))
+                report.to_csv(out_path, index=False)
+                print(f"{level} | {year} | {weights} -> {out_path} ({len(report)} rows)")
+
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Cold-start benchmark of the entry points (import time, `python -X importtime`).
+
+Every target is started in a fresh interpreter with -X importtime:
+    app/main.py   - the module-level imports of the Streamlit entry point (the script body itself
+                    needs a Streamlit runtime; data loading is covered by benchmark.py / warm-up)
+    scripts/*.py  - the whole module loaded without running its __main__ block
+
+Reported: median wall time of the interpreter (incl. startup), median total import time and the
+heaviest top-level imports (what to make lazy next).
+
+Usage:
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --targets app/main.py scripts/03_ai_generator.py --top 10
+    python scripts/startup_benchmark.py --save-baseline
+    python scripts/startup_benchmark.py --check          # exit code 1 if any target regressed
+
+Baselines are machine specific; save them on the machine that runs the checks.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(BASE_PATH, 'app')
+
+DEFAULT_BASELINE = os.path.join(BASE_PATH, 'data', 'benchmarks', 'startup_baseline.json')
+
+# list_models.py has no __main__ guard (it calls the Gemini API at import), so it isn't a target
+TARGETS = [
+    'app/main.py',
+    'scripts/03_ai_generator.py',
+    'scripts/04_real_data_loader.py',
+    'scripts/05_arxiv_loader.py',
+    'scripts/backtest.py',
+    'scripts/ranking_report.py',
+    'scripts/scenario_grid.py',
+    'scripts/stress_test.py',
+    'scripts/benchmark.py',
+]
+
+
+def entry_imports(path):
+    """Module-level import statements of a script, as source (the Streamlit app can't be run bare)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def startup_code(target):
+    """Python source that cold-starts one target."""
+    path = os.path.join(BASE_PATH, target)
+    if target == 'app/main.py':
+        return f"import sys\nsys.path.insert(0, {APP_PATH!r})\n" + entry_imports(path)
+    return f"import runpy\nrunpy.run_path({path!r}, run_name='__startup__')"
+
+
+def parse_importtime(stderr):
+    """
+    Top-level imports from -X importtime output.
+
+    Returns:
+        list: [(module, cumulative seconds)] of the imports done directly by the entry point.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # Nesting is encoded by indentation (2 spaces per level after the separator's space)
+        if len(name) - len(name.lstrip()) == 1:
+            imports.append((name.strip(), int(cumulative) / 1e6))
+    return imports
+
+
+def time_target(target, repeat):
+    """Cold-starts a target 'repeat' times; returns median wall / import seconds and the top imports."""
+    code = startup_code(target)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, cwd=BASE_PATH)
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"}
+        imports = parse_importtime(proc.stderr)
+        runs.append((wall, sum(t for _, t in imports), imports))
+
+    runs.sort(key=lambda r: r[1])
+    median_run = runs[len(runs) // 2]
+    return {
+        'median_s': float(np.median([r[0] for r in runs])),
+        'import_s': float(np.median([r[1] for r in runs])),
+        'top_imports': sorted(median_run[2], key=lambda x: -x[1])
+    }
+
+
+def run_startup(targets, repeat, top):
+    results = {}
+    for target in targets:
+        res = time_target(target, repeat)
+        if 'error' in res:
+            print(f"{target:<34} FAILED: {res['error']}")
+            continue
+        heaviest = ", ".join(f"{name} {t * 1000:.0f}" for name, t in res['top_imports'][:top])
+        print(f"{target:<34} {res['median_s'] * 1000:>8.0f} ms  (imports {res['import_s'] * 1000:>6.0f} ms: {heaviest})")
+        res['top_imports'] = res['top_imports'][:top]
+        results[f"startup/{target}"] = res
+    return results
+
+
+def check_against_baseline(results, baseline, tolerance):
+    """Returns the list of regressed targets (median slower than baseline * (1 + tolerance))."""
+    regressions = []
+    for key, res in results.items():
+        if key not in baseline:
+            continue
+        limit = baseline[key]['median_s'] * (1 + tolerance)
+        if res['median_s'] > limit:
+            regressions.append((key, baseline[key]['median_s'], res['median_s']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start (import time) benchmark of the app and the scripts.")
+    parser.add_argument('--targets', nargs='+', default=TARGETS, choices=TARGETS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=3, help="Heaviest top-level imports to report per target.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON path.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline.")
+    parser.add_argument('--check', action='store_true', help="Fail if any target is slower than the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed slowdown vs baseline (0.3 = +30%%).")
+    parser.add_argument('--json', help="Optional path for a JSON dump of the results.")
+    args = parser.parse_args()
+
+    results = run_startup(args.targets, args.repeat, args.top)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}. Run with --save-baseline first.")
+            sys.exit(2)
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = check_against_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ STARTUP REGRESSIONS:")
+            for key, old, new in regressions:
+                print(f"  {key}: {old * 1000:.0f} ms -> {new * 1000:.0f} ms ({new / old:.1f}x)")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Monte Carlo stress test of the 2026 Lending Opportunity ranking (app/simulation.py).
+
+Usage:
+    python scripts/stress_test.py --level L4 --year 2024 --paths 10000
+    python scripts/stress_test.py --level L3 --paths 20000 --workers 4 --out data/results/stress_L3.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_PATH, 'app'))
+
+import pipeline  # noqa: E402
+import pkd  # noqa: E402
+import scoring  # noqa: E402
+import simulation  # noqa: E402
+
+
+def main():
+    w = scoring.DEFAULT_WEIGHTS
+    parser = argparse.ArgumentParser(description="Percentile bands of the 2026 ranking from residual-bootstrap paths.")
+    parser.add_argument('--data', default=pipeline.DEFAULT_INDEX_PATH)
+    parser.add_argument('--level', default='L4', choices=pkd.LEVELS)
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--paths', type=int, default=simulation.DEFAULT_PATHS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1, help="Processes for the path chunks (1 = in-process).")
+    parser.add_argument('--kill-switch', type=float, default=scoring.DEFAULT_KILL_SWITCH)
+    parser.add_argument('--top', type=int, default=20, help="Rows printed to the console.")
+    parser.add_argument('--out', help="Optional CSV with the bands of all industries.")
+    args = parser.parse_args()
+
+    df_all = pipeline.read_processed_index(args.data)
+    df_view = pipeline.rescore(pipeline.select_view(df_all, args.year, args.level, kill_switch_limit=args.kill_switch), **w)
+
+    start = time.perf_counter()
+    result = simulation.stress_test(df_view, df_all, n_paths=args.paths, kill_switch_limit=args.kill_switch,
+                                    seed=args.seed, workers=args.workers, **w)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.paths:,} paths x {len(result)} industries in {elapsed:.2f} s\n")
+    cols = ['PKD_Code', 'Lending_Score_2026', 'Lending_P5', 'Lending_P50', 'Lending_P95', 'P_Kill_Switch']
+    print(result[cols].head(args.top).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"\nSaved bands to {args.out}")
+
+
+if __name__ == "__main__":
+    main()